@@ -0,0 +1,104 @@
+from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.cache import cache
+from django.http import Http404
+from .models import Project
+
+# Roles of a user in a project: its owner, a staff member or a member of the project
+OWNER = 'owner'
+STAFF = 'staff'
+MEMBER = 'member'
+# Roles allowed to change a project and its resources
+MANAGERS = (OWNER, STAFF)
+
+# Visible projects are dropped from the cache after a day at most
+ACCESS_TIMEOUT = 60 * 60 * 24
+
+
+def visible_projects(user):
+    """
+    Return {project id: role} for the projects the user owns or is a member of (staff see every
+    project without being listed). Cached per user until they gain or lose access to a project,
+    the access version being loaded with the user.
+    """
+    # the join date tells apart users given the id of a deleted one
+    key = 'visible-projects-{}-{}-{}'.format(user.pk, user.date_joined.timestamp(), user.access_version)
+    projects = cache.get(key)
+    if projects is None:
+        projects = dict.fromkeys(
+            Project.members.through.objects.filter(myuser_id=user.pk).values_list('project_id', flat=True), MEMBER)
+        projects.update(dict.fromkeys(Project.objects.filter(owner_id=user.pk).values_list('pk', flat=True), OWNER))
+        cache.set(key, projects, ACCESS_TIMEOUT)
+    return projects
+
+
+def user_role(user, project_id):
+    """Return the role of a user in a project from their visible projects, None if they cannot access it."""
+    if not user.is_authenticated:
+        return None
+    role = visible_projects(user).get(int(project_id))
+    if role != OWNER and user.is_staff:
+        return STAFF
+    return role
+
+
+def resolve_access(request, project_id):
+    """
+    Return the project and the role of the request's user in it, (None, None) if the project
+    does not exist and a None role if the user has no access to it.
+
+    The project and its owner are loaded with one query, once per request: every later check
+    of the same project in the request reuses them. The role is read from the visible projects.
+    """
+    accesses = request.__dict__.setdefault('_project_access', {})
+    key = str(project_id)
+    if key not in accesses:
+        project = Project.objects.select_related('owner').filter(pk=project_id).first() if key.isdigit() else None
+        accesses[key] = (project, user_role(request.user, project_id) if project is not None else None)
+    return accesses[key]
+
+
+def project_role(request, project_id):
+    """Return the role of the request's user in the project, None if they cannot access it."""
+    if not str(project_id).isdigit():
+        return None
+    return user_role(request.user, project_id)
+
+
+def get_project_or_404(request, project_id):
+    """Return the project and the role of the request's user in it, raise Http404 if it does not exist."""
+    project, role = resolve_access(request, project_id)
+    if project is None:
+        raise Http404('Project does not exist')
+    return project, role
+
+
+class ProjectAccessMixin(UserPassesTestMixin):
+    """
+    Let the users having one of the allowed roles in the project of the view in. The project is
+    read from the pk URL argument, views of an object of a project override get_project_id.
+    """
+    allowed_roles = (OWNER, STAFF, MEMBER)
+
+    def get_project_id(self):
+        return self.kwargs['pk']
+
+    def get_project(self):
+        return get_project_or_404(self.request, self.get_project_id())[0]
+
+    def get_role(self):
+        return get_project_or_404(self.request, self.get_project_id())[1]
+
+    def test_func(self):
+        return self.get_role() in self.allowed_roles
+
+
+class ProjectObjectAccessMixin(ProjectAccessMixin):
+    """Access to an object of a project, such as a resource, loaded once for the check and the view."""
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object(queryset)
+        return self._object
+
+    def get_project_id(self):
+        return self.get_object().project_id
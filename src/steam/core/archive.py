@@ -0,0 +1,256 @@
+import base64
+import json
+import os
+import tempfile
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime
+from .bulk import bulk_create_in_project
+from .export import keyset_chunks
+from .models import Project, Task, Meeting, Resource, MyUser
+
+# Archives are gzip-compressed NDJSON: one record per line, each with its type. The project comes
+# first, then its members, tasks, dependencies, meetings and resources, the content of each resource
+# file following its resource in base64 chunks. Ids are those of the exporting instance, they are
+# replaced on restore, and users are referred to by username.
+ARCHIVE_VERSION = 1
+# Rows read and inserted per query, and bytes of a resource file per record
+ARCHIVE_CHUNK_SIZE = 2000
+FILE_CHUNK_SIZE = 48 * 1024
+
+TASK_FIELDS = ('pk', 'name', 'description', 'start_date', 'end_date', 'status')
+MEETING_FIELDS = ('pk', 'name', 'description', 'start_date', 'end_date', 'status')
+RESOURCE_FIELDS = ('pk', 'name', 'description', 'file', 'uploaded_at', 'is_hidden')
+
+
+class ArchiveError(Exception):
+    """The archive cannot be restored."""
+
+
+def archive_records(project, include_files=False, size=ARCHIVE_CHUNK_SIZE):
+    """Yield the records of the archive of a project, reading its rows in keyset chunks."""
+    yield {'type': 'archive', 'version': ARCHIVE_VERSION}
+    yield {'type': 'project', 'name': project.name, 'description': project.description,
+           'start_date': project.start_date, 'end_date': project.end_date, 'is_archived': project.is_archived,
+           'key': project.key, 'owner': project.owner.username}
+    for username in project.members.order_by('pk').values_list('username', flat=True).iterator():
+        yield {'type': 'member', 'username': username}
+
+    tasks = Task.objects.filter(project=project)
+    for chunk in keyset_chunks(tasks, TASK_FIELDS, size):
+        assignees = {}
+        for task_id, username in Task.assignees.through.objects.filter(
+                task_id__in=[row['pk'] for row in chunk]).values_list('task_id', 'myuser__username'):
+            assignees.setdefault(task_id, []).append(username)
+        for row in chunk:
+            yield dict(row, type='task', assignees=assignees.get(row['pk'], []))
+    dependencies = Task.predecessors.through.objects.filter(from_task__project=project)
+    for chunk in keyset_chunks(dependencies, ('pk', 'from_task_id', 'to_task_id'), size):
+        for row in chunk:
+            yield {'type': 'dependency', 'task': row['from_task_id'], 'predecessor': row['to_task_id']}
+    for chunk in keyset_chunks(Meeting.objects.filter(project=project), MEETING_FIELDS, size):
+        for row in chunk:
+            yield dict(row, type='meeting')
+
+    for chunk in keyset_chunks(Resource.objects.filter(project=project), RESOURCE_FIELDS, size):
+        for row in chunk:
+            # DjangoJSONEncoder would round the date to the millisecond
+            yield dict(row, type='resource', uploaded_at=row['uploaded_at'].isoformat())
+            if include_files:
+                yield from file_records(row)
+
+
+def file_records(resource):
+    """Records of the content of the file of a resource, nothing if the file is missing."""
+    storage = Resource._meta.get_field('file').storage
+    if not resource['file'] or not storage.exists(resource['file']):
+        return
+    with storage.open(resource['file'], 'rb') as f:
+        for data in iter(lambda: f.read(FILE_CHUNK_SIZE), b''):
+            yield {'type': 'file', 'resource': resource['pk'], 'data': base64.b64encode(data).decode('ascii')}
+
+
+def write_archive(project, out, include_files=False):
+    """Write the archive of a project to a text stream, such as a gzip file opened in text mode."""
+    count = 0
+    for record in archive_records(project, include_files):
+        out.write(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+class Restore:
+    """
+    Restore an archive into a new project, reading it record by record. Rows are inserted with
+    bulk_create in chunks and the ids of the archive are mapped to the new ones on the way.
+    """
+
+    def __init__(self, owner=None, size=ARCHIVE_CHUNK_SIZE):
+        self.owner = owner
+        self.size = size
+        self.project = None
+        self.users = {}
+        self.tasks = {}
+        self.pending = {Task: [], Meeting: []}
+        self.members = []
+        self.dependencies = []
+        self.resource = None
+        self.file_name = None
+        self.file = None
+        self.missing_users = set()
+        self.counts = {'members': 0, 'tasks': 0, 'meetings': 0, 'resources': 0, 'files': 0}
+
+    def user_ids(self, usernames):
+        """Ids of the users of the archive found in this instance, with one query for the new usernames."""
+        unknown = set(usernames) - set(self.users)
+        if unknown:
+            found = dict(MyUser.objects.filter(username__in=unknown).values_list('username', 'pk'))
+            for username in unknown:
+                self.users[username] = found.get(username)
+                if username not in found:
+                    self.missing_users.add(username)
+        return [self.users[username] for username in usernames if self.users[username]]
+
+    def restore(self, lines):
+        """Restore the records of an iterable of lines. Return the new project."""
+        with transaction.atomic():
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    handler = getattr(self, 'restore_' + record['type'])
+                except (ValueError, KeyError, AttributeError, TypeError):
+                    raise ArchiveError('Line {}: not a record of a project archive'.format(number))
+                if number == 1 and record['type'] != 'archive':
+                    raise ArchiveError('Line 1: not a project archive')
+                try:
+                    handler(record)
+                except (KeyError, TypeError, ValueError) as error:
+                    raise ArchiveError('Line {}: invalid {} record ({!r})'.format(number, record['type'], error))
+            if self.project is None:
+                raise ArchiveError('The archive has no project')
+            self.flush()
+            self.close_file()
+            Project.bump_schedule_version(self.project.pk)
+        return self.project
+
+    def restore_archive(self, record):
+        if record.get('version') != ARCHIVE_VERSION:
+            raise ArchiveError('Unsupported archive version {}'.format(record.get('version')))
+
+    def restore_project(self, record):
+        owner = self.owner
+        if owner is None:
+            owner = MyUser.objects.filter(username=record['owner']).first()
+            if owner is None:
+                raise ArchiveError("The owner {} does not exist, choose another one".format(record['owner']))
+        self.users[owner.username] = owner.pk
+        self.project = Project(name=record['name'], description=record['description'],
+                               start_date=parse_date(record['start_date']), end_date=parse_date(record['end_date']),
+                               is_archived=record['is_archived'], owner=owner)
+        # the key is kept unless another project of this instance has it
+        if not Project.objects.filter(key=record['key']).exists():
+            self.project.key = record['key']
+        self.project.save()
+
+    def restore_member(self, record):
+        self.members.append(record['username'])
+        if len(self.members) >= self.size:
+            self.flush_members()
+
+    def restore_task(self, record):
+        task = Task(name=record['name'], description=record['description'], start_date=parse_date(record['start_date']),
+                    end_date=parse_date(record['end_date']), status=record['status'], project=self.project)
+        self.pending[Task].append((record['pk'], task, record['assignees']))
+        if len(self.pending[Task]) >= self.size:
+            self.flush_tasks()
+
+    def restore_dependency(self, record):
+        self.flush_tasks()
+        try:
+            dependency = Task.predecessors.through(
+                from_task_id=self.tasks[record['task']], to_task_id=self.tasks[record['predecessor']])
+        except KeyError:
+            raise ArchiveError('Dependency between tasks missing from the archive')
+        self.dependencies.append(dependency)
+        if len(self.dependencies) >= self.size:
+            self.flush_dependencies()
+
+    def restore_meeting(self, record):
+        self.pending[Meeting].append(Meeting(
+            name=record['name'], description=record['description'], start_date=parse_date(record['start_date']),
+            end_date=parse_date(record['end_date']) if record['end_date'] else None, status=record['status'],
+            project=self.project))
+        if len(self.pending[Meeting]) >= self.size:
+            self.flush_meetings()
+
+    def restore_resource(self, record):
+        self.close_file()
+        # the file is set when its content follows, the name in the archive is that of another storage
+        self.resource = Resource.objects.create(
+            name=record['name'], description=record['description'], file='',
+            is_hidden=record['is_hidden'], project=self.project)
+        self.file_name = record['file']
+        # uploaded_at is set on creation
+        Resource.objects.filter(pk=self.resource.pk).update(uploaded_at=parse_datetime(record['uploaded_at']))
+        self.counts['resources'] += 1
+
+    def restore_file(self, record):
+        # the chunks of a file are written to a temporary file, saved to the storage with the next resource
+        if self.file is None:
+            self.file = tempfile.TemporaryFile()
+        self.file.write(base64.b64decode(record['data']))
+
+    def close_file(self):
+        """Save the content of the file of the last resource, if the archive has it."""
+        if self.file is None:
+            return
+        self.file.seek(0)
+        name = os.path.basename(self.file_name)
+        # only the file name is saved, saving the resource would replace its restored upload date
+        self.resource.file.save(name, File(self.file), save=False)
+        Resource.objects.filter(pk=self.resource.pk).update(file=self.resource.file.name)
+        self.file.close()
+        self.file = None
+        self.counts['files'] += 1
+
+    def flush_tasks(self):
+        pending = self.pending[Task]
+        if not pending:
+            return
+        tasks = [task for _, task, _ in pending]
+        # the project is created in the transaction of the restore, no one else can add tasks to it
+        bulk_create_in_project(Task, tasks, self.project.pk)
+        assignments = []
+        for old_pk, task, usernames in pending:
+            self.tasks[old_pk] = task.pk
+            assignments.extend(Task.assignees.through(task_id=task.pk, myuser_id=user_id)
+                               for user_id in self.user_ids(usernames))
+        Task.assignees.through.objects.bulk_create(assignments)
+        MyUser.bump_workload_version(*{assignment.myuser_id for assignment in assignments})
+        self.counts['tasks'] += len(tasks)
+        self.pending[Task] = []
+
+    def flush_dependencies(self):
+        Task.predecessors.through.objects.bulk_create(self.dependencies)
+        self.dependencies = []
+
+    def flush_meetings(self):
+        Meeting.objects.bulk_create(self.pending[Meeting])
+        self.counts['meetings'] += len(self.pending[Meeting])
+        self.pending[Meeting] = []
+
+    def flush_members(self):
+        user_ids = [pk for pk in self.user_ids(self.members) if pk != self.project.owner_id]
+        if user_ids:
+            self.project.members.add(*user_ids)
+        self.counts['members'] += len(user_ids)
+        self.members = []
+
+    def flush(self):
+        self.flush_members()
+        self.flush_tasks()
+        self.flush_dependencies()
+        self.flush_meetings()
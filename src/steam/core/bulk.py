@@ -0,0 +1,140 @@
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import DateField, ExpressionWrapper, F, Max, Min
+from .models import Project, Task, Meeting, MyUser, bulk_schedule_change, bulk_task_deletion
+
+# Bulk changes of the tasks and meetings of a project: each one runs in a single
+# transaction with set-based UPDATE/DELETE queries and bumps the schedule version once.
+
+# Rows inserted per INSERT query by the bulk creations
+BATCH_SIZE = 1000
+
+
+def shifted(field, days):
+    """Expression moving a date field by a number of days."""
+    return ExpressionWrapper(F(field) + timedelta(days=days), output_field=DateField())
+
+
+def shift_items(project, task_ids, meeting_ids, days):
+    """
+    Move tasks and meetings of a project by a number of days (negative to move them earlier).
+    Raise a ValidationError and change nothing if a task would leave the dates of the project,
+    as Task.clean does. Return the number of items moved.
+    """
+    tasks = Task.objects.filter(project=project, pk__in=task_ids)
+    meetings = Meeting.objects.filter(project=project, pk__in=meeting_ids)
+    delta = timedelta(days=days)
+    with transaction.atomic():
+        bounds = tasks.aggregate(first=Min('start_date'), last=Max('end_date'))
+        if bounds['first'] is not None and \
+                (bounds['first'] + delta < project.start_date or bounds['last'] + delta > project.end_date):
+            raise ValidationError("Les dates d'une tâche ne peuvent pas dépasser les dates du projet")
+        count = tasks.update(start_date=shifted('start_date', days), end_date=shifted('end_date', days))
+        if count:
+            MyUser.bump_assignees_workload_version(tasks)
+        count += meetings.update(start_date=shifted('start_date', days), end_date=shifted('end_date', days))
+        if count:
+            Project.bump_schedule_version(project.pk)
+    return count
+
+
+def set_tasks_status(project, task_ids, status):
+    """Give the same status to tasks of a project. Return the number of tasks changed."""
+    if status not in dict(Task.CHOICES):
+        raise ValidationError('Statut inconnu.')
+    with transaction.atomic():
+        count = Task.objects.filter(project=project, pk__in=task_ids).exclude(status=status).update(status=status)
+        if count:
+            Project.bump_schedule_version(project.pk)
+    return count
+
+
+def delete_items(project, task_ids, meeting_ids):
+    """Delete tasks and meetings of a project. Return the number of items deleted."""
+    tasks = Task.objects.filter(project=project, pk__in=task_ids)
+    with transaction.atomic(), bulk_schedule_change(), bulk_task_deletion(tasks):
+        _, deleted_tasks = tasks.delete()
+        _, deleted_meetings = Meeting.objects.filter(project=project, pk__in=meeting_ids).delete()
+    # the counts of the deletions also include the rows of the assignees of the tasks
+    return deleted_tasks.get(Task._meta.label, 0) + deleted_meetings.get(Meeting._meta.label, 0)
+
+
+def bulk_create_in_project(model, objects, project_id):
+    """
+    Insert tasks or meetings of a project with bulk_create and give them their ids.
+
+    Databases that do not return the ids of a bulk insert get them read back as the highest ids
+    of the project, in insertion order. This requires that no other transaction can add items to
+    the project until the caller commits: the caller must hold a lock on the project row
+    (select_for_update) or have created the project in its own, uncommitted, transaction.
+    """
+    model.objects.bulk_create(objects)
+    if objects and not connection.features.can_return_rows_from_bulk_insert:
+        ids = model.objects.filter(project_id=project_id).order_by('-pk').values_list('pk', flat=True)[:len(objects)]
+        for obj, pk in zip(objects, list(ids)[::-1]):
+            obj.pk = pk
+    return objects
+
+
+def validate_batch(objects, exclude):
+    """
+    Run full_clean on every object without the queries of the excluded foreign keys and of the
+    unique checks, which the caller checks once for the whole batch. Raise one ValidationError
+    listing the errors of every invalid object, numbered from 1.
+    """
+    errors = []
+    for number, obj in enumerate(objects, 1):
+        try:
+            obj.full_clean(exclude=exclude, validate_unique=False)
+        except ValidationError as error:
+            errors.extend('{} {}: {}'.format(obj._meta.verbose_name, number, message) for message in error.messages)
+    if errors:
+        raise ValidationError(errors)
+
+
+def load_projects(objects):
+    """Give the objects of a batch their project, loaded with one query. Raise a ValidationError if one does not exist."""
+    projects = Project.objects.in_bulk({obj.project_id for obj in objects})
+    missing = sorted({obj.project_id for obj in objects} - set(projects))
+    if missing:
+        raise ValidationError('Projets inconnus : {}'.format(', '.join(map(str, missing))))
+    for obj in objects:
+        obj.project = projects[obj.project_id]
+
+
+def create_projects(projects, batch_size=BATCH_SIZE):
+    """
+    Validate and insert many projects at once, giving them a key. The owners are checked with
+    one query and nothing is inserted if one of the projects is invalid. Return the projects.
+    """
+    owner_ids = {project.owner_id for project in projects}
+    missing = owner_ids - set(MyUser.objects.filter(pk__in=owner_ids).values_list('pk', flat=True))
+    if missing:
+        raise ValidationError('Propriétaires inconnus : {}'.format(', '.join(map(str, sorted(missing)))))
+    validate_batch(projects, exclude=['owner', 'key'])
+    return Project.bulk_create_with_keys(projects, batch_size=batch_size)
+
+
+def create_tasks(tasks, batch_size=BATCH_SIZE):
+    """
+    Validate and insert many tasks at once, within the dates of their projects which are loaded
+    with one query. Nothing is inserted if one of the tasks is invalid. Return the tasks.
+    """
+    load_projects(tasks)
+    validate_batch(tasks, exclude=['project'])
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks, batch_size=batch_size)
+        # bulk_create sends no post_save signal, new tasks have no assignee to invalidate
+        Project.bump_schedule_version(*{task.project_id for task in tasks})
+    return tasks
+
+
+def create_meetings(meetings, batch_size=BATCH_SIZE):
+    """Validate and insert many meetings at once, nothing is inserted if one of them is invalid. Return the meetings."""
+    load_projects(meetings)
+    validate_batch(meetings, exclude=['project'])
+    with transaction.atomic():
+        Meeting.objects.bulk_create(meetings, batch_size=batch_size)
+        Project.bump_schedule_version(*{meeting.project_id for meeting in meetings})
+    return meetings
@@ -0,0 +1,97 @@
+import numpy as np
+from django.core.cache import cache
+from .models import Task
+from .schedule import get_schedule_version, FIGURE_TIMEOUT
+
+
+def edge_positions(project_id, ids, extra_edges=()):
+    """
+    Return the dependencies of the tasks of a project as two arrays (sources, targets): the
+    positions in ids (the sorted task ids) of the predecessor and of the successor of each edge.
+    extra_edges are (predecessor id, successor id) pairs added to the stored ones.
+    """
+    rows = list(Task.predecessors.through.objects.filter(from_task__project_id=project_id)
+                .values_list('to_task_id', 'from_task_id'))
+    edges = np.array(rows + list(extra_edges), dtype=np.int64).reshape(-1, 2)
+    positions = np.searchsorted(ids, edges)
+    return positions[:, 0], positions[:, 1]
+
+
+def dependency_graph(project_id, extra_edges=()):
+    """Return the sorted task ids of a project with the positions of its dependencies, see edge_positions."""
+    ids = np.array(Task.objects.filter(project_id=project_id).order_by('pk').values_list('pk', flat=True),
+                   dtype=np.int64)
+    return (ids,) + edge_positions(project_id, ids, extra_edges)
+
+
+def successor_lists(count, sources, targets):
+    """Successors of each node in one flat list: those of node n are successors[starts[n]:starts[n + 1]]."""
+    by_source = np.argsort(sources, kind='stable')
+    starts = np.searchsorted(sources[by_source], np.arange(count + 1))
+    return targets[by_source].tolist(), starts.tolist()
+
+
+def topological_order(count, sources, targets):
+    """
+    Return the nodes 0..count-1 ordered so that every edge goes from an earlier node to a later
+    one (Kahn's algorithm, linear in nodes and edges), None if the edges contain a cycle.
+    """
+    successors, starts = successor_lists(count, sources, targets)
+    indegree = np.bincount(targets, minlength=count).tolist()
+    ready = [node for node in range(count) if indegree[node] == 0]
+    order = []
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for successor in successors[starts[node]:starts[node + 1]]:
+            indegree[successor] -= 1
+            if indegree[successor] == 0:
+                ready.append(successor)
+    return order if len(order) == count else None
+
+
+def compute_critical_path(project_id):
+    """
+    Return the ids of the critical tasks of a project, the tasks without float: any delay on
+    them delays the end of the project. Projects without dependencies have no critical path.
+
+    Forward pass: a task starts at the latest of its planned start and the end of its predecessors.
+    Backward pass: a task must end when its first successor has to start, or at the end of the
+    project. A task is critical when both passes give it the same start.
+    """
+    rows = list(Task.objects.filter(project_id=project_id).order_by('pk').values_list('pk', 'start_date', 'end_date'))
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    sources, targets = edge_positions(project_id, ids)
+    order = topological_order(len(ids), sources, targets)
+    if not len(sources) or order is None:
+        return []
+    start = [row[1].toordinal() for row in rows]
+    duration = [row[2].toordinal() - row[1].toordinal() for row in rows]
+    successors, starts = successor_lists(len(ids), sources, targets)
+
+    earliest = list(start)
+    for node in order:
+        finish = earliest[node] + duration[node]
+        for successor in successors[starts[node]:starts[node + 1]]:
+            if finish > earliest[successor]:
+                earliest[successor] = finish
+
+    end = max(earliest[node] + duration[node] for node in order)
+    latest = [0] * len(ids)
+    for node in reversed(order):
+        finish = min((latest[successor] for successor in successors[starts[node]:starts[node + 1]]), default=end)
+        latest[node] = finish - duration[node]
+
+    return [task_id for task_id, first, last in zip(ids.tolist(), earliest, latest) if first == last]
+
+
+def critical_tasks(project_id, version=None):
+    """Return the set of ids of the critical tasks of a project, computed once per schedule version."""
+    if version is None:
+        version = get_schedule_version(project_id)
+    key = 'critical-path-{}-{}'.format(project_id, version)
+    critical = cache.get(key)
+    if critical is None:
+        critical = compute_critical_path(project_id)
+        cache.set(key, critical, FIGURE_TIMEOUT)
+    return set(critical)
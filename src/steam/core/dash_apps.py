@@ -0,0 +1,10 @@
+# Dash apps are imported on first use rather than from core.urls: their modules pull in
+# pandas, numpy and plotly.express, which every management command and worker boot
+# would otherwise pay for. django_plotly_dash calls load_stateless_app (see the
+# PLOTLY_DASH setting) the first time an app name is not in its registry.
+
+def load_stateless_app(name):
+    if name == 'SteamGantt':
+        from . import viewGantt
+        return viewGantt.app
+    return None
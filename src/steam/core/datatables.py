@@ -0,0 +1,60 @@
+from django.db.models import Q
+from django.http import JsonResponse
+
+# Lists with more rows than this are paginated, ordered and searched by the server
+SERVER_SIDE_THRESHOLD = 500
+# Rows sent at most per page, whatever the client asks for
+MAX_PAGE_LENGTH = 100
+
+
+def int_param(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def datatables_response(request, queryset, columns, search_fields, render_row, prepare=None):
+    """
+    Answer a DataTables server-side processing request: filter the queryset on the search value,
+    order it on the requested column and send one page of rows rendered with render_row.
+
+    columns holds the field ordering each column of the table, None for a column that cannot
+    be ordered. Rows are searched with icontains on each of the search_fields. prepare is applied
+    after counting, to join or annotate what the rows display without slowing the counts down.
+    """
+    params = request.GET
+    total = queryset.count()
+
+    search = params.get('search[value]', '').strip()
+    if search:
+        condition = Q()
+        for field in search_fields:
+            condition |= Q(**{field + '__icontains': search})
+        queryset = queryset.filter(condition)
+        filtered = queryset.count()
+    else:
+        filtered = total
+
+    if prepare is not None:
+        queryset = prepare(queryset)
+    column = int_param(params, 'order[0][column]', -1)
+    if 0 <= column < len(columns) and columns[column]:
+        field = columns[column]
+        if params.get('order[0][dir]') == 'desc':
+            field = '-' + field
+        # the primary key makes the pages stable when several rows have the same value
+        queryset = queryset.order_by(field, 'pk')
+    else:
+        queryset = queryset.order_by('pk')
+
+    start = max(int_param(params, 'start', 0), 0)
+    length = int_param(params, 'length', MAX_PAGE_LENGTH)
+    length = MAX_PAGE_LENGTH if length < 1 else min(length, MAX_PAGE_LENGTH)
+
+    return JsonResponse({
+        'draw': int_param(params, 'draw', 0),
+        'recordsTotal': total,
+        'recordsFiltered': filtered,
+        'data': [render_row(row) for row in queryset[start:start + length]],
+    })
@@ -0,0 +1,89 @@
+import csv
+import json
+from collections import defaultdict
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Task, Meeting
+
+# Rows loaded per query by the exports
+EXPORT_CHUNK_SIZE = 2000
+# Columns of the exports, the task rows of the CSV can be imported again (task_import skips the meetings)
+EXPORT_COLUMNS = ('type', 'project', 'id', 'name', 'description', 'start_date', 'end_date', 'status', 'assignees')
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+ITEM_FIELDS = ('pk', 'project__key', 'name', 'description', 'start_date', 'end_date', 'status')
+
+
+def keyset_chunks(queryset, fields, size=EXPORT_CHUNK_SIZE):
+    """
+    Yield lists of at most size rows of the queryset as dicts of fields, in primary key order.
+    Each chunk is one query starting after the last key of the previous chunk, so neither the
+    rows nor the position in the table are kept between queries.
+    """
+    last = None
+    while True:
+        chunk = queryset.order_by('pk') if last is None else queryset.filter(pk__gt=last).order_by('pk')
+        chunk = list(chunk.values(*fields)[:size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < size:
+            return
+        last = chunk[-1]['pk']
+
+
+def export_rows(project_ids=None, size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the tasks then the meetings of the given projects (of every project if None) as dicts
+    of EXPORT_COLUMNS. The usernames of the assignees are loaded with one query per chunk of tasks.
+    """
+    for kind, model in (('task', Task), ('meeting', Meeting)):
+        queryset = model.objects.all() if project_ids is None else model.objects.filter(project_id__in=project_ids)
+        for chunk in keyset_chunks(queryset, ITEM_FIELDS, size):
+            assignees = defaultdict(list)
+            if model is Task:
+                for task_id, username in Task.assignees.through.objects.filter(
+                        task_id__in=[row['pk'] for row in chunk]).values_list('task_id', 'myuser__username') \
+                        .order_by('task_id', 'myuser__username'):
+                    assignees[task_id].append(username)
+            for row in chunk:
+                yield {
+                    'type': kind,
+                    'project': row['project__key'],
+                    'id': row['pk'],
+                    'name': row['name'],
+                    'description': row['description'] or '',
+                    'start_date': row['start_date'],
+                    'end_date': row['end_date'],
+                    'status': row['status'],
+                    'assignees': assignees.get(row['pk'], []),
+                }
+
+
+class Echo:
+    """Pseudo-buffer returning what is written to it, for csv.writer to produce lines one at a time."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """CSV lines of export rows with a header, the assignees separated by spaces."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow([' '.join(row[column]) if column == 'assignees' else
+                               '' if row[column] is None else row[column] for column in EXPORT_COLUMNS])
+
+
+def ndjson_lines(rows):
+    """One JSON object per line for each export row."""
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def export_lines(format, project_ids=None):
+    """Lines of the export of the given projects in one of EXPORT_FORMATS."""
+    rows = export_rows(project_ids)
+    return csv_lines(rows) if format == 'csv' else ndjson_lines(rows)
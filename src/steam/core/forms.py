@@ -69,6 +69,7 @@ class TaskForm(forms.ModelForm):
             'status': 'Statut',
             'project': 'Projet',
             'assignees': 'Assignés',
+            'predecessors': 'Prédécesseurs',
         }
         widgets = {
             'name': forms.TextInput(attrs={'placeholder': 'Nom de la tâche', 'class': 'form-control'}),
@@ -77,6 +78,7 @@ class TaskForm(forms.ModelForm):
             'end_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}, format='%Y-%m-%d'),
             'status': forms.Select(attrs={'class': 'form-select'}),
             'project': forms.Select(attrs={'class': 'form-control'}),
+            'predecessors': forms.SelectMultiple(attrs={'class': 'form-control'}),
         }
 
     def __init__(self, *args, **kwargs):
@@ -94,6 +96,17 @@ class TaskForm(forms.ModelForm):
         self.fields['assignees'].queryset =  User.objects.filter(
             Q(projects__id=p_id) | Q(owned_projects=p_id)).distinct()
 
+        # A task can only depend on the other tasks of its project
+        self.fields['predecessors'].queryset = Task.objects.filter(project_id=p_id).exclude(pk=self.instance.pk)
+
+    def clean_predecessors(self):
+        predecessors = self.cleaned_data['predecessors']
+        # a new task has no successor yet, it cannot close a cycle
+        if self.instance.pk:
+            Task.check_dependencies(self.instance.project_id,
+                                    [(predecessor.pk, self.instance.pk) for predecessor in predecessors])
+        return predecessors
+
 class MeetingForm(forms.ModelForm):
     assignees = forms.ModelMultipleChoiceField(
         queryset=User.objects.none(),
@@ -132,6 +145,14 @@ class MeetingForm(forms.ModelForm):
         self.fields['assignees'].queryset =  User.objects.filter(
             Q(projects__id=p_id) | Q(owned_projects=p_id))
 
+class TaskImportForm(forms.Form):
+    file = forms.FileField(
+        label='Fichier',
+        help_text="Fichier .csv ou .xlsx avec les colonnes name, start_date et end_date (AAAA-MM-JJ), et "
+                  "optionnellement description, status et assignees (noms d'utilisateur).",
+        widget=forms.ClearableFileInput(attrs={'accept': '.csv,.xlsx'}),
+    )
+
 class CustomUserCreationForm(UserCreationForm):
 
     def clean_username(self):
@@ -0,0 +1,233 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+from django.db.models import Count, Min, Max
+from django.db.models.functions import TruncDay, TruncWeek, TruncMonth
+from django.utils import timezone
+from .models import Project, Task, Meeting
+
+# Projects with more items than this are loaded one date window at a time
+WINDOW_THRESHOLD = 2000
+# Visible range when a windowed chart is opened
+WINDOW_DAYS = 90
+# Windows are aligned on this many days so that viewers of a project share cached windows
+WINDOW_STEP = 30
+
+# Projects with more items than this are drawn as rollups when zoomed out
+ROLLUP_THRESHOLD = 500
+# Every bar is drawn while at most this many days are visible
+DETAIL_DAYS = 120
+# Rollup level used up to a visible range of this many days
+ROLLUP_LEVELS = (('day', 365), ('week', 3 * 365), ('month', None))
+TRUNCS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+ROLLUP_LABELS = {'day': 'le %d/%m/%y', 'week': 'semaine du %d/%m/%y', 'month': '%m/%Y'}
+
+# Colour and legend label of each status, shared by every rendering of the chart
+STATUS_COLORS = {'1': '#3CDBEA', '2': '#FD8A17', '3': '#63D233', 'Réunion': '#636EFA'}
+STATUS_LABELS = {'1': 'À commencer', '2': 'En cours', '3': 'Terminé', 'Réunion': 'Réunion'}
+
+# dtype of each column pulled from the database
+DTYPES = {
+    'id': np.int64,
+    'name': object,
+    'start_date': 'datetime64[D]',
+    'end_date': 'datetime64[D]',
+    'status': '<U10',
+}
+
+TASK_FIELDS = ('id', 'name', 'start_date', 'end_date', 'status')
+MEETING_FIELDS = ('id', 'name', 'start_date', 'status')
+
+# Fields shown when an item of the chart is selected
+ITEM_FIELDS = ('name', 'description', 'start_date', 'end_date', 'status')
+
+
+def fetch_columns(queryset, fields):
+    """Pull the given fields of a queryset into one NumPy array per field."""
+    rows = list(queryset.values_list(*fields))
+    columns = list(zip(*rows)) if rows else [()] * len(fields)
+    return {field: np.array(column, dtype=DTYPES[field]) for field, column in zip(fields, columns)}
+
+
+def merge_columns(tasks, meetings):
+    """Concatenate task and meeting columns, a meeting lasting one day."""
+    meetings['end_date'] = meetings['start_date'] + np.timedelta64(1, 'D')
+    return {field: np.concatenate([tasks[field], meetings[field]]) for field in TASK_FIELDS}
+
+
+def load_schedule(project_id, window=None):
+    """
+    Return the tasks and meetings of a project as a DataFrame ready for px.timeline,
+    ordered by status, start date, end date and id.
+
+    When a window (first day, last day) is given only the items overlapping it are loaded.
+    """
+    return schedule_frame(fetch_schedule(project_id, window))
+
+
+def fetch_schedule(project_id, window=None):
+    """Pull the tasks and meetings of a project (overlapping the window if any) into merged columns."""
+    tasks = Task.objects.filter(project_id=project_id)
+    meetings = Meeting.objects.filter(project_id=project_id)
+    if window is not None:
+        first, last = window
+        tasks = tasks.filter(start_date__lte=last, end_date__gte=first)
+        # a meeting ends the day after it starts
+        meetings = meetings.filter(start_date__lte=last, start_date__gte=first - timedelta(days=1))
+    return merge_columns(fetch_columns(tasks, TASK_FIELDS), fetch_columns(meetings, MEETING_FIELDS))
+
+
+def schedule_frame(columns):
+    """Order the columns of fetch_schedule into the DataFrame of load_schedule."""
+    # np.lexsort is stable and sorts on the last key first
+    order = np.lexsort((columns['id'], columns['end_date'], columns['start_date'], columns['status']))
+
+    return pd.DataFrame({
+        'id': columns['id'][order].astype(str),
+        'name': columns['name'][order],
+        'start_date': columns['start_date'][order],
+        'end_date': columns['end_date'][order],
+        'status': columns['status'][order],
+        'index': np.arange(len(order)),
+    })
+
+
+def get_item(project_id, status, item_id):
+    """Return the displayed fields of a task or meeting of the project, None if it does not exist."""
+    model = Meeting if status == 'Réunion' else Task
+    return model.objects.filter(project_id=project_id, pk=item_id).values(*ITEM_FIELDS).first()
+
+
+def schedule_size(project_id, version):
+    """Return the number of tasks and meetings of the project, cached per schedule version."""
+    key = 'gantt-size-{}-{}'.format(project_id, version)
+    size = cache.get(key)
+    if size is None:
+        size = Task.objects.filter(project_id=project_id).count() + \
+            Meeting.objects.filter(project_id=project_id).count()
+        cache.set(key, size, 60 * 60 * 24)
+    return size
+
+
+def is_windowed(project_id, version):
+    """Return True if the project is too large to be loaded at once."""
+    return schedule_size(project_id, version) > WINDOW_THRESHOLD
+
+
+def rollup_level(project_id, version, visible):
+    """
+    Return the rollup level ('day', 'week' or 'month') to draw for a visible range,
+    None if every bar must be drawn.
+    """
+    span = (visible[1] - visible[0]).days
+    if span <= DETAIL_DAYS or schedule_size(project_id, version) <= ROLLUP_THRESHOLD:
+        return None
+    for level, days in ROLLUP_LEVELS:
+        if days is None or span <= days:
+            return level
+
+
+def has_rollup(project_id, version):
+    """Return True if the project is large enough to be drawn as a rollup when zoomed out."""
+    return schedule_size(project_id, version) > ROLLUP_THRESHOLD
+
+
+def project_range(project_id):
+    """First and last day of the project."""
+    return Project.objects.filter(pk=project_id).values_list('start_date', 'end_date').get()
+
+
+def fetch_rollup(queryset, level, end_field):
+    """Count the items of a queryset per bucket and status, with the span they cover."""
+    rows = list(queryset.annotate(bucket=TRUNCS[level]('start_date'))
+                .values('bucket', 'status')
+                .annotate(count=Count('id'), first=Min('start_date'), last=Max(end_field))
+                .values_list('bucket', 'status', 'count', 'first', 'last')
+                .order_by())
+    columns = list(zip(*rows)) if rows else [()] * 5
+    dtypes = ('datetime64[D]', DTYPES['status'], np.int64, 'datetime64[D]', 'datetime64[D]')
+    return [np.array(column, dtype=dtype) for column, dtype in zip(columns, dtypes)]
+
+
+def load_rollup(project_id, level):
+    """
+    Return the tasks and meetings of a project grouped per day, week or month (of their start
+    date) and status, one row per group spanning its items, as a DataFrame like load_schedule.
+    Rollup rows have an empty id, they are not items of the project.
+    """
+    tasks = fetch_rollup(Task.objects.filter(project_id=project_id), level, 'end_date')
+    meetings = fetch_rollup(Meeting.objects.filter(project_id=project_id), level, 'start_date')
+    # a meeting ends the day after it starts
+    meetings[4] = meetings[4] + np.timedelta64(1, 'D')
+    bucket, status, count, first, last = (np.concatenate(columns) for columns in zip(tasks, meetings))
+
+    order = np.lexsort((bucket, status))
+    labels = [
+        '{} {} ({})'.format(n, 'réunion(s)' if s == 'Réunion' else 'tâche(s)',
+                            b.astype(date).strftime(ROLLUP_LABELS[level]))
+        for n, s, b in zip(count[order], status[order], bucket[order])
+    ]
+    return pd.DataFrame({
+        'id': np.full(len(order), '', dtype=object),
+        'name': np.array(labels, dtype=object),
+        'start_date': first[order],
+        'end_date': last[order],
+        'status': status[order],
+        'index': np.arange(len(order)),
+    })
+
+
+def initial_range(project_id):
+    """Visible range of a windowed chart when it is opened: around today, within the project."""
+    start_date, end_date = project_range(project_id)
+    first = min(max(timezone.now().date() - timedelta(days=WINDOW_DAYS // 6), start_date), end_date)
+    return first, first + timedelta(days=WINDOW_DAYS)
+
+
+def window_for(first, last):
+    """
+    Return the window to load for a visible range: the range plus its length on each side,
+    widened to WINDOW_STEP boundaries.
+    """
+    span = (last - first).days + 1
+    start = (first - timedelta(days=span)).toordinal()
+    end = (last + timedelta(days=span)).toordinal()
+    start -= start % WINDOW_STEP
+    end += WINDOW_STEP - 1 - end % WINDOW_STEP
+    return date.fromordinal(start), date.fromordinal(end)
+
+
+def visible_range(relayout):
+    """Return the (first day, last day) shown after a pan or zoom, None if the x axis did not move."""
+    if not relayout:
+        return None
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        bounds = relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    elif 'xaxis.range' in relayout:
+        bounds = relayout['xaxis.range']
+    else:
+        return None
+    return tuple(date.fromisoformat(str(bound)[:10]) for bound in bounds)
+
+
+def schedule_payload(project_id):
+    """
+    Return the timeline of a project as a compact JSON-ready dict: one list per column of
+    load_schedule, plus the label and colour of each status.
+    """
+    df = load_schedule(project_id)
+    project = Project.objects.filter(pk=project_id).values('id', 'name', 'start_date', 'end_date').get()
+    return {
+        'project': {**project, 'start_date': project['start_date'].isoformat(),
+                    'end_date': project['end_date'].isoformat()},
+        'statuses': {status: {'label': STATUS_LABELS[status], 'color': STATUS_COLORS[status]}
+                     for status in STATUS_LABELS},
+        'items': {
+            'id': df.id.astype(int).tolist(),
+            'name': df.name.tolist(),
+            'start_date': np.datetime_as_string(df.start_date.values, unit='D').tolist(),
+            'end_date': np.datetime_as_string(df.end_date.values, unit='D').tolist(),
+            'status': df.status.tolist(),
+        },
+    }
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .gantt_data import load_schedule, project_range, STATUS_COLORS, STATUS_LABELS
+from .schedule import get_schedule_version, FIGURE_TIMEOUT
+
+# Geometry of the chart, in pixels
+WIDTH = 1000
+ROW_HEIGHT = 22
+BAR_HEIGHT = 16
+HEADER_HEIGHT = 30
+LEGEND_HEIGHT = 30
+# At most this many month labels are drawn on the axis
+MAX_TICKS = 24
+
+
+def svg_cache_key(project_id, version):
+    return 'gantt-svg-{}-{}-{}'.format(project_id, version, timezone.now().date().isoformat())
+
+
+def get_cached_svg(project_id, version=None):
+    """Return the SVG Gantt chart of a project, rendered again only when its schedule changed."""
+    if version is None:
+        version = get_schedule_version(project_id)
+    key = svg_cache_key(project_id, version)
+    svg = cache.get(key)
+    if svg is None:
+        svg = render_svg(project_id)
+        cache.set(key, svg, FIGURE_TIMEOUT)
+    return svg
+
+
+def month_ticks(first, last):
+    """First day of the months between first and last, thinned out to MAX_TICKS at most."""
+    months = []
+    day = first.replace(day=1)
+    while day <= last:
+        if day >= first:
+            months.append(day)
+        day = (day + timedelta(days=32)).replace(day=1)
+    step = max(-(-len(months) // MAX_TICKS), 1)
+    return months[::step]
+
+
+def render_svg(project_id):
+    """
+    Render the tasks and meetings of a project as a static SVG Gantt chart, with the bars
+    in the same order and colours as the Dash chart.
+    """
+    df = load_schedule(project_id)
+    if len(df):
+        first = df.start_date.min().date()
+        last = df.end_date.max().date()
+    else:
+        first, last = project_range(project_id)
+    last = max(last, first + timedelta(days=1))
+    scale = WIDTH / (last - first).days
+
+    def x(day):
+        return round((day - first).days * scale, 1)
+
+    bars = []
+    for i, row in enumerate(df.itertuples()):
+        start, end = row.start_date.date(), row.end_date.date()
+        y = HEADER_HEIGHT + i * ROW_HEIGHT + (ROW_HEIGHT - BAR_HEIGHT) / 2
+        bars.append({
+            'x': x(start),
+            'y': y,
+            'text_y': y + BAR_HEIGHT - 4,
+            'width': max(round(x(end) - x(start), 1), 1),
+            'color': STATUS_COLORS[row.status],
+            'name': row.name,
+            'title': '{} ({})'.format(row.name, start.strftime('%d/%m/%y') if row.status == 'Réunion' else
+                                      '{} - {}'.format(start.strftime('%d/%m/%y'), end.strftime('%d/%m/%y'))),
+        })
+
+    height = HEADER_HEIGHT + len(bars) * ROW_HEIGHT
+    today = timezone.now().date()
+    return render_to_string('tasks/gantt.svg', {
+        'width': WIDTH,
+        'height': height + LEGEND_HEIGHT,
+        'chart_height': height,
+        'bar_height': BAR_HEIGHT,
+        'bars': bars,
+        'ticks': [{'x': x(day), 'label': day.strftime('%m/%y')} for day in month_ticks(first, last)],
+        'today': x(today) if first <= today <= last else None,
+        'legend': [{'x': 10 + i * 130, 'color': STATUS_COLORS[status], 'label': STATUS_LABELS[status]}
+                   for i, status in enumerate(STATUS_LABELS)],
+    })
@@ -0,0 +1,134 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from core.models import Project, Task, Meeting
+
+# Share of the seeded items that are meetings
+MEETING_SHARE = 0.1
+# Seeded items start within this many days from the start of the project
+PROJECT_DAYS = 2 * 365
+
+
+class Command(BaseCommand):
+    help = ('Time each stage of the Gantt pipeline (query, frame, figure, JSON, selected item) on synthetic '
+            'projects of increasing size, and report the peak memory of each stage as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000],
+                            help='Number of tasks and meetings of each seeded project')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs, the median is reported')
+        parser.add_argument('--output', help='Write the results to this file instead of the standard output')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic projects')
+
+    def handle(self, *args, **options):
+        # imported here so that the command list does not load pandas and plotly
+        from core.gantt_data import fetch_schedule, schedule_frame
+        from core.viewGantt import build_figure, display_click_data, modify_placeholder
+        import plotly.io as pio
+
+        stages = (
+            ('query', lambda state: state.update(columns=fetch_schedule(state['project_id']))),
+            ('frame', lambda state: state.update(df=schedule_frame(state['columns']))),
+            ('figure', lambda state: state.update(figure=build_figure(state['df']))),
+            ('json', lambda state: state.update(json=pio.to_json(state['figure'], validate=False))),
+            ('click_data', lambda state: display_click_data(state['click'], state['project_id'])),
+            ('placeholder', lambda state: modify_placeholder(state['click'], state['project_id'])),
+        )
+
+        results = []
+        # every seeded row is rolled back at the end
+        with transaction.atomic():
+            owner = get_user_model().objects.create_user(username='bench-gantt', email='bench-gantt@example.com')
+            for size in options['sizes']:
+                project = self.seed(owner, size, random.Random(options['seed']))
+                df = schedule_frame(fetch_schedule(project.id))
+                row = df.iloc[len(df) // 2]
+                # the selected item is the bar in the middle of the chart
+                click = {'points': [{'customdata': [row['name'], row['status'], row['id']]}]}
+                state = {'project_id': project.id, 'click': click}
+
+                timings = {name: [] for name, _ in stages}
+                for _ in range(options['repeat']):
+                    for name, stage in stages:
+                        start = time.perf_counter()
+                        stage(state)
+                        timings[name].append(time.perf_counter() - start)
+
+                # separate run, tracing allocations slows the stages down
+                memory = {}
+                tracemalloc.start()
+                for name, stage in stages:
+                    tracemalloc.reset_peak()
+                    stage(state)
+                    memory[name] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                results.append({
+                    'size': size,
+                    'seconds': {name: statistics.median(times) for name, times in timings.items()},
+                    'peak_memory_bytes': memory,
+                    'json_bytes': len(state['json']),
+                })
+                self.stderr.write('{} items: {}'.format(size, ', '.join(
+                    '{} {:.3f}s'.format(name, seconds) for name, seconds in results[-1]['seconds'].items())))
+            transaction.set_rollback(True)
+
+        report = {'environment': self.environment(), 'repeat': options['repeat'], 'results': results}
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+    def seed(self, owner, size, rng):
+        """Create a project with size tasks and meetings spread over PROJECT_DAYS."""
+        today = timezone.now().date()
+        project = Project(name='Bench {}'.format(size), start_date=today,
+                          end_date=today + timedelta(days=PROJECT_DAYS + 60), owner=owner)
+        project.save()
+        meetings = int(size * MEETING_SHARE)
+        tasks = []
+        for i in range(size - meetings):
+            start = today + timedelta(days=rng.randrange(PROJECT_DAYS))
+            tasks.append(Task(name='Task {}'.format(i), start_date=start,
+                              end_date=start + timedelta(days=rng.randint(0, 30)), status=rng.choice('123'),
+                              project=project))
+        Task.objects.bulk_create(tasks, batch_size=2000)
+        Meeting.objects.bulk_create([
+            Meeting(name='Meeting {}'.format(i), start_date=today + timedelta(days=rng.randrange(PROJECT_DAYS)),
+                    project=project)
+            for i in range(meetings)
+        ], batch_size=2000)
+        return project
+
+    def environment(self):
+        """Versions and commit the results were measured with, to compare runs."""
+        import django
+        import numpy
+        import pandas
+        import plotly
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, check=True,
+                                    capture_output=True, text=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'date': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'numpy': numpy.__version__,
+            'pandas': pandas.__version__,
+            'plotly': plotly.__version__,
+            'database': connection.vendor,
+        }
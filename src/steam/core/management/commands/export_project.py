@@ -0,0 +1,22 @@
+import gzip
+from django.core.management.base import BaseCommand, CommandError
+from core.archive import write_archive
+from core.models import Project
+
+
+class Command(BaseCommand):
+    help = ('Write a project, its members, tasks, meetings and resources to a gzip-compressed NDJSON archive, '
+            'which restore_project loads into another instance')
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', type=int, help='Id of the project')
+        parser.add_argument('path', help='Archive to write, such as project.ndjson.gz')
+        parser.add_argument('--files', action='store_true', help='Include the content of the resource files')
+
+    def handle(self, *args, **options):
+        project = Project.objects.select_related('owner').filter(pk=options['project']).first()
+        if project is None:
+            raise CommandError('Project {} does not exist'.format(options['project']))
+        with gzip.open(options['path'], 'wt', encoding='utf-8') as out:
+            count = write_archive(project, out, include_files=options['files'])
+        self.stdout.write('{} records written to {}'.format(count, options['path']))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Project
+
+
+class Command(BaseCommand):
+    help = ('Import the tasks of a CSV or XLSX file into a project. Nothing is imported if a row is invalid, '
+            'every error is reported with its line number')
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', type=int, help='Id of the project')
+        parser.add_argument('path', help='CSV or XLSX file with the columns name, start_date and end_date, and '
+                                         'optionally description, status and assignees')
+        parser.add_argument('--dry-run', action='store_true', help='Only check the file')
+
+    def handle(self, *args, **options):
+        # imported here so that the command list does not load pandas
+        from core.task_import import import_tasks, TaskImportError
+        project = Project.objects.filter(pk=options['project']).first()
+        if project is None:
+            raise CommandError('Project {} does not exist'.format(options['project']))
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_tasks(project, file, options['path'], dry_run=options['dry_run'])
+        except (OSError, TaskImportError) as error:
+            raise CommandError(error)
+
+        for line, message in result.errors:
+            self.stderr.write('Line {}: {}'.format(line, message))
+        if result.error_count > len(result.errors):
+            self.stderr.write('... {} more errors'.format(result.error_count - len(result.errors)))
+        if result.error_count:
+            raise CommandError('{} errors in {} rows, no task imported'.format(result.error_count, result.rows))
+        if options['dry_run']:
+            self.stdout.write('{} rows checked, no error'.format(result.rows))
+        else:
+            self.stdout.write('{} tasks imported'.format(result.created))
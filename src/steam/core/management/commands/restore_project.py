@@ -0,0 +1,33 @@
+import gzip
+from django.core.management.base import BaseCommand, CommandError
+from core.archive import ArchiveError, Restore
+from core.models import MyUser
+
+
+class Command(BaseCommand):
+    help = ('Restore a project archive written by export_project as a new project. Ids are replaced and the key '
+            'is kept unless it is taken. Users are matched by username, those missing are left out')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archive to read')
+        parser.add_argument('--owner', help='Username of the owner of the restored project, by default its owner '
+                                            'in the archive')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['owner']:
+            owner = MyUser.objects.filter(username=options['owner']).first()
+            if owner is None:
+                raise CommandError('User {} does not exist'.format(options['owner']))
+        restore = Restore(owner=owner)
+        try:
+            with gzip.open(options['path'], 'rt', encoding='utf-8') as lines:
+                project = restore.restore(lines)
+        except (OSError, EOFError, ArchiveError) as error:
+            raise CommandError(error)
+
+        if restore.missing_users:
+            self.stderr.write('Users missing from this instance, left out: {}'.format(
+                ', '.join(sorted(restore.missing_users))))
+        self.stdout.write('Project {} restored with the key {}: {}'.format(project.pk, project.key, ', '.join(
+            '{} {}'.format(count, name) for name, count in restore.counts.items())))
@@ -0,0 +1,65 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Run in a fresh interpreter: time to set Django up, to load the URLconf and to serve
+# the first Gantt request, which is the one importing the Dash app
+FIRST_REQUEST_SCRIPT = '''
+import json, os, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'steam.settings')
+import django
+django.setup()
+setup = time.perf_counter()
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls = time.perf_counter()
+from django.test import Client
+response = Client(HTTP_HOST='localhost').get('/django_plotly_dash/app/SteamGantt/_dash-layout')
+first_request = time.perf_counter()
+print(json.dumps({
+    'setup': setup - start,
+    'urls': urls - setup,
+    'first_request': first_request - urls,
+    'status': response.status_code,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure the cold start time of manage.py commands and of the first Gantt request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Number of cold starts to measure')
+        parser.add_argument('--command', default='check', help='manage.py command to time')
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+        command = [sys.executable, 'manage.py', options['command']]
+
+        command_times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=settings.BASE_DIR, check=True, capture_output=True)
+            command_times.append(time.perf_counter() - start)
+
+        first_requests = []
+        for _ in range(runs):
+            result = subprocess.run([sys.executable, '-c', FIRST_REQUEST_SCRIPT],
+                                    cwd=settings.BASE_DIR, check=True, capture_output=True, text=True)
+            first_requests.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        report = {
+            'command': options['command'],
+            'runs': runs,
+            'command_seconds': statistics.median(command_times),
+            'setup_seconds': statistics.median(r['setup'] for r in first_requests),
+            'urls_seconds': statistics.median(r['urls'] for r in first_requests),
+            'first_request_seconds': statistics.median(r['first_request'] for r in first_requests),
+            'first_request_status': first_requests[-1]['status'],
+        }
+        self.stdout.write(json.dumps(report, indent=2))
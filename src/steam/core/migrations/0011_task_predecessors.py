@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_gantt_window_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='predecessors',
+            field=models.ManyToManyField(blank=True, related_name='successors', to='core.Task'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_myuser_workload_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='myuser',
+            name='access_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
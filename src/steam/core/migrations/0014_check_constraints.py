@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:55
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_myuser_access_version'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='meeting',
+            constraint=models.CheckConstraint(check=models.Q(('end_date__isnull', True), ('end_date__gte', django.db.models.expressions.F('start_date')), _connector='OR'), name='meeting_start_before_end'),
+        ),
+        migrations.AddConstraint(
+            model_name='project',
+            constraint=models.CheckConstraint(check=models.Q(('start_date__lt', django.db.models.expressions.F('end_date'))), name='project_start_before_end'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.CheckConstraint(check=models.Q(('start_date__lte', django.db.models.expressions.F('end_date'))), name='task_start_before_end'),
+        ),
+    ]
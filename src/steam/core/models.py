@@ -1,14 +1,50 @@
 import os
 import random
 import string
-from django.db import models
+import threading
+from contextlib import contextmanager
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
-from django.db.models.signals import m2m_changed
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.core.validators import RegexValidator, EmailValidator, FileExtensionValidator
 from django.conf import settings
 
+# Project keys: KEY_LENGTH characters drawn from KEY_ALPHABET, drawn again at most
+# KEY_ATTEMPTS times when the unique constraint rejects one
+KEY_ALPHABET = string.ascii_uppercase + string.digits
+KEY_LENGTH = 5
+KEY_ATTEMPTS = 5
+
+
+def unsaved_fields(instance, update_fields):
+    """Fields left out of a save with update_fields, which full_clean does not need to validate."""
+    if update_fields is None:
+        return []
+    return [field.name for field in instance._meta.fields if field.name not in update_fields]
+
+
+def without_counters(instance, kwargs, counters):
+    """
+    Save arguments leaving the counters bumped with F() expressions out of the UPDATE of a saved
+    instance, which would otherwise write back the values it was loaded with.
+    """
+    if instance._state.adding or kwargs.get('force_insert'):
+        return kwargs
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None:
+        update_fields = [field.name for field in instance._meta.concrete_fields if not field.primary_key]
+    return dict(kwargs, update_fields=[name for name in update_fields if name not in counters])
+
+
+class ProjectQuerySet(models.QuerySet):
+    def delete(self):
+        # the tasks and meetings deleted with the projects invalidate the caches once
+        with transaction.atomic(), bulk_schedule_change(), bulk_task_deletion(Task.objects.filter(project__in=self)):
+            return super().delete()
+
 
 class Project(models.Model):
     name = models.CharField(max_length=255)
@@ -23,42 +59,145 @@ class Project(models.Model):
     members = models.ManyToManyField(
         settings.AUTH_USER_MODEL, related_name='projects', blank=True)
     key = models.CharField(max_length=5, unique=True, default='', editable=False)
+    # Incremented each time a task or a meeting of the project changes, used as cache key
+    schedule_version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(check=models.Q(start_date__lt=F('end_date')), name='project_start_before_end'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # owner when loaded, the access of both owners changes if it is replaced
+        instance._loaded_owner_id = instance.__dict__.get('owner_id')
+        # key when loaded, it is not checked again if it does not change
+        instance._loaded_key = instance.__dict__.get('key')
+        return instance
+
     # TODO: localization of validation errors
     def clean(self):
         if self.start_date and self.end_date and self.start_date >= self.end_date:
             raise ValidationError(
                 'La date de début doit être antérieure à la date de fin.')
 
-        if self.id and self.owner in self.members.all():
+        # members added later are checked by disallow_owner_as_member, so the owner only needs
+        # to be looked up among the members when it changes
+        if self.id and getattr(self, '_loaded_owner_id', None) != self.owner_id and \
+                self.members.filter(pk=self.owner_id).exists():
             raise ValidationError('Owner cannot also be a project member')
 
     # clean() is not automatically called when an object is saved, hence the overriding of save()
     def save(self, *args, **kwargs):
-        if not self.key:
-            self.key = self.generate_key()
-        self.full_clean()
-        super(Project, self).save(*args, **kwargs)
+        exclude = unsaved_fields(self, kwargs.get('update_fields'))
+        if self.key and self.key == getattr(self, '_loaded_key', None):
+            # a saved key is already unique, the constraint guards the column anyway
+            exclude.append('key')
+        if self.owner_id is not None and self.owner_id == getattr(self, '_loaded_owner_id', None):
+            # neither is an unchanged owner looked up again, the foreign key guards it
+            exclude.append('owner')
+        kwargs = without_counters(self, kwargs, ('schedule_version',))
+        if self.key:
+            self.full_clean(exclude=exclude)
+            super(Project, self).save(*args, **kwargs)
+            self._loaded_key = self.key
+            return
+        # a generated key is checked by the unique constraint when inserting rather than with a
+        # query, and drawn again in the unlikely case it is already taken
+        self.key = self.generate_key()
+        self.full_clean(exclude=exclude + ['key'])
+        for attempt in range(KEY_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    super(Project, self).save(*args, **kwargs)
+                self._loaded_key = self.key
+                return
+            except IntegrityError:
+                if attempt == KEY_ATTEMPTS - 1:
+                    raise
+                self.key = self.generate_key()
+
+    def delete(self, *args, **kwargs):
+        # the tasks and meetings deleted with the project invalidate the caches once
+        with transaction.atomic(), bulk_schedule_change(), bulk_task_deletion(Task.objects.filter(project=self)):
+            return super(Project, self).delete(*args, **kwargs)
 
     @classmethod
     def generate_key(cls):
-        """Generate a unique random string of 5 characters for the 'key' field in the 'Project' model."""
-        while True:
-            generated_key = ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
-            if not cls.objects.filter(key=generated_key).exists():
-                return generated_key
+        """Generate a random string of 5 characters for the 'key' field in the 'Project' model."""
+        return ''.join(random.choices(KEY_ALPHABET, k=KEY_LENGTH))
+
+    @classmethod
+    def generate_keys(cls, count):
+        """Generate count distinct keys at once, without querying the database."""
+        keys = set()
+        while len(keys) < count:
+            keys.add(cls.generate_key())
+        return list(keys)
+
+    @classmethod
+    def bulk_create_with_keys(cls, projects, batch_size=None):
+        """
+        Insert many projects with bulk_create, giving a key to those without one. The keys are
+        drawn again for the whole list if one of them is already taken. Return the projects.
+        """
+        keyless = [project for project in projects if not project.key]
+        for attempt in range(KEY_ATTEMPTS):
+            for project, key in zip(keyless, cls.generate_keys(len(keyless))):
+                project.key = key
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create(projects, batch_size=batch_size)
+                break
+            except IntegrityError:
+                if attempt == KEY_ATTEMPTS - 1 or not keyless:
+                    raise
+        # bulk_create sends no post_save signal
+        MyUser.bump_access_version(*{project.owner_id for project in projects})
+        return projects
+
+    @classmethod
+    def bump_schedule_version(cls, *project_ids):
+        """Invalidate every cached view of the schedule of the given projects."""
+        cls.objects.filter(pk__in=project_ids).update(schedule_version=F('schedule_version') + 1)
 
 @receiver(m2m_changed, sender=Project.members.through)
 def disallow_owner_as_member(sender, **kwargs):
     action = kwargs.get('action', None)
+    # reverse: projects added to a user, else users added to a project
+    instance, reverse = kwargs.get('instance'), kwargs.get('reverse')
     if action == 'pre_add':
-        owner = kwargs.get('instance').owner
         new_members = kwargs.get('pk_set', [])
-        if owner.pk in new_members:
+        if reverse:
+            owns_one = Project.objects.filter(pk__in=new_members, owner=instance).exists()
+        else:
+            owns_one = instance.owner.pk in new_members
+        if owns_one:
             raise ValidationError("Owner cannot be added as a member.")
+    # invalidate the visible projects of the users added or removed
+    if action in ('post_add', 'post_remove'):
+        MyUser.bump_access_version(*([instance.pk] if reverse else kwargs.get('pk_set')))
+    elif action == 'pre_clear':
+        MyUser.bump_access_version(*([instance.pk] if reverse else instance.members.values_list('pk', flat=True)))
+
+# Invalidate the visible projects of the owner of a new project, and of both owners when it changes hands
+@receiver(post_save, sender=Project)
+def invalidate_owner_access(sender, instance, created, **kwargs):
+    loaded_owner_id = getattr(instance, '_loaded_owner_id', None)
+    if created or loaded_owner_id != instance.owner_id:
+        MyUser.bump_access_version(*{loaded_owner_id, instance.owner_id} - {None})
+        instance._loaded_owner_id = instance.owner_id
+
+# Invalidate the visible projects of the owner and the members of a deleted project
+@receiver(pre_delete, sender=Project)
+def invalidate_project_access(sender, instance, **kwargs):
+    MyUser.bump_access_version(instance.owner_id, *instance.members.values_list('pk', flat=True))
 
 
 class Resource(models.Model):
@@ -77,7 +216,17 @@ class Resource(models.Model):
         return ext
 
 
-class Task(models.Model):
+class ScheduleItem:
+    """Task or meeting remembering the project it was loaded with, whose schedule changes too if it moves."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
+
+
+class Task(ScheduleItem, models.Model):
     CHOICES = (
         ('1', 'À commencer'),
         ('2', 'En cours'),
@@ -95,6 +244,16 @@ class Task(models.Model):
         Project, on_delete=models.CASCADE, related_name='tasks', blank=False)
     assignees = models.ManyToManyField(
         settings.AUTH_USER_MODEL, related_name='tasks')
+    # Finish-to-start dependencies: the task starts once its predecessors are finished
+    predecessors = models.ManyToManyField(
+        'self', symmetrical=False, related_name='successors', blank=True)
+
+    class Meta:
+        # date window queries of the Gantt chart
+        indexes = [models.Index(fields=['project', 'start_date', 'end_date'])]
+        constraints = [
+            models.CheckConstraint(check=models.Q(start_date__lte=F('end_date')), name='task_start_before_end'),
+        ]
 
     def __str__(self):
         return self.name
@@ -111,7 +270,22 @@ class Task(models.Model):
                 raise ValidationError(
                     "Les dates d'une tâche ne peuvent pas dépasser les dates du projet")
 
-class Meeting(models.Model):
+    @classmethod
+    def check_dependencies(cls, project_id, edges):
+        """
+        Raise a ValidationError if adding the (predecessor id, successor id) edges to the
+        dependencies of the project would link it to another project or create a cycle.
+        """
+        # imported here, the critical path engine needs the models
+        from .critical_path import dependency_graph, topological_order
+        task_ids = {task_id for edge in edges for task_id in edge}
+        if cls.objects.filter(pk__in=task_ids).exclude(project_id=project_id).exists():
+            raise ValidationError('Une tâche ne peut dépendre que des tâches de son projet.')
+        ids, sources, targets = dependency_graph(project_id, extra_edges=edges)
+        if topological_order(len(ids), sources, targets) is None:
+            raise ValidationError('Cette dépendance créerait un cycle entre les tâches.')
+
+class Meeting(ScheduleItem, models.Model):
     name = models.CharField(max_length=100, validators=[RegexValidator(
         r'^\S.*\S$', 'Name cannot start nor end with whitespace.')])
     description = models.TextField(null=True, blank=True)
@@ -121,14 +295,126 @@ class Meeting(models.Model):
     project = models.ForeignKey(
         Project, on_delete=models.CASCADE, related_name='meetings', blank=False)
 
+    class Meta:
+        # date window queries of the Gantt chart
+        indexes = [models.Index(fields=['project', 'start_date'])]
+        constraints = [
+            models.CheckConstraint(check=models.Q(end_date__isnull=True) | models.Q(end_date__gte=F('start_date')),
+                                   name='meeting_start_before_end'),
+        ]
+
     def __str__(self):
         return self.name
 
+# Check the dependencies added to a task, and invalidate the critical path when they change
+@receiver(m2m_changed, sender=Task.predecessors.through)
+def check_task_dependencies(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_add':
+        # reverse: successors added to the instance, else predecessors added to it
+        if reverse:
+            edges = [(instance.pk, pk) for pk in pk_set]
+        else:
+            edges = [(pk, instance.pk) for pk in pk_set]
+        Task.check_dependencies(instance.project_id, edges)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        Project.bump_schedule_version(instance.project_id)
+
+# Projects changed inside bulk_schedule_change() in the current thread
+_bulk_change = threading.local()
+
+@contextmanager
+def bulk_schedule_change():
+    """Bump the schedule version of the changed projects once when the block ends, instead of once per item."""
+    if getattr(_bulk_change, 'projects', None) is not None:
+        yield
+        return
+    _bulk_change.projects = set()
+    try:
+        yield
+        projects = _bulk_change.projects
+    finally:
+        _bulk_change.projects = None
+    if projects:
+        Project.bump_schedule_version(*projects)
+
+# Invalidate the cached Gantt chart of the project when one of its items changes
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+def invalidate_project_schedule(sender, instance, **kwargs):
+    # an item moved to another project also leaves the schedule of the project it was loaded with
+    changed = {instance.project_id, getattr(instance, '_loaded_project_id', None)} - {None}
+    instance._loaded_project_id = instance.project_id
+    projects = getattr(_bulk_change, 'projects', None)
+    if projects is not None:
+        projects.update(changed)
+    else:
+        Project.bump_schedule_version(*changed)
+
+
 class MyUser(AbstractUser):
     email = models.EmailField(validators=[EmailValidator(
         message="Please enter a valid email address.")],
         unique=True)
+    # Incremented each time the dates or the assignees of one of the user's tasks change,
+    # used as cache key of the workload
+    workload_version = models.PositiveIntegerField(default=0, editable=False)
+    # Incremented each time the user gains or loses access to a project, used as cache key
+    # of the visible projects (loaded with the user on each request)
+    access_version = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        # saving the last login only does not check the username and email again
+        self.full_clean(exclude=unsaved_fields(self, kwargs.get('update_fields')))
+        kwargs = without_counters(self, kwargs, ('workload_version', 'access_version'))
         return super(MyUser, self).save(*args, **kwargs)
+
+    @classmethod
+    def bump_workload_version(cls, *user_ids):
+        """Invalidate the cached workload of the given users."""
+        if user_ids:
+            cls.objects.filter(pk__in=user_ids).update(workload_version=F('workload_version') + 1)
+
+    @classmethod
+    def bump_access_version(cls, *user_ids):
+        """Invalidate the cached visible projects of the given users."""
+        if user_ids:
+            cls.objects.filter(pk__in=user_ids).update(access_version=F('access_version') + 1)
+
+    @classmethod
+    def bump_assignees_workload_version(cls, tasks):
+        """Invalidate the cached workload of the assignees of a queryset of tasks."""
+        cls.objects.filter(tasks__in=tasks).update(workload_version=F('workload_version') + 1)
+
+@contextmanager
+def bulk_task_deletion(tasks):
+    """
+    Bump the workload version of the assignees of a queryset of tasks once, before deleting them
+    in the block, instead of once per deleted task.
+    """
+    MyUser.bump_assignees_workload_version(tasks)
+    deleting = getattr(_bulk_change, 'deleting_tasks', False)
+    _bulk_change.deleting_tasks = True
+    try:
+        yield
+    finally:
+        _bulk_change.deleting_tasks = deleting
+
+# Invalidate the cached workload of the assignees of a task when it changes or is deleted
+# (a new task has no assignee yet)
+@receiver(post_save, sender=Task)
+@receiver(pre_delete, sender=Task)
+def invalidate_assignees_workload(sender, instance, **kwargs):
+    if kwargs.get('created') or getattr(_bulk_change, 'deleting_tasks', False):
+        return
+    MyUser.bump_workload_version(*instance.assignees.values_list('pk', flat=True))
+
+# Invalidate the cached workload of the users added to or removed from a task
+@receiver(m2m_changed, sender=Task.assignees.through)
+def invalidate_assignment_workload(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse: tasks added to a user, else users added to a task
+    if action in ('post_add', 'post_remove'):
+        MyUser.bump_workload_version(*([instance.pk] if reverse else pk_set))
+    elif action == 'pre_clear':
+        MyUser.bump_workload_version(*([instance.pk] if reverse else instance.assignees.values_list('pk', flat=True)))
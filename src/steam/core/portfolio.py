@@ -0,0 +1,84 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+from .gantt_data import STATUS_COLORS, STATUS_LABELS
+from .gantt_svg import month_ticks
+from .models import Project
+from .schedule import FIGURE_TIMEOUT
+
+# Task statuses counted per project, in the order of their bar segments
+STATUSES = ('1', '2', '3')
+
+
+def portfolio_version():
+    """
+    Return a fingerprint of every project and schedule, computed in one aggregate query.
+    It changes when a project is created, deleted or edited, or when one of its tasks or meetings changes.
+    """
+    stats = Project.objects.aggregate(count=Count('id'), last=Max('id'), versions=Sum('schedule_version'),
+                                      updated=Max('updated_at'))
+    updated = stats['updated'].timestamp() if stats['updated'] else 0
+    return '{}-{}-{}-{}'.format(stats['count'], stats['last'], stats['versions'], updated)
+
+
+def load_portfolio():
+    """
+    Return one dict per project with its dates, the first and last day of its tasks and its
+    number of tasks per status, from a single GROUP BY query.
+    """
+    counts = {'status_' + status: Count('tasks', filter=Q(tasks__status=status)) for status in STATUSES}
+    return list(Project.objects
+                .annotate(first=Min('tasks__start_date'), last=Max('tasks__end_date'), **counts)
+                .values('id', 'name', 'start_date', 'end_date', 'is_archived', 'first', 'last', *counts)
+                .order_by('start_date', 'id'))
+
+
+def get_cached_portfolio(version=None):
+    """Return the projects of load_portfolio, queried again only when a project or schedule changed."""
+    if version is None:
+        version = portfolio_version()
+    key = 'portfolio-' + version
+    projects = cache.get(key)
+    if projects is None:
+        projects = load_portfolio()
+        cache.set(key, projects, FIGURE_TIMEOUT)
+    return projects
+
+
+def portfolio_rows(projects):
+    """
+    Return the time range of the portfolio and the position of each project's bar in it, in percent
+    of the range. A bar spans the tasks of the project, or the project itself when it has none,
+    and is split in one segment per status in proportion to its number of tasks.
+    """
+    spans = [(project['first'] or project['start_date'], project['last'] or project['end_date'])
+             for project in projects]
+    if not spans:
+        return None, []
+    first = min(start for start, _ in spans)
+    last = max(max(end for _, end in spans), first + timedelta(days=1))
+    scale = 100 / (last - first).days
+
+    rows = []
+    for project, (start, end) in zip(projects, spans):
+        total = sum(project['status_' + status] for status in STATUSES)
+        rows.append({
+            **project,
+            'left': round((start - first).days * scale, 3),
+            'width': max(round((end - start).days * scale, 3), 0.2),
+            'tasks': total,
+            'title': '{} ({} - {})'.format(project['name'], start.strftime('%d/%m/%y'), end.strftime('%d/%m/%y')),
+            'segments': [{'color': STATUS_COLORS[status], 'label': STATUS_LABELS[status],
+                          'count': project['status_' + status],
+                          'width': round(100 * project['status_' + status] / total, 3)}
+                         for status in STATUSES if project['status_' + status]],
+        })
+    today = timezone.now().date()
+    return {
+        'first': first,
+        'days': (last - first).days,
+        'ticks': [{'left': round((day - first).days * scale, 3), 'label': day.strftime('%m/%y')}
+                  for day in month_ticks(first, last)],
+        'today': round((today - first).days * scale, 3) if first <= today <= last else None,
+    }, rows
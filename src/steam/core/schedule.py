@@ -0,0 +1,60 @@
+import threading
+from django.core.cache import cache
+from django.utils import timezone
+from .models import Project
+
+# Built figures are kept for a day at most, the "today" line changes anyway
+FIGURE_TIMEOUT = 60 * 60 * 24
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_schedule_version(project_id):
+    """Return the current schedule version of a project (0 if the project does not exist)."""
+    version = Project.objects.filter(pk=project_id).values_list('schedule_version', flat=True).first()
+    return version or 0
+
+
+def figure_cache_key(project_id, version, window=None, level=None):
+    key = 'gantt-figure-{}-{}-{}'.format(project_id, version, timezone.now().date().isoformat())
+    if window is not None:
+        key += '-{}-{}'.format(*window)
+    if level is not None:
+        key += '-' + level
+    return key
+
+
+def get_cached_figure(project_id, build, version=None, window=None, level=None):
+    """
+    Return the Gantt figure of a project (of one date window of it, or its rollup at a level),
+    building it with build(project_id) only when the schedule changed since the last build.
+    """
+    if version is None:
+        version = get_schedule_version(project_id)
+    key = figure_cache_key(project_id, version, window, level)
+    figure = cache.get(key)
+    if figure is not None:
+        _count('hits')
+        return figure
+    _count('misses')
+    figure = build(project_id)
+    cache.set(key, figure, FIGURE_TIMEOUT)
+    return figure
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    """Return the figure cache hit/miss counters of this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats['hits'] = 0
+        _stats['misses'] = 0
@@ -0,0 +1,226 @@
+import csv
+import io
+import os
+import re
+from datetime import date
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Q
+from .bulk import bulk_create_in_project
+from .models import Project, Task, MyUser
+
+# Rows read, validated and inserted at once
+CHUNK_SIZE = 1000
+# Errors kept for the report, the following ones are only counted
+MAX_ERRORS = 200
+# Columns of the imported file, the others are ignored
+REQUIRED_COLUMNS = ('name', 'start_date', 'end_date')
+OPTIONAL_COLUMNS = ('description', 'status', 'assignees')
+# Files with a type column, such as the CSV exports, only have their task rows imported
+TASK_TYPES = ('', 'task')
+# Usernames of the assignees of a task are separated by spaces, commas or semicolons
+ASSIGNEES_SEPARATOR = re.compile(r'[\s,;]+')
+NAME_PATTERN = r'^\S.*\S$'
+NAME_MAX_LENGTH = Task._meta.get_field('name').max_length
+# Statuses are given by code or by label
+STATUSES = {code: code for code, _ in Task.CHOICES}
+STATUSES.update({label.lower(): code for code, label in Task.CHOICES})
+
+
+class TaskImportError(Exception):
+    """The file cannot be read as a list of tasks."""
+
+
+class ImportResult:
+    """
+    Number of rows read, skipped (rows of meetings in an export) and of tasks created, and the
+    (line, message) errors of the invalid rows.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_errors(self, errors):
+        self.error_count += len(errors)
+        self.errors.extend(errors[:MAX_ERRORS - len(self.errors)])
+
+
+def read_csv_chunks(file):
+    """Read a CSV file in chunks of CHUNK_SIZE rows, the separator (comma or semicolon) is detected."""
+    # uploaded files are not recognized as binary files by pandas, their underlying file is decoded
+    text = io.TextIOWrapper(getattr(file, 'file', file), encoding='utf-8-sig', newline='')
+    try:
+        yield from pd.read_csv(text, sep=None, engine='python', dtype=str, keep_default_na=False,
+                               chunksize=CHUNK_SIZE, skipinitialspace=True)
+    except (pd.errors.ParserError, UnicodeDecodeError, csv.Error) as error:
+        raise TaskImportError('Fichier CSV illisible : {}'.format(error))
+
+
+def cell_text(value):
+    """Text of an XLSX cell, dates written as YYYY-MM-DD."""
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return value.isoformat()[:10]
+    return str(value)
+
+
+def read_xlsx_chunks(file):
+    """
+    Read the first sheet of an XLSX file in chunks of CHUNK_SIZE rows. The sheet is streamed in
+    read-only mode, pandas' read_excel would load it whole.
+    """
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise TaskImportError("L'import de fichiers XLSX nécessite openpyxl.")
+    try:
+        rows = load_workbook(file, read_only=True, data_only=True).worksheets[0].iter_rows(values_only=True)
+        header = [cell_text(value).strip() for value in next(rows, ())]
+    except Exception as error:
+        raise TaskImportError('Fichier XLSX illisible : {}'.format(error))
+    chunk = []
+    for row in rows:
+        chunk.append([cell_text(value) for value in row[:len(header)]])
+        if len(chunk) == CHUNK_SIZE:
+            yield pd.DataFrame(chunk, columns=header)
+            chunk = []
+    if chunk or not header:
+        yield pd.DataFrame(chunk, columns=header)
+
+
+def read_chunks(file, filename):
+    """Read an uploaded CSV or XLSX file in chunks of rows, as DataFrames of strings."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        return read_xlsx_chunks(file)
+    if extension == '.csv':
+        return read_csv_chunks(file)
+    raise TaskImportError('Seuls les fichiers .csv et .xlsx peuvent être importés.')
+
+
+def validate_chunk(df, project, lines):
+    """
+    Check every row of a chunk at once: names, dates within the project, statuses and assignees,
+    who must be the owner or members of the project and are resolved with one query.
+
+    Return the DataFrame of the valid rows, with parsed dates, status codes and the ids of their
+    assignees, and the (line, message) errors of the invalid rows, lines being the line number
+    of each row in the file.
+    """
+    df = df.reset_index(drop=True)
+    problems = []
+
+    names = df['name'].str.strip()
+    problems.append((~names.str.match(NAME_PATTERN), 'Le nom doit compter au moins deux caractères.'))
+    problems.append((names.str.len() > NAME_MAX_LENGTH,
+                     'Le nom ne peut pas dépasser {} caractères.'.format(NAME_MAX_LENGTH)))
+
+    starts = pd.to_datetime(df['start_date'].str.strip(), format='%Y-%m-%d', errors='coerce')
+    ends = pd.to_datetime(df['end_date'].str.strip(), format='%Y-%m-%d', errors='coerce')
+    dated = starts.notna() & ends.notna()
+    problems.append((~dated, 'Les dates doivent être au format AAAA-MM-JJ.'))
+    problems.append((dated & (starts > ends), 'La date de début doit être antérieure à la date de fin.'))
+    problems.append((dated & ((starts < pd.Timestamp(project.start_date)) | (ends > pd.Timestamp(project.end_date))),
+                     "Les dates d'une tâche ne peuvent pas dépasser les dates du projet"))
+
+    statuses = df['status'].str.strip().str.lower().replace('', '1').map(STATUSES)
+    problems.append((statuses.isna(), 'Statut inconnu.'))
+
+    assignees = df['assignees'].map(lambda value: [name for name in ASSIGNEES_SEPARATOR.split(value) if name])
+    usernames = {name for names_of_row in assignees for name in names_of_row}
+    users = dict(MyUser.objects.filter(Q(projects=project) | Q(pk=project.owner_id), username__in=usernames)
+                 .values_list('username', 'pk').distinct()) if usernames else {}
+    unknown = assignees.map(lambda names_of_row: [name for name in names_of_row if name not in users])
+    problems.append((unknown.map(bool), None))
+
+    errors = []
+    invalid = np.zeros(len(df), dtype=bool)
+    for mask, message in problems:
+        mask = mask.to_numpy(dtype=bool)
+        invalid |= mask
+        for i in np.flatnonzero(mask):
+            text = message or 'Assignés inconnus dans le projet : {}'.format(', '.join(unknown.iat[i]))
+            errors.append((int(lines[i]), text))
+    errors.sort(key=lambda error: error[0])
+
+    valid = ~invalid
+    rows = pd.DataFrame({
+        'name': names[valid],
+        'description': df['description'][valid],
+        'start_date': starts[valid].dt.date,
+        'end_date': ends[valid].dt.date,
+        'status': statuses[valid],
+        'assignees': assignees[valid].map(lambda names_of_row: sorted({users[name] for name in names_of_row})),
+    })
+    return rows, errors
+
+
+def insert_chunk(rows, project):
+    """Insert the valid rows of a chunk with one bulk_create and one bulk insert of their assignments."""
+    tasks = [Task(name=row.name, description=row.description or None, start_date=row.start_date,
+                  end_date=row.end_date, status=row.status, project=project)
+             for row in rows.itertuples(index=False)]
+    # import_tasks holds the lock on the project that bulk_create_in_project requires
+    bulk_create_in_project(Task, tasks, project.pk)
+    assignments = [Task.assignees.through(task_id=task.pk, myuser_id=user_id)
+                   for task, user_ids in zip(tasks, rows['assignees']) for user_id in user_ids]
+    Task.assignees.through.objects.bulk_create(assignments)
+    return len(tasks), {assignment.myuser_id for assignment in assignments}
+
+
+def import_tasks(project, file, filename, dry_run=False):
+    """
+    Import the tasks of a CSV or XLSX file into a project, streaming it in chunks of CHUNK_SIZE
+    rows. The file has a header line with the columns name, start_date and end_date, and
+    optionally description, status and assignees (usernames). If it has a type column, like the
+    CSV exports of a project, the rows that are not tasks are skipped.
+
+    The import is all or nothing: if a row is invalid, every error is reported and no task is
+    created. Raise a TaskImportError if the file cannot be read. Return an ImportResult.
+    """
+    result = ImportResult()
+    assignees = set()
+    with transaction.atomic():
+        if not dry_run:
+            # no task can be added to the project by another transaction during the import
+            Project.objects.select_for_update().get(pk=project.pk)
+        # the header is the first line of the file
+        first_line = 2
+        for df in read_chunks(file, filename):
+            df.columns = [str(column).strip().lower() for column in df.columns]
+            missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+            if missing:
+                raise TaskImportError('Colonnes manquantes : {}'.format(', '.join(missing)))
+            for column in OPTIONAL_COLUMNS:
+                if column not in df.columns:
+                    df[column] = ''
+            df = df.fillna('')
+            lines = np.arange(len(df)) + first_line
+            result.rows += len(df)
+            first_line += len(df)
+            if 'type' in df.columns:
+                tasks = df['type'].str.strip().str.lower().isin(TASK_TYPES).to_numpy()
+                result.skipped += int((~tasks).sum())
+                df, lines = df[tasks], lines[tasks]
+            rows, errors = validate_chunk(df, project, lines)
+            result.add_errors(errors)
+            # once a row is invalid, the following ones are only checked
+            if not result.error_count and not dry_run and len(rows):
+                created, users = insert_chunk(rows, project)
+                result.created += created
+                assignees |= users
+        if result.error_count or dry_run:
+            transaction.set_rollback(True)
+            result.created = 0
+        elif result.created:
+            # bulk_create sends no signal
+            Project.bump_schedule_version(project.pk)
+            MyUser.bump_workload_version(*assignees)
+    return result
+
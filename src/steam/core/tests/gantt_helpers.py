@@ -0,0 +1,23 @@
+import json
+
+UPDATE_URL = '/django_plotly_dash/app/SteamGantt/_dash-update-component'
+
+# Outputs, inputs and states of the Gantt callback
+OUTPUTS = ['graph.figure', 'figure-version.data', 'graph.clickData', 'click-data.children', 'input1.value',
+           'textarea1.value', 'startdate.value', 'enddate.value', 'statut-field1.value', 'input2.value',
+           'textarea2.value', 'date.value', 'bulk-message.children', 'graph.selectedData']
+INPUTS = ['graph.clickData', 'relayout.data', 'update-item-button.n_clicks', 'delete-item-button.n_clicks',
+          'validate1-update-button.n_clicks', 'validate2-update-button.n_clicks', 'bulk-apply-button.n_clicks',
+          'bulk-delete-button.n_clicks']
+STATES = ['input1.value', 'textarea1.value', 'startdate.value', 'enddate.value', 'statut-field1.value',
+          'input2.value', 'textarea2.value', 'date.value', 'id.value', 'figure-version.data', 'graph.selectedData',
+          'bulk-shift.value', 'bulk-status.value']
+
+
+def gantt_callback(client, values, changed=None):
+    """Post the Gantt callback with the given property values, changed being the property that triggered it."""
+    def props(names):
+        return [{'id': name.split('.')[0], 'property': name.split('.')[1], 'value': values.get(name)} for name in names]
+    body = {'output': '..' + '...'.join(OUTPUTS) + '..', 'outputs': None, 'inputs': props(INPUTS),
+            'state': props(STATES), 'changedPropIds': [changed] if changed else []}
+    return client.post(UPDATE_URL, json.dumps(body), content_type='application/json')
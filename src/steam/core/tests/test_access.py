@@ -0,0 +1,114 @@
+from django.test import TestCase, RequestFactory
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from core.models import Project, Resource
+from core.access import resolve_access, project_role, visible_projects, OWNER, STAFF, MEMBER
+from core.tests.gantt_helpers import gantt_callback
+
+User = get_user_model()
+
+class TestAccess(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.member = User.objects.create_user(username='member', email='member@example.com', password='password')
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='password',
+                                              is_staff=True)
+        self.outsider = User.objects.create_user(username='outsider', email='outsider@example.com',
+                                                 password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.owner)
+        self.project.members.add(self.member)
+        self.hidden = Resource.objects.create(name='Hidden', file='resources/hidden.pdf', project=self.project,
+                                              is_hidden=True)
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+
+    def test_roles(self):
+        """Test the role of each kind of user in a project."""
+        roles = {user.username: project_role(self.request(user), self.project.pk)
+                 for user in (self.owner, self.member, self.staff, self.outsider)}
+        self.assertEqual(roles, {'owner': OWNER, 'member': MEMBER, 'staff': STAFF, 'outsider': None})
+        self.assertIsNone(project_role(self.request(AnonymousUser()), self.project.pk))
+        self.assertEqual(resolve_access(self.request(self.staff), 999), (None, None))
+
+    def test_resolved_once_per_request(self):
+        """Test that the project is loaded with one query and reused within the request."""
+        request = self.request(self.member)
+        project_role(request, self.project.pk)
+        with self.assertNumQueries(1):
+            project, role = resolve_access(request, self.project.pk)
+            self.assertEqual(project_role(request, str(self.project.pk)), MEMBER)
+            self.assertEqual(project.owner, self.owner)
+
+    def test_detail_view_loads_the_project_once(self):
+        """Test that the project detail page does not load the project again after the access check."""
+        self.client.force_login(self.member)
+        self.client.get(reverse('project-detail', kwargs={'pk': self.project.pk}))
+        # session, user, project and members, the access is cached
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('project-detail', kwargs={'pk': self.project.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(reverse('project-detail', kwargs={'pk': self.project.pk})).status_code, 403)
+        self.assertEqual(self.client.get(reverse('project-detail', kwargs={'pk': 999})).status_code, 404)
+
+    def test_hidden_resources(self):
+        """Test that members cannot open hidden resources, which the owner can change."""
+        url = reverse('resource-detail', kwargs={'pk': self.hidden.pk})
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(reverse('resource-update', kwargs={'pk': self.hidden.pk})).status_code, 403)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(reverse('resource-update', kwargs={'pk': self.hidden.pk})).status_code, 200)
+
+    def test_gantt_callback_refused_to_outsiders(self):
+        """Test that the Gantt callback does nothing for a user who cannot see the project."""
+        self.client.force_login(self.owner)
+        self.assertEqual(gantt_callback(self.client, {'id.value': self.project.pk}).status_code, 200)
+        self.client.force_login(self.outsider)
+        self.assertEqual(gantt_callback(self.client, {'id.value': self.project.pk}).status_code, 204)
+
+    def test_visible_projects_follow_memberships(self):
+        """Test that the cached visible projects change when a user joins, leaves or gets a project."""
+        def visible(user):
+            return visible_projects(User.objects.get(pk=user.pk))
+        self.assertEqual(visible(self.member), {self.project.pk: MEMBER})
+        self.project.members.remove(self.member)
+        self.assertEqual(visible(self.member), {})
+        self.outsider.projects.add(self.project)
+        self.assertEqual(visible(self.outsider), {self.project.pk: MEMBER})
+        self.project.members.clear()
+        self.assertEqual(visible(self.outsider), {})
+        project = Project.objects.get(pk=self.project.pk)
+        project.owner = self.member
+        project.save()
+        self.assertEqual(visible(self.member), {self.project.pk: OWNER})
+        self.assertEqual(visible(self.owner), {})
+        project.delete()
+        self.assertEqual(visible(self.member), {})
+
+    def test_cached_role_lookup(self):
+        """Test that checking the role of a user needs no query once their visible projects are cached."""
+        project_role(self.request(self.member), self.project.pk)
+        project_role(self.request(self.staff), self.project.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(project_role(self.request(self.member), self.project.pk), MEMBER)
+            self.assertEqual(project_role(self.request(self.staff), self.project.pk), STAFF)
+
+    def test_stale_user_save_keeps_access_version(self):
+        """Test that saving a user loaded before losing access does not bring the old visible projects back."""
+        member = User.objects.get(pk=self.member.pk)
+        self.assertEqual(visible_projects(member), {self.project.pk: MEMBER})
+        self.project.members.remove(self.member)
+        member.first_name = 'Renamed'
+        member.save()
+        self.assertEqual(visible_projects(User.objects.get(pk=self.member.pk)), {})
@@ -0,0 +1,115 @@
+import gzip
+import io
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting, Resource
+from core.archive import ArchiveError, Restore, write_archive
+
+User = get_user_model()
+
+class TestArchive(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings = override_settings(MEDIA_ROOT=self.media.name)
+        self.settings.enable()
+        self.today = timezone.now().date()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.member = User.objects.create_user(username='member', email='member@example.com', password='password')
+        self.project = Project.objects.create(name='Project', description='Description', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.owner)
+        self.project.members.add(self.member)
+        self.tasks = []
+        for i in range(5):
+            task = Task.objects.create(name='Task {}'.format(i), start_date=self.today,
+                                       end_date=self.today + timezone.timedelta(days=i), status='2',
+                                       project=self.project)
+            task.assignees.set([self.member])
+            self.tasks.append(task)
+        self.tasks[3].predecessors.add(self.tasks[1])
+        Meeting.objects.create(name='Meeting', start_date=self.today, project=self.project)
+        resource = Resource(name='Plan', file='resources/plan.txt', project=self.project)
+        resource.file.save('plan.txt', ContentFile(b'x' * 100000))
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media.cleanup()
+
+    def archive(self, include_files=False):
+        out = io.StringIO()
+        write_archive(Project.objects.get(pk=self.project.pk), out, include_files)
+        return out.getvalue().splitlines()
+
+    def test_restore_maps_ids_and_key(self):
+        """Test that a restored project gets new ids, a new key if its own is taken, and the same items."""
+        restore = Restore(size=2)
+        project = restore.restore(self.archive())
+        self.assertNotEqual(project.pk, self.project.pk)
+        self.assertNotEqual(project.key, self.project.key)
+        self.assertEqual(list(project.members.all()), [self.member])
+        tasks = {task.name: task for task in Task.objects.filter(project=project)}
+        self.assertEqual(len(tasks), 5)
+        self.assertNotIn(tasks['Task 3'].pk, [task.pk for task in self.tasks])
+        self.assertEqual(list(tasks['Task 3'].predecessors.all()), [tasks['Task 1']])
+        self.assertEqual(list(tasks['Task 4'].assignees.all()), [self.member])
+        self.assertEqual(Meeting.objects.filter(project=project).count(), 1)
+        self.assertEqual(restore.counts['files'], 0)
+        resource = Resource.objects.get(project=project)
+        self.assertEqual(resource.name, 'Plan')
+        # the archive has no files, the resource does not point at those of this project
+        self.assertFalse(resource.file)
+
+    def test_restore_files_and_missing_users(self):
+        """Test that resource files are restored from their chunks and that missing users are left out."""
+        lines = self.archive(include_files=True)
+        self.assertGreater(sum('"type": "file"' in line for line in lines), 1)
+        self.member.delete()
+        Project.objects.filter(pk=self.project.pk).delete()
+        restore = Restore()
+        project = restore.restore(lines)
+        self.assertEqual(project.key, self.project.key)
+        self.assertEqual(restore.missing_users, {'member'})
+        self.assertFalse(project.members.exists())
+        with Resource.objects.get(project=project).file.open('rb') as f:
+            self.assertEqual(f.read(), b'x' * 100000)
+
+    def test_restore_keeps_upload_dates(self):
+        """Test that resources restored with their files keep the date they were uploaded at."""
+        uploaded_at = timezone.now() - timezone.timedelta(days=100)
+        Resource.objects.filter(project=self.project).update(uploaded_at=uploaded_at)
+        restore = Restore()
+        project = restore.restore(self.archive(include_files=True))
+        self.assertEqual(restore.counts['files'], 1)
+        resource = Resource.objects.get(project=project)
+        self.assertEqual(resource.uploaded_at, uploaded_at)
+        self.assertTrue(resource.file.storage.exists(resource.file.name))
+
+    def test_invalid_archive(self):
+        """Test that an archive that is not one is refused and that nothing is restored."""
+        with self.assertRaises(ArchiveError):
+            Restore().restore(['{"type": "task"}'])
+        lines = self.archive()
+        with self.assertRaises(ArchiveError):
+            Restore().restore(lines[:-1] + ['not json'])
+        with self.assertRaisesMessage(ArchiveError, 'Line 3: invalid member record'):
+            Restore().restore(lines[:2] + ['{"type": "member"}'])
+        with self.assertRaisesMessage(ArchiveError, 'Line 3: invalid task record'):
+            Restore().restore(lines[:2] + ['{"type": "task", "pk": 1, "name": "Task", "description": null, '
+                                           '"start_date": "tomorrow", "end_date": null, "status": "1"}'])
+        self.assertEqual(Project.objects.count(), 1)
+
+    def test_commands(self):
+        """Test that an archive written by export_project is restored by restore_project for another owner."""
+        path = os.path.join(self.media.name, 'project.ndjson.gz')
+        call_command('export_project', self.project.pk, path, files=True, stdout=io.StringIO())
+        with gzip.open(path, 'rt') as f:
+            self.assertIn('"type": "archive"', f.readline())
+        call_command('restore_project', path, owner='member', stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(Project.objects.get(owner=self.member).tasks.count(), 5)
+        with self.assertRaises(CommandError):
+            call_command('restore_project', path, owner='nobody')
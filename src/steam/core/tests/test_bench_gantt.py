@@ -0,0 +1,24 @@
+import io
+import json
+import os
+import tempfile
+from django.test import TestCase
+from django.core.management import call_command
+from core.models import Project, Task
+
+class TestBenchGantt(TestCase):
+    def test_results_per_size_and_stage(self):
+        """Test that the benchmark reports every stage for every size and leaves no seeded data behind."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.json')
+            call_command('bench_gantt', sizes=[10, 20], repeat=1, output=path, stderr=io.StringIO())
+            with open(path) as f:
+                report = json.load(f)
+        self.assertEqual([result['size'] for result in report['results']], [10, 20])
+        stages = ['query', 'frame', 'figure', 'json', 'click_data', 'placeholder']
+        for result in report['results']:
+            self.assertEqual(list(result['seconds']), stages)
+            self.assertEqual(list(result['peak_memory_bytes']), stages)
+        self.assertIn('commit', report['environment'])
+        self.assertFalse(Project.objects.exists())
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,93 @@
+from django.test import TestCase
+from django.db import IntegrityError, transaction
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+from core.bulk import bulk_create_in_project, create_projects, create_tasks, create_meetings
+
+User = get_user_model()
+
+class TestBulkCreate(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.member = User.objects.create_user(username='member', email='member@example.com', password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.day(0), end_date=self.day(30),
+                                              owner=self.user)
+
+    def day(self, n):
+        return self.today + timezone.timedelta(days=n)
+
+    def task(self, start, end, project_id=None):
+        return Task(name='Task', start_date=self.day(start), end_date=self.day(end), status='1',
+                    project_id=project_id or self.project.pk)
+
+    def test_tasks_in_constant_queries(self):
+        """Test that a batch of tasks is validated and inserted in a constant number of queries."""
+        version = self.project.schedule_version
+        # project, savepoint, insert, schedule version, release
+        with self.assertNumQueries(5):
+            create_tasks([self.task(i % 30, i % 30) for i in range(100)])
+        self.assertEqual(Task.objects.filter(project=self.project).count(), 100)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.schedule_version, version + 1)
+
+    def test_invalid_batch_is_not_inserted(self):
+        """Test that every invalid task of a batch is reported and that no task is inserted."""
+        with self.assertRaises(ValidationError) as error:
+            create_tasks([self.task(0, 1), self.task(5, 40), self.task(3, 2)])
+        self.assertEqual(len(error.exception.messages), 2)
+        self.assertTrue(error.exception.messages[0].startswith('task 2'))
+        self.assertFalse(Task.objects.exists())
+        with self.assertRaises(ValidationError):
+            create_meetings([Meeting(name='Meeting', start_date=self.day(1), project_id=self.project.pk + 1)])
+
+    def test_projects_get_distinct_keys(self):
+        """Test that projects created in bulk get a key and that their owners are checked."""
+        projects = create_projects([Project(name='Bulk {}'.format(i), start_date=self.day(0), end_date=self.day(10),
+                                            owner=self.user) for i in range(20)])
+        self.assertEqual(len({project.key for project in projects} - {''}), 20)
+        with self.assertRaises(ValidationError):
+            create_projects([Project(name='Bulk', start_date=self.day(0), end_date=self.day(10),
+                                     owner_id=self.member.pk + 100)])
+
+    def test_dates_are_constrained_by_the_database(self):
+        """Test that rows inserted without validation still cannot end before they start."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Task.objects.bulk_create([self.task(5, 2)])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Project.objects.filter(pk=self.project.pk).update(end_date=self.day(-1))
+
+    def test_lean_save_validation(self):
+        """Test that saves only look the owner up among the members when it changes."""
+        self.project.members.add(self.member)
+        project = Project.objects.get(pk=self.project.pk)
+        project.name = 'Renamed'
+        # update only
+        with self.assertNumQueries(1):
+            project.save(update_fields=['name'])
+        # update only, the unchanged key and owner are not looked up again
+        project.description = 'Changed'
+        with self.assertNumQueries(1):
+            project.save()
+        # the same holds for a project saved again after its creation
+        self.project.name = 'Renamed'
+        with self.assertNumQueries(1):
+            self.project.save()
+        project.owner = self.member
+        with self.assertRaises(ValidationError):
+            project.save()
+        # the username and email are not checked again when the last login is saved
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=['last_login'])
+
+    def test_inserted_items_get_their_ids(self):
+        """Test that items inserted in bulk get the ids of their rows, even when the database does not return them."""
+        Task.objects.create(name='Before', start_date=self.day(0), end_date=self.day(1), status='1',
+                            project=self.project)
+        tasks = [Task(name='Task {}'.format(i), start_date=self.day(0), end_date=self.day(1), status='1',
+                      project=self.project) for i in range(3)]
+        with transaction.atomic():
+            bulk_create_in_project(Task, tasks, self.project.pk)
+        self.assertEqual([Task.objects.get(pk=task.pk).name for task in tasks], ['Task 0', 'Task 1', 'Task 2'])
@@ -0,0 +1,98 @@
+import numpy as np
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task
+from core.critical_path import critical_tasks, topological_order
+from core.viewGantt import generate_data
+
+User = get_user_model()
+
+class TestCriticalPath(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=60), owner=self.user)
+        # design -> build -> test drives the end, docs can slip by 10 days
+        self.design = self.task('Design', 0, 5)
+        self.build = self.task('Build', 5, 20)
+        self.test = self.task('Test', 20, 30)
+        self.docs = self.task('Docs', 5, 10)
+        self.build.predecessors.add(self.design)
+        self.test.predecessors.add(self.build)
+        self.docs.predecessors.add(self.design)
+
+    def task(self, name, start, end):
+        return Task.objects.create(name=name, start_date=self.day(start), end_date=self.day(end),
+                                   status='1', project=self.project)
+
+    def day(self, n):
+        return self.today + timezone.timedelta(days=n)
+
+    def test_critical_path(self):
+        """Test that the critical path is the chain of tasks driving the end of the project."""
+        self.assertEqual(critical_tasks(self.project.id), {self.design.id, self.build.id, self.test.id})
+
+    def test_gap_breaks_the_chain(self):
+        """Test that a task finishing before its successor has to start is not critical."""
+        self.design.end_date = self.day(3)
+        self.design.save()
+        self.assertEqual(critical_tasks(self.project.id), {self.build.id, self.test.id})
+
+    def test_late_predecessor_becomes_critical(self):
+        """Test that a dependency change invalidates the cached critical path."""
+        critical_tasks(self.project.id)
+        self.test.predecessors.add(self.docs)
+        self.docs.end_date = self.day(25)
+        self.docs.save()
+        self.assertEqual(critical_tasks(self.project.id), {self.design.id, self.docs.id, self.test.id})
+
+    def test_no_dependencies_no_critical_path(self):
+        """Test that a project without dependencies has no critical task."""
+        for task in (self.build, self.test, self.docs):
+            task.predecessors.clear()
+        self.assertEqual(critical_tasks(self.project.id), set())
+
+    def test_cycle_is_refused(self):
+        """Test that a dependency closing a cycle is refused, from either side of the relation."""
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.design.predecessors.add(self.test)
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.test.successors.add(self.design)
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.design.predecessors.add(self.design)
+        self.assertFalse(self.design.predecessors.exists())
+
+    def test_other_project_is_refused(self):
+        """Test that a task cannot depend on a task of another project."""
+        other = Project.objects.create(name='Other', start_date=self.today,
+                                       end_date=self.today + timezone.timedelta(days=60), owner=self.user)
+        task = Task.objects.create(name='Other', start_date=self.today, end_date=self.today,
+                                   status='1', project=other)
+        with self.assertRaises(ValidationError), transaction.atomic():
+            self.design.predecessors.add(task)
+
+    def test_critical_tasks_are_outlined(self):
+        """Test that the Gantt chart outlines the critical tasks."""
+        figure = generate_data(self.project.id, critical=critical_tasks(self.project.id))
+        widths = {row[0]: width for trace in figure.data
+                  for row, width in zip(trace.customdata, trace.marker.line.width)}
+        self.assertEqual(widths, {'Design': 3, 'Build': 3, 'Test': 3, 'Docs': 1})
+
+    def test_large_graph(self):
+        """Test the topological order of a random graph of 10k tasks and 50k dependencies."""
+        rng = np.random.default_rng(0)
+        sources = rng.integers(0, 10000, 50000)
+        targets = rng.integers(0, 10000, 50000)
+        keep = sources < targets
+        sources, targets = sources[keep], targets[keep]
+        order = topological_order(10000, sources, targets)
+        position = np.empty(10000, dtype=np.int64)
+        position[order] = np.arange(10000)
+        self.assertTrue((position[sources] < position[targets]).all())
+        self.assertIsNone(topological_order(10000, np.append(sources, targets[0]), np.append(targets, sources[0])))
@@ -0,0 +1,80 @@
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Resource
+
+User = get_user_model()
+
+class TestDataTables(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='password',
+                                              is_staff=True)
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='password')
+        self.projects = []
+        for i in range(12):
+            project = Project.objects.create(name='Project {:02d}'.format(i), start_date=self.today,
+                                             end_date=self.today + timezone.timedelta(days=i + 1), owner=self.staff)
+            self.projects.append(project)
+        self.projects[3].members.add(self.user)
+        self.projects[7].members.add(self.user)
+
+    def get(self, url, **params):
+        return self.client.get(url, dict({'draw': 1, 'start': 0, 'length': 5}, **params)).json()
+
+    def test_staff_page_is_ordered_in_sql(self):
+        """Test that staff get one page of every project, ordered on the requested column."""
+        self.client.force_login(self.staff)
+        response = self.get(reverse('project-list-data'), **{'order[0][column]': 2, 'order[0][dir]': 'desc'})
+        self.assertEqual(response['recordsTotal'], 12)
+        self.assertEqual(response['recordsFiltered'], 12)
+        self.assertEqual([row[0] for row in response['data']],
+                         ['Project 11', 'Project 10', 'Project 09', 'Project 08', 'Project 07'])
+        self.assertIn(self.projects[11].key, response['data'][0][7])
+
+    def test_search_filters_rows(self):
+        """Test that the search value filters the rows and the filtered count."""
+        self.client.force_login(self.staff)
+        response = self.get(reverse('project-list-data'), **{'search[value]': 'project 1'})
+        self.assertEqual(response['recordsFiltered'], 2)
+        self.assertEqual(response['recordsTotal'], 12)
+
+    def test_members_only_see_their_projects(self):
+        """Test that the endpoint keeps the visibility rules of the project list."""
+        self.client.force_login(self.user)
+        response = self.get(reverse('project-list-data'), **{'order[0][column]': 0})
+        self.assertEqual(response['recordsTotal'], 2)
+        self.assertEqual([row[0] for row in response['data']], ['Project 03', 'Project 07'])
+
+    def test_page_length_is_capped(self):
+        """Test that a client cannot ask for every row at once."""
+        self.client.force_login(self.staff)
+        with mock.patch('core.datatables.MAX_PAGE_LENGTH', 3):
+            response = self.get(reverse('project-list-data'), length=-1)
+        self.assertEqual(len(response['data']), 3)
+
+    def test_large_list_is_not_rendered(self):
+        """Test that the list page leaves the rows to the endpoint above the threshold."""
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('project-list'))
+        self.assertFalse(response.context['server_side'])
+        self.assertContains(response, 'Project 05')
+        with mock.patch('core.views.SERVER_SIDE_THRESHOLD', 10):
+            response = self.client.get(reverse('project-list'))
+        self.assertTrue(response.context['server_side'])
+        self.assertNotContains(response, 'Project 05')
+        self.assertContains(response, reverse('project-list-data'))
+
+    def test_resources_hidden_from_members(self):
+        """Test that members do not get the hidden resources of a project."""
+        project = self.projects[3]
+        Resource.objects.create(name='Visible', file='resources/visible.pdf', project=project)
+        Resource.objects.create(name='Hidden', file='resources/hidden.pdf', project=project, is_hidden=True)
+        url = reverse('project-resource-list-data', kwargs={'pk': project.pk})
+        self.client.force_login(self.user)
+        self.assertEqual([row[1] for row in self.get(url)['data']], ['.pdf'])
+        self.assertEqual(self.get(url)['recordsTotal'], 1)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.get(url)['recordsTotal'], 2)
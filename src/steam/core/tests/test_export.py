@@ -0,0 +1,83 @@
+import csv
+import io
+import json
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+from core.export import export_lines, export_rows, keyset_chunks
+from core.task_import import import_tasks
+
+User = get_user_model()
+
+class TestExport(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.member = User.objects.create_user(username='member', email='member@example.com', password='password')
+        self.staff = User.objects.create_user(username='staff', email='staff@example.com', password='password',
+                                              is_staff=True)
+        self.projects = []
+        for i in range(2):
+            project = Project.objects.create(name='Project {}'.format(i), start_date=self.today,
+                                             end_date=self.today + timezone.timedelta(days=30), owner=self.owner)
+            for j in range(3):
+                task = Task.objects.create(name='Task {} {}'.format(i, j), start_date=self.today,
+                                           end_date=self.today + timezone.timedelta(days=j), status='1',
+                                           project=project)
+                task.assignees.set([self.owner, self.member] if j else [])
+            Meeting.objects.create(name='Meeting {}'.format(i), start_date=self.today, project=project)
+            self.projects.append(project)
+        self.projects[0].members.add(self.member)
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_queries_per_chunk(self):
+        """Test that the rows are loaded in keyset chunks, with the assignees of each chunk in one query."""
+        with self.assertNumQueries(2):
+            chunks = list(keyset_chunks(Task.objects.all(), ('pk', 'name'), size=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 2])
+        # 3 full chunks of tasks with their assignees and an empty one, a full chunk of meetings and an empty one
+        with self.assertNumQueries(9):
+            rows = list(export_rows(size=2))
+        self.assertEqual([row['type'] for row in rows], ['task'] * 6 + ['meeting'] * 2)
+        self.assertEqual(rows[1]['assignees'], ['member', 'owner'])
+
+    def test_project_csv(self):
+        """Test that a member gets the items of their project as CSV, which keeps the import columns."""
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('project-export', kwargs={'pk': self.projects[0].pk, 'format': 'csv'}))
+        self.assertTrue(response.streaming)
+        self.assertIn(self.projects[0].key, response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual([row['name'] for row in rows], ['Task 0 0', 'Task 0 1', 'Task 0 2', 'Meeting 0'])
+        self.assertEqual(rows[2]['assignees'], 'member owner')
+        self.assertEqual(rows[2]['end_date'], (self.today + timezone.timedelta(days=2)).isoformat())
+        self.assertEqual(rows[3]['end_date'], '')
+        response = self.client.get(reverse('project-export', kwargs={'pk': self.projects[1].pk, 'format': 'csv'}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_all_projects_ndjson_for_staff(self):
+        """Test that only staff can export every project, as one JSON object per line."""
+        url = reverse('export-all', kwargs={'format': 'ndjson'})
+        self.client.force_login(self.member)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.staff)
+        lines = self.content(self.client.get(url)).splitlines()
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(json.loads(lines[0])['project'], self.projects[0].key)
+        self.assertEqual(self.client.get(reverse('export-all', kwargs={'format': 'xml'})).status_code, 404)
+
+    def test_project_csv_imported_again(self):
+        """Test that the tasks of the CSV export of a project can be imported, its meetings being skipped."""
+        content = ''.join(export_lines('csv', [self.projects[0].pk])).encode()
+        self.projects[1].members.add(self.member)
+        result = import_tasks(self.projects[1], io.BytesIO(content), 'export.csv')
+        self.assertEqual(result.errors, [])
+        self.assertEqual((result.rows, result.skipped, result.created), (4, 1, 3))
+        imported = list(Task.objects.filter(project=self.projects[1]).order_by('pk'))[3:]
+        self.assertEqual([task.name for task in imported], ['Task 0 0', 'Task 0 1', 'Task 0 2'])
+        self.assertEqual(sorted(imported[2].assignees.values_list('username', flat=True)), ['member', 'owner'])
+        self.assertEqual(Meeting.objects.filter(project=self.projects[1]).count(), 1)
@@ -0,0 +1,87 @@
+import json
+from django.test import TestCase
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+from core.bulk import shift_items, set_tasks_status, delete_items
+from core.tests.gantt_helpers import gantt_callback
+
+User = get_user_model()
+
+class TestGanttBulk(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        self.tasks = [Task.objects.create(name='Task {}'.format(i), start_date=self.day(i), end_date=self.day(i + 2),
+                                          status='1', project=self.project) for i in range(10)]
+        self.tasks[0].assignees.add(self.user)
+        self.meeting = Meeting.objects.create(name='Meeting', start_date=self.day(5), project=self.project)
+        self.task_ids = [task.id for task in self.tasks]
+
+    def day(self, n):
+        return self.today + timezone.timedelta(days=n)
+
+    def version(self):
+        return Project.objects.get(pk=self.project.pk).schedule_version
+
+    def test_shift_moves_every_item_at_once(self):
+        """Test that a shift moves the tasks and meetings with a constant number of queries and one version bump."""
+        version = self.version()
+        with self.assertNumQueries(7): # savepoint, bounds, task update, workload, meeting update, version, release
+            self.assertEqual(shift_items(self.project, self.task_ids, [self.meeting.id], 3), 11)
+        self.assertEqual(Task.objects.get(pk=self.tasks[9].pk).end_date, self.day(14))
+        self.assertEqual(Meeting.objects.get(pk=self.meeting.pk).start_date, self.day(8))
+        self.assertEqual(self.version(), version + 1)
+
+    def test_shift_outside_project_changes_nothing(self):
+        """Test that a shift moving a task out of the project dates is refused as a whole."""
+        version = self.version()
+        with self.assertRaises(ValidationError):
+            shift_items(self.project, self.task_ids, [self.meeting.id], -1)
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).start_date, self.day(0))
+        self.assertEqual(Meeting.objects.get(pk=self.meeting.pk).start_date, self.day(5))
+        self.assertEqual(self.version(), version)
+
+    def test_items_of_other_projects_are_left_alone(self):
+        """Test that ids of another project are ignored."""
+        other = Project.objects.create(name='Other', start_date=self.today,
+                                       end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        task = Task.objects.create(name='Other task', start_date=self.day(1), end_date=self.day(2),
+                                   status='1', project=other)
+        self.assertEqual(set_tasks_status(self.project, [task.id, self.tasks[0].id], '2'), 1)
+        self.assertEqual(Task.objects.get(pk=task.pk).status, '1')
+
+    def test_delete_bumps_version_once(self):
+        """Test that deleting many items bumps the schedule version once."""
+        version = self.version()
+        self.assertEqual(delete_items(self.project, self.task_ids, [self.meeting.id]), 11)
+        self.assertFalse(Task.objects.filter(project=self.project).exists())
+        self.assertEqual(self.version(), version + 1)
+
+    def selection(self, items):
+        return {'range': {'x': [], 'y': []},
+                'points': [{'customdata': [item.name, item.status, str(item.id)]} for item in items]}
+
+    def test_bulk_edit_from_chart(self):
+        """Test that the box selected items are moved and their status changed in one callback."""
+        values = {'id.value': self.project.id, 'graph.selectedData': self.selection(self.tasks[:3] + [self.meeting]),
+                  'bulk-shift.value': 2, 'bulk-status.value': 'Terminé', 'bulk-apply-button.n_clicks': 1}
+        response = json.loads(gantt_callback(self.client, values, 'bulk-apply-button.n_clicks').content)['response']
+        self.assertEqual(response['bulk-message']['children'], '4 élément(s) modifié(s).')
+        self.assertIsNone(response['graph']['selectedData'])
+        self.assertEqual(list(Task.objects.filter(status='3').order_by('id').values_list('start_date', flat=True)),
+                         [self.day(2), self.day(3), self.day(4)])
+
+    def test_bulk_edit_error_is_shown(self):
+        """Test that a refused bulk edit shows why and changes nothing."""
+        values = {'id.value': self.project.id, 'graph.selectedData': self.selection(self.tasks),
+                  'bulk-shift.value': 30, 'bulk-status.value': 'Terminé', 'bulk-apply-button.n_clicks': 1}
+        response = json.loads(gantt_callback(self.client, values, 'bulk-apply-button.n_clicks').content)['response']
+        self.assertIn('dates du projet', response['bulk-message']['children'])
+        self.assertFalse(Task.objects.filter(status='3').exists())
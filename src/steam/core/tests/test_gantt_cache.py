@@ -0,0 +1,96 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+from core.schedule import get_cached_figure, get_schedule_version, cache_stats, reset_cache_stats
+
+User = get_user_model()
+
+class TestGanttCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        self.task = Task.objects.create(name='Task 1', start_date=self.today, end_date=self.today,
+                                        status='1', project=self.project)
+        self.builds = []
+
+    def build(self, project_id):
+        self.builds.append(project_id)
+        return {'project': project_id, 'build': len(self.builds)}
+
+    def test_second_request_is_a_hit(self):
+        """Test that the figure is built only once while the schedule does not change."""
+        first = get_cached_figure(self.project.id, self.build)
+        second = get_cached_figure(self.project.id, self.build)
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.builds), 1)
+        self.assertEqual(cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_task_save_bumps_version(self):
+        """Test that saving a task invalidates the cached figure."""
+        version = get_schedule_version(self.project.id)
+        get_cached_figure(self.project.id, self.build)
+        self.task.name = 'Task 2'
+        self.task.save()
+        self.assertEqual(get_schedule_version(self.project.id), version + 1)
+        get_cached_figure(self.project.id, self.build)
+        self.assertEqual(len(self.builds), 2)
+
+    def test_meeting_save_and_delete_bump_version(self):
+        """Test that creating and deleting a meeting invalidates the cached figure."""
+        version = get_schedule_version(self.project.id)
+        meeting = Meeting.objects.create(name='Meeting', start_date=self.today, project=self.project)
+        self.assertEqual(get_schedule_version(self.project.id), version + 1)
+        meeting.delete()
+        self.assertEqual(get_schedule_version(self.project.id), version + 2)
+
+    def test_moved_task_bumps_both_versions(self):
+        """Test that moving a task to another project invalidates the figures of both projects."""
+        other = Project.objects.create(name='Other', start_date=self.today,
+                                       end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        versions = get_schedule_version(self.project.id), get_schedule_version(other.id)
+        task = Task.objects.get(pk=self.task.pk)
+        task.project = other
+        task.save()
+        self.assertEqual(get_schedule_version(self.project.id), versions[0] + 1)
+        self.assertEqual(get_schedule_version(other.id), versions[1] + 1)
+        # once saved, the task belongs to the other project only
+        task.name = 'Task 2'
+        task.save()
+        self.assertEqual(get_schedule_version(self.project.id), versions[0] + 1)
+
+    def test_stale_project_save_keeps_version(self):
+        """Test that saving a project loaded before a schedule change does not write its old version back."""
+        project = Project.objects.get(pk=self.project.pk)
+        version = project.schedule_version
+        self.task.name = 'Task 2'
+        self.task.save()
+        project.name = 'Renamed'
+        project.save()
+        self.assertEqual(get_schedule_version(self.project.id), version + 1)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).name, 'Renamed')
+
+    def test_projects_do_not_share_figures(self):
+        """Test that each project has its own cache entry."""
+        other = Project.objects.create(name='Other', start_date=self.today,
+                                       end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        self.assertEqual(get_cached_figure(self.project.id, self.build)['project'], self.project.id)
+        self.assertEqual(get_cached_figure(other.id, self.build)['project'], other.id)
+        self.assertEqual(cache_stats(), {'hits': 0, 'misses': 2})
+
+    def test_cache_stats_view_is_staff_only(self):
+        """Test that only staff can read the cache counters."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('gantt-cache-stats'))
+        self.assertEqual(response.status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('gantt-cache-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'hits': 0, 'misses': 0})
@@ -0,0 +1,76 @@
+import json
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task
+from core.tests.gantt_helpers import UPDATE_URL
+
+User = get_user_model()
+
+DEPENDENCIES_URL = '/django_plotly_dash/app/SteamGantt/_dash-dependencies'
+
+# Properties changed by the user on the Gantt page
+INTERACTIONS = ['graph.clickData', 'graph.relayoutData', 'update-item-button.n_clicks',
+                'delete-item-button.n_clicks', 'validate1-update-button.n_clicks',
+                'validate2-update-button.n_clicks', 'graph.selectedData', 'bulk-apply-button.n_clicks',
+                'bulk-delete-button.n_clicks']
+
+class TestGanttCallbacks(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        self.task = Task.objects.create(name='Task', description='Description', start_date=self.today,
+                                        end_date=self.today, status='1', project=self.project)
+        self.callbacks = json.loads(self.client.get(DEPENDENCIES_URL).content)
+
+    def outputs(self, callback):
+        return set(callback['output'].strip('.').split('...'))
+
+    def inputs(self, callback):
+        return {'{}.{}'.format(item['id'], item['property']) for item in callback['inputs']}
+
+    def server_requests(self, changed):
+        """Count the server callbacks the browser calls after a change, following chained callbacks."""
+        changed, fired, requests = {changed}, set(), 0
+        while True:
+            triggered = [i for i, callback in enumerate(self.callbacks)
+                         if i not in fired and self.inputs(callback) & changed]
+            if not triggered:
+                return requests
+            for i in triggered:
+                fired.add(i)
+                if not self.callbacks[i].get('clientside_function'):
+                    requests += 1
+                changed |= self.outputs(self.callbacks[i])
+
+    def test_one_request_per_interaction(self):
+        """Test that each interaction with the chart costs at most one callback request."""
+        for changed in INTERACTIONS:
+            with self.subTest(changed=changed):
+                self.assertLessEqual(self.server_requests(changed), 1)
+
+    def test_one_request_on_load(self):
+        """Test that opening the page calls a single server callback."""
+        initial = [callback for callback in self.callbacks
+                   if not callback.get('clientside_function') and not callback.get('prevent_initial_call')]
+        self.assertEqual(len(initial), 1)
+
+    def test_click_shows_item_in_one_response(self):
+        """Test that the item card comes back with the response to the click, without touching the figure."""
+        click = {'points': [{'customdata': [self.task.name, self.task.status, str(self.task.id)]}]}
+        callback = next(callback for callback in self.callbacks if 'graph.clickData' in self.inputs(callback)
+                        and not callback.get('clientside_function'))
+        values = {'graph.clickData': click, 'id.value': self.project.id}
+        body = {
+            'output': callback['output'],
+            'outputs': None,
+            'inputs': [dict(item, value=values.get('{id}.{property}'.format(**item))) for item in callback['inputs']],
+            'state': [dict(item, value=values.get('{id}.{property}'.format(**item))) for item in callback['state']],
+            'changedPropIds': ['graph.clickData'],
+        }
+        response = json.loads(self.client.post(UPDATE_URL, json.dumps(body), content_type='application/json').content)
+        self.assertEqual(list(response['response']), ['click-data'])
+        self.assertIn('Description', json.dumps(response['response']['click-data']['children']))
@@ -0,0 +1,73 @@
+import json
+import threading
+from django.test import TransactionTestCase, Client, override_settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task
+from core import viewGantt
+from core.tests.gantt_helpers import gantt_callback
+
+User = get_user_model()
+
+# Sessions in the cache so that concurrent requests do not write to the sqlite test database
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache')
+class TestGanttConcurrency(TransactionTestCase):
+    threads = 8
+    requests_per_thread = 10
+
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.projects = []
+        for i in range(4):
+            project = Project.objects.create(name='Project {}'.format(i), start_date=self.today,
+                                             end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+            for j in range(i + 1):
+                Task.objects.create(name='P{} task {}'.format(i, j), start_date=self.today,
+                                    end_date=self.today + timezone.timedelta(days=j), status='1', project=project)
+            self.projects.append(project)
+
+    def request_figure(self, client, project_id):
+        response = gantt_callback(client, {'id.value': project_id})
+        figure = json.loads(response.content)['response']['graph']['figure']
+        return {name for trace in figure['data'] for name in trace['text']}
+
+    def test_concurrent_projects_do_not_share_figures(self):
+        """Test that concurrent callbacks on different projects always get their own project's items."""
+        expected = {project.id: set(project.tasks.values_list('name', flat=True)) for project in self.projects}
+        errors = []
+
+        # django_plotly_dash records the app in the database on its first request
+        client = Client()
+        client.force_login(self.user)
+        self.request_figure(client, self.projects[0].id)
+
+        def worker(n):
+            client = Client()
+            client.force_login(self.user)
+            try:
+                for i in range(self.requests_per_thread):
+                    project = self.projects[(n + i) % len(self.projects)]
+                    names = self.request_figure(client, project.id)
+                    if names != expected[project.id]:
+                        errors.append((project.id, names))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+    def test_no_module_level_figure(self):
+        """Test that building a figure does not leave state in the Dash module."""
+        viewGantt.generate_data(self.projects[0].id)
+        self.assertFalse(hasattr(viewGantt, 'fig'))
@@ -0,0 +1,69 @@
+from django.test import TestCase
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+from core.gantt_data import load_schedule, get_item
+
+User = get_user_model()
+
+class TestGanttData(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+
+    def day(self, n):
+        return self.today + timezone.timedelta(days=n)
+
+    def test_empty_project(self):
+        """Test that a project without items gives an empty frame with the expected columns."""
+        df = load_schedule(self.project.id)
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), ['id', 'name', 'start_date', 'end_date', 'status', 'index'])
+
+    def test_meeting_lasts_one_day(self):
+        """Test that the end date of a meeting is the day after its start date."""
+        Meeting.objects.create(name='Meeting', start_date=self.day(3), project=self.project)
+        df = load_schedule(self.project.id)
+        self.assertEqual(df.end_date.iloc[0].date(), self.day(4))
+        self.assertEqual(df.status.iloc[0], 'Réunion')
+
+    def test_order_by_status_start_and_end_date(self):
+        """Test that items are sorted by status, then start date, then end date."""
+        Task.objects.create(name='Late', start_date=self.day(5), end_date=self.day(6), status='1', project=self.project)
+        Task.objects.create(name='Long', start_date=self.day(1), end_date=self.day(9), status='1', project=self.project)
+        Task.objects.create(name='Short', start_date=self.day(1), end_date=self.day(2), status='1', project=self.project)
+        Task.objects.create(name='Done', start_date=self.day(0), end_date=self.day(1), status='3', project=self.project)
+        Meeting.objects.create(name='Meeting', start_date=self.day(0), project=self.project)
+        df = load_schedule(self.project.id)
+        self.assertEqual(list(df.name), ['Short', 'Long', 'Late', 'Done', 'Meeting'])
+        self.assertEqual(list(df['index']), [0, 1, 2, 3, 4])
+
+    def test_only_project_items(self):
+        """Test that items of other projects are not loaded."""
+        other = Project.objects.create(name='Other', start_date=self.today, end_date=self.day(30), owner=self.user)
+        Task.objects.create(name='Mine', start_date=self.day(1), end_date=self.day(2), status='1', project=self.project)
+        Task.objects.create(name='Other', start_date=self.day(1), end_date=self.day(2), status='1', project=other)
+        df = load_schedule(self.project.id)
+        self.assertEqual(list(df.name), ['Mine'])
+
+    def test_get_item_task(self):
+        """Test that a task is found by id with its displayed fields."""
+        task = Task.objects.create(name='Task', description='Desc', start_date=self.day(1), end_date=self.day(2),
+                                   status='2', project=self.project)
+        with self.assertNumQueries(1):
+            item = get_item(self.project.id, '2', task.id)
+        self.assertEqual(item, {'name': 'Task', 'description': 'Desc', 'start_date': self.day(1),
+                                'end_date': self.day(2), 'status': '2'})
+
+    def test_get_item_meeting(self):
+        """Test that a meeting is looked up in the meeting table."""
+        meeting = Meeting.objects.create(name='Meeting', start_date=self.day(1), project=self.project)
+        self.assertEqual(get_item(self.project.id, 'Réunion', meeting.id)['name'], 'Meeting')
+
+    def test_get_item_scoped_to_project(self):
+        """Test that an item of another project is not returned."""
+        other = Project.objects.create(name='Other', start_date=self.today, end_date=self.day(30), owner=self.user)
+        task = Task.objects.create(name='Other', start_date=self.day(1), end_date=self.day(2), status='1', project=other)
+        self.assertIsNone(get_item(self.project.id, '1', task.id))
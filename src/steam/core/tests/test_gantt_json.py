@@ -0,0 +1,61 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+
+User = get_user_model()
+
+class TestGanttJson(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        self.task = Task.objects.create(name='Task', start_date=self.today + timezone.timedelta(days=2),
+                                        end_date=self.today + timezone.timedelta(days=3), status='1',
+                                        project=self.project)
+        self.meeting = Meeting.objects.create(name='Meeting', start_date=self.today, project=self.project)
+        self.url = reverse('project-gantt-json', kwargs={'pk': self.project.pk})
+        self.client.force_login(self.user)
+
+    def test_payload(self):
+        """Test that the payload lists the items column by column in chart order."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        items = response.json()['items']
+        self.assertEqual(items['id'], [self.task.id, self.meeting.id])
+        self.assertEqual(items['status'], ['1', 'Réunion'])
+        self.assertEqual(items['end_date'][1], (self.today + timezone.timedelta(days=1)).isoformat())
+        self.assertEqual(response.json()['statuses']['1']['label'], 'À commencer')
+
+    def test_not_modified(self):
+        """Test that sending the ETag back gets a 304 until the schedule or the project changes."""
+        etag = self.client.get(self.url)['ETag']
+        self.assertTrue(etag.startswith('"'))
+        with self.assertNumQueries(3): # session, user and project with the access
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.task.name = 'Renamed'
+        self.task.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items']['name'][0], 'Renamed')
+
+        etag = response['ETag']
+        self.project.name = 'Renamed project'
+        self.project.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_access(self):
+        """Test that only project members can read the timeline."""
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
@@ -0,0 +1,106 @@
+import json
+from django.test import TestCase
+from django.core.cache import cache
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+from core.tests.gantt_helpers import gantt_callback
+
+User = get_user_model()
+
+class TestGanttPatch(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        self.first = Task.objects.create(name='First', start_date=self.day(1), end_date=self.day(2),
+                                         status='1', project=self.project)
+        self.second = Task.objects.create(name='Second', start_date=self.day(5), end_date=self.day(6),
+                                          status='1', project=self.project)
+        self.meeting = Meeting.objects.create(name='Meeting', start_date=self.day(3), project=self.project)
+
+    def day(self, n):
+        return self.today + timezone.timedelta(days=n)
+
+    def dispatch(self, values, changed=None):
+        values = dict(values, **{'id.value': self.project.id})
+        response = gantt_callback(self.client, values, changed)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)['response']
+
+    def update_gantt(self, shown):
+        response = self.dispatch({'figure-version.data': shown})
+        return response['graph']['figure'], response['figure-version']['data']
+
+    def click(self, item, status):
+        return {'points': [{'customdata': [item.name, status, str(item.id)]}]}
+
+    def update_task(self, shown, task, name, start_date, end_date, status):
+        response = self.dispatch({'figure-version.data': shown,
+                                  'validate1-update-button.n_clicks': 1,
+                                  'input1.value': name,
+                                  'textarea1.value': '',
+                                  'startdate.value': start_date.isoformat(),
+                                  'enddate.value': end_date.isoformat(),
+                                  'statut-field1.value': status,
+                                  'graph.clickData': self.click(task, task.status)},
+                                 'validate1-update-button.n_clicks')
+        return response['graph']['figure'], response['figure-version']['data']
+
+    def delete_item(self, shown, item, status):
+        response = self.dispatch({'figure-version.data': shown,
+                                  'delete-item-button.n_clicks': 1,
+                                  'graph.clickData': self.click(item, status)},
+                                 'delete-item-button.n_clicks')
+        return response['graph']['figure'], response['figure-version']['data']
+
+    def is_patch(self, figure):
+        return '__dash_patch_update' in figure
+
+    def test_initial_load_sends_full_figure(self):
+        """Test that the first load sends the whole figure with its version, pan and zoom staying in the browser."""
+        figure, shown = self.update_gantt(None)
+        self.assertFalse(self.is_patch(figure))
+        self.assertEqual(shown, {'version': Project.objects.get(pk=self.project.pk).schedule_version, 'window': None,
+                                 'level': None, 'relayout': False})
+
+    def test_rename_and_move_in_place_sends_patch(self):
+        """Test that an edit keeping the bar at its place only patches that bar."""
+        _, shown = self.update_gantt(None)
+        figure, new_shown = self.update_task(shown, self.first, 'Renamed', self.day(1), self.day(4), 'À commencer')
+        self.assertTrue(self.is_patch(figure))
+        self.assertEqual(new_shown['version'], shown['version'] + 1)
+        locations = [operation['location'] for operation in figure['operations']]
+        self.assertTrue(all(location[:2] == ['data', 0] for location in locations))
+        values = [operation['params']['value'] for operation in figure['operations']]
+        self.assertIn('Renamed', values)
+
+    def test_status_change_sends_full_figure(self):
+        """Test that moving a task to another status rebuilds the figure."""
+        _, shown = self.update_gantt(None)
+        figure, _ = self.update_task(shown, self.first, 'First', self.day(1), self.day(2), 'Terminé')
+        self.assertFalse(self.is_patch(figure))
+
+    def test_reorder_sends_full_figure(self):
+        """Test that a date change moving the bar after another one rebuilds the figure."""
+        _, shown = self.update_gantt(None)
+        figure, _ = self.update_task(shown, self.first, 'First', self.day(7), self.day(8), 'À commencer')
+        self.assertFalse(self.is_patch(figure))
+
+    def test_stale_chart_sends_full_figure(self):
+        """Test that a chart older than the edited version is rebuilt."""
+        _, shown = self.update_gantt(None)
+        figure, _ = self.update_task(dict(shown, version=shown['version'] - 1), self.first, 'Renamed',
+                                     self.day(1), self.day(2), 'À commencer')
+        self.assertFalse(self.is_patch(figure))
+
+    def test_delete_sends_patch(self):
+        """Test that deleting an item removes its bar with a patch."""
+        _, shown = self.update_gantt(None)
+        figure, _ = self.delete_item(shown, self.meeting, 'Réunion')
+        self.assertTrue(self.is_patch(figure))
+        self.assertTrue(all(operation['operation'] == 'Delete' for operation in figure['operations']))
+        self.assertFalse(Meeting.objects.filter(pk=self.meeting.pk).exists())
@@ -0,0 +1,97 @@
+import json
+from datetime import date
+from unittest import mock
+import pandas as pd
+from django.test import TestCase
+from django.core.cache import cache
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+from core.gantt_data import load_rollup, rollup_level
+from core.tests.gantt_helpers import gantt_callback
+
+User = get_user_model()
+
+class TestGanttRollup(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.start = date(2023, 1, 2) # a monday
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(name='Project', start_date=self.start, end_date=date(2026, 6, 30),
+                                              owner=self.user)
+        # three tasks per week over a year, the last one of each week is done
+        for week in range(52):
+            for i in range(3):
+                Task.objects.create(name='Task {}-{}'.format(week, i), start_date=self.day(7 * week + i),
+                                    end_date=self.day(7 * week + i + 4), status='3' if i == 2 else '1',
+                                    project=self.project)
+        Meeting.objects.create(name='Meeting', start_date=self.day(3), project=self.project)
+
+    def day(self, n):
+        return self.start + timezone.timedelta(days=n)
+
+    def test_week_rollup_counts_and_spans(self):
+        """Test that a week rollup has one row per week and status with the span of its items."""
+        df = load_rollup(self.project.id, 'week')
+        self.assertEqual(len(df), 52 * 2 + 1)
+        first_week = df[(df.status == '1') & (df.start_date == str(self.start))].iloc[0]
+        self.assertEqual(first_week['end_date'], pd.Timestamp(self.day(5)))
+        self.assertTrue(first_week['name'].startswith('2 tâche(s)'))
+        meeting = df[df.status == 'Réunion'].iloc[0]
+        self.assertEqual(meeting['start_date'], pd.Timestamp(self.day(3)))
+        self.assertEqual(meeting['end_date'], pd.Timestamp(self.day(4)))
+        self.assertTrue((df.id == '').all())
+
+    def test_month_rollup(self):
+        """Test that a month rollup counts every task once."""
+        df = load_rollup(self.project.id, 'month')
+        counts = df[df.status != 'Réunion'].name.str.split(' ').str[0].astype(int)
+        self.assertEqual(counts.sum(), 52 * 3)
+
+    def test_level_follows_visible_range(self):
+        """Test that the level depends on the visible range, and only for large projects."""
+        with mock.patch('core.gantt_data.ROLLUP_THRESHOLD', 100):
+            self.assertIsNone(rollup_level(self.project.id, 0, (self.day(0), self.day(60))))
+            self.assertEqual(rollup_level(self.project.id, 0, (self.day(0), self.day(200))), 'day')
+            self.assertEqual(rollup_level(self.project.id, 0, (self.day(0), self.day(700))), 'week')
+            self.assertEqual(rollup_level(self.project.id, 0, (self.day(0), self.day(2000))), 'month')
+        self.assertIsNone(rollup_level(self.project.id, 1, (self.day(0), self.day(2000))))
+
+    def update_gantt(self, shown, relayout=None):
+        values = {'id.value': self.project.id, 'figure-version.data': shown, 'relayout.data': relayout}
+        return gantt_callback(self.client, values, 'relayout.data' if relayout else None)
+
+    def content(self, response):
+        content = json.loads(response.content)['response']
+        return content['graph']['figure'], content['figure-version']['data']
+
+    @mock.patch('core.gantt_data.ROLLUP_THRESHOLD', 100)
+    def test_zoom_switches_between_rollup_and_detail(self):
+        """Test that the chart opens zoomed out as a rollup and draws every bar when zoomed in."""
+        figure, shown = self.content(self.update_gantt(None))
+        self.assertEqual(shown['level'], 'month')
+        # pan and zoom are sent to the server
+        self.assertTrue(shown['relayout'])
+        self.assertLess(sum(len(trace['x']) for trace in figure['data']), 50)
+
+        # pan at the same level: nothing to send
+        response = self.update_gantt(shown, {'xaxis.range[0]': '2023-06-01', 'xaxis.range[1]': '2026-06-01'})
+        self.assertEqual(response.status_code, 204)
+
+        figure, shown = self.content(self.update_gantt(shown, {'xaxis.range[0]': '2023-01-01',
+                                                               'xaxis.range[1]': '2023-02-01'}))
+        self.assertIsNone(shown['level'])
+        self.assertEqual(sum(len(trace['x']) for trace in figure['data']), 52 * 3 + 1)
+
+        _, shown = self.content(self.update_gantt(shown, {'xaxis.autorange': True}))
+        self.assertEqual(shown['level'], 'month')
+
+    @mock.patch('core.gantt_data.ROLLUP_THRESHOLD', 100)
+    def test_click_on_rollup_is_ignored(self):
+        """Test that update and delete do nothing on a rollup bar."""
+        click = {'points': [{'customdata': ['3 tâche(s) (01/2023)', '1', '']}]}
+        for button in ('update-item-button.n_clicks', 'delete-item-button.n_clicks'):
+            values = {'id.value': self.project.id, 'graph.clickData': click, button: 1}
+            self.assertEqual(gantt_callback(self.client, values, button).status_code, 204)
+        self.assertEqual(Task.objects.count(), 52 * 3)
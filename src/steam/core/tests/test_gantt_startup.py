@@ -0,0 +1,36 @@
+import subprocess
+import sys
+from django.conf import settings
+from django.test import TestCase
+from core.dash_apps import load_stateless_app
+
+# Loads the URLconf in a fresh interpreter and lists the heavy modules it imported
+IMPORTED_MODULES_SCRIPT = '''
+import os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'steam.settings')
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(','.join(m for m in ('pandas', 'numpy', 'plotly.express', 'core.viewGantt') if m in sys.modules))
+'''
+
+class TestGanttStartup(TestCase):
+
+    def test_urls_do_not_import_dash_app(self):
+        """Test that loading the URLconf imports neither the Gantt app nor pandas, numpy or plotly.express."""
+        result = subprocess.run([sys.executable, '-c', IMPORTED_MODULES_SCRIPT],
+                                cwd=settings.BASE_DIR, check=True, capture_output=True, text=True)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_loader_returns_gantt_app(self):
+        """Test that the stateless loader imports the Gantt app on demand."""
+        app = load_stateless_app('SteamGantt')
+        self.assertEqual(app._uid, 'SteamGantt')
+        self.assertIsNone(load_stateless_app('Unknown'))
+
+    def test_layout_is_served_lazily(self):
+        """Test that the Dash layout is served without querying the database for a figure."""
+        response = self.client.get('/django_plotly_dash/app/SteamGantt/_dash-layout')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '"id": "graph"')
@@ -0,0 +1,54 @@
+from xml.etree import ElementTree
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+
+User = get_user_model()
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+class TestGanttSvg(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=30), owner=self.user)
+        self.task = Task.objects.create(name='Task <1>', start_date=self.today,
+                                        end_date=self.today + timezone.timedelta(days=3), status='2',
+                                        project=self.project)
+        Meeting.objects.create(name='Meeting', start_date=self.today + timezone.timedelta(days=1),
+                               project=self.project)
+        self.url = reverse('project-task-svg', kwargs={'pk': self.project.pk})
+
+    def bars(self, response):
+        root = ElementTree.fromstring(response.content)
+        return [(group.find(SVG + 'text').text, group.find(SVG + 'rect').get('fill'))
+                for group in root.iter(SVG + 'g')]
+
+    def test_svg_has_a_bar_per_item(self):
+        """Test that the SVG is valid and draws each item with the colour of its status."""
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertEqual(self.bars(response), [('Task <1>', '#FD8A17'), ('Meeting', '#636EFA')])
+
+    def test_svg_is_cached_per_version(self):
+        """Test that the SVG is rendered once per schedule version."""
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        with self.assertNumQueries(3): # session, user and project with the access
+            self.client.get(self.url)
+        self.task.name = 'Renamed'
+        self.task.save()
+        self.assertEqual(self.bars(self.client.get(self.url))[0][0], 'Renamed')
+
+    def test_svg_needs_access(self):
+        """Test that a user outside of the project is redirected."""
+        self.client.force_login(self.other)
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('project-list'), fetch_redirect_response=False)
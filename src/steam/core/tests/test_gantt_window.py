@@ -0,0 +1,89 @@
+import json
+from datetime import date
+from unittest import mock
+from django.test import TestCase
+from django.core.cache import cache
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task, Meeting
+from core.gantt_data import load_schedule, window_for, visible_range, is_windowed, WINDOW_STEP
+from core.tests.gantt_helpers import gantt_callback
+
+User = get_user_model()
+
+class TestGanttWindow(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.start = date(2023, 1, 1)
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.client.force_login(self.user)
+        self.project = Project.objects.create(name='Project', start_date=self.start, end_date=date(2024, 12, 31),
+                                              owner=self.user)
+        # one task per fortnight over two years
+        for i in range(52):
+            start_date = self.day(14 * i)
+            Task.objects.create(name='Task {}'.format(i), start_date=start_date, end_date=self.day(14 * i + 3),
+                                status='1', project=self.project)
+        Meeting.objects.create(name='Meeting', start_date=self.day(100), project=self.project)
+
+    def day(self, n):
+        return self.start + timezone.timedelta(days=n)
+
+    def test_window_loads_overlapping_items_only(self):
+        """Test that only the items overlapping the window are loaded."""
+        df = load_schedule(self.project.id, (self.day(15), self.day(30)))
+        self.assertEqual(sorted(df.name), ['Task 1', 'Task 2'])
+
+    def test_window_loads_meeting_ending_in_it(self):
+        """Test that a meeting lasting into the window is loaded."""
+        df = load_schedule(self.project.id, (self.day(101), self.day(102)))
+        self.assertIn('Meeting', list(df.name))
+
+    def test_window_for_pads_and_aligns(self):
+        """Test that a window covers the visible range on each side and is aligned."""
+        first, last = window_for(self.day(40), self.day(49))
+        self.assertLessEqual(first, self.day(30))
+        self.assertGreaterEqual(last, self.day(59))
+        self.assertEqual(first.toordinal() % WINDOW_STEP, 0)
+        self.assertEqual((last.toordinal() + 1) % WINDOW_STEP, 0)
+        self.assertEqual(window_for(self.day(41), self.day(50)), (first, last))
+
+    def test_visible_range(self):
+        """Test that the x range is read from the two relayoutData formats."""
+        self.assertEqual(visible_range({'xaxis.range[0]': '2023-02-01 12:00', 'xaxis.range[1]': '2023-03-01'}),
+                         (date(2023, 2, 1), date(2023, 3, 1)))
+        self.assertEqual(visible_range({'xaxis.range': ['2023-02-01', '2023-03-01']}),
+                         (date(2023, 2, 1), date(2023, 3, 1)))
+        self.assertIsNone(visible_range({'autosize': True}))
+
+    def test_is_windowed_threshold(self):
+        """Test that only projects above the threshold are windowed."""
+        self.assertFalse(is_windowed(self.project.id, 0))
+        with mock.patch('core.gantt_data.WINDOW_THRESHOLD', 10):
+            self.assertTrue(is_windowed(self.project.id, 1))
+
+    def update_gantt(self, shown, relayout=None):
+        values = {'id.value': self.project.id, 'figure-version.data': shown, 'relayout.data': relayout}
+        return gantt_callback(self.client, values, 'relayout.data' if relayout else None)
+
+    def shown_names(self, response):
+        figure = json.loads(response.content)['response']['graph']['figure']
+        return {name for trace in figure['data'] for name in trace['text']}
+
+    @mock.patch('core.gantt_data.WINDOW_THRESHOLD', 10)
+    def test_pan_fetches_next_window(self):
+        """Test that a windowed chart loads a part of the project and the next window on pan."""
+        response = self.update_gantt(None)
+        shown = json.loads(response.content)['response']['figure-version']['data']
+        self.assertIsNotNone(shown['window'])
+        self.assertLess(len(self.shown_names(response)), 52)
+
+        # zoom inside the loaded window: nothing to send
+        first, last = (date.fromisoformat(day) for day in shown['window'])
+        response = self.update_gantt(shown, {'xaxis.range[0]': str(first), 'xaxis.range[1]': str(last)})
+        self.assertEqual(response.status_code, 204)
+
+        # the project is over, the chart opens at its end: pan to its start
+        response = self.update_gantt(shown, {'xaxis.range[0]': '2023-01-01', 'xaxis.range[1]': '2023-02-01'})
+        self.assertIn('Task 0', self.shown_names(response))
+        self.assertNotIn('Task 51', self.shown_names(response))
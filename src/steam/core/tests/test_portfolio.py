@@ -0,0 +1,64 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task
+from core.portfolio import get_cached_portfolio, load_portfolio, portfolio_rows
+
+User = get_user_model()
+
+class TestPortfolio(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.projects = []
+        for i in range(3):
+            project = Project.objects.create(name='Project {}'.format(i), start_date=self.day(0),
+                                             end_date=self.day(60), owner=self.user)
+            for j in range(i):
+                Task.objects.create(name='Task {}'.format(j), start_date=self.day(10 + j), end_date=self.day(20 + j),
+                                    status=str(j % 3 + 1), project=project)
+            self.projects.append(project)
+
+    def day(self, n):
+        return self.today + timezone.timedelta(days=n)
+
+    def test_one_aggregate_query(self):
+        """Test that the dates and status counts of every project come from one query."""
+        with self.assertNumQueries(1):
+            projects = load_portfolio()
+        by_id = {project['id']: project for project in projects}
+        last = by_id[self.projects[2].id]
+        self.assertEqual((last['first'], last['last']), (self.day(10), self.day(21)))
+        self.assertEqual((last['status_1'], last['status_2'], last['status_3']), (1, 1, 0))
+        self.assertIsNone(by_id[self.projects[0].id]['first'])
+
+    def test_cached_until_a_schedule_changes(self):
+        """Test that the portfolio is only queried again when a task changes."""
+        get_cached_portfolio()
+        with self.assertNumQueries(1):
+            get_cached_portfolio()
+        Task.objects.create(name='New', start_date=self.day(1), end_date=self.day(2), status='3',
+                            project=self.projects[0])
+        project = next(p for p in get_cached_portfolio() if p['id'] == self.projects[0].id)
+        self.assertEqual(project['status_3'], 1)
+
+    def test_project_without_tasks_spans_its_dates(self):
+        """Test that a project without tasks is drawn over its own dates, from the start of the range."""
+        timeline, rows = portfolio_rows(load_portfolio())
+        self.assertEqual(timeline['first'], self.day(0))
+        empty = next(row for row in rows if row['id'] == self.projects[0].id)
+        self.assertEqual((empty['left'], empty['width'], empty['segments']), (0, 100, []))
+
+    def test_view_is_staff_only(self):
+        """Test that only staff can open the portfolio."""
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('portfolio')).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('portfolio'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['rows']), 3)
+        self.assertContains(response, reverse('project-gantt-json', kwargs={'pk': self.projects[1].id}))
@@ -0,0 +1,57 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task
+
+User = get_user_model()
+
+class TestProjectListQuery(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.user = User.objects.create_user(username='user', email='user@example.com', password='password')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='password')
+        self.projects = []
+        for i in range(5):
+            project = Project.objects.create(name='Project {}'.format(i), start_date=self.day(-10),
+                                             end_date=self.day(30), owner=self.owner)
+            project.members.add(self.user, self.other)
+            self.projects.append(project)
+        for status, end in (('1', 5), ('2', 3), ('3', 1), ('3', 2), ('1', -2)):
+            Task.objects.create(name='Task', start_date=self.day(-5), end_date=self.day(end), status=status,
+                                project=self.projects[0])
+
+    def day(self, n):
+        return self.today + timezone.timedelta(days=n)
+
+    def test_list_in_constant_queries(self):
+        """Test that the projects, their owner and their progress are loaded without a query per row."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('project-list'))
+        # session, user, count and list, the visible projects are cached
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('project-list'))
+        self.assertEqual(len(response.context['projects']), 5)
+
+    def test_progress_annotations(self):
+        """Test that each project carries its task counts per status and its next deadline."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('project-list'))
+        project = next(p for p in response.context['projects'] if p.pk == self.projects[0].pk)
+        self.assertEqual((project.tasks_total, project.tasks_todo, project.tasks_doing, project.tasks_done),
+                         (5, 2, 1, 2))
+        # finished and overdue tasks are not upcoming deadlines
+        self.assertEqual(project.next_deadline, self.day(3))
+        self.assertContains(response, '2/5')
+
+    def test_members_see_each_project_once(self):
+        """Test that a project with several members is listed once, without DISTINCT."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('project-list'))
+        self.assertEqual(sorted(p.pk for p in response.context['projects']), [p.pk for p in self.projects])
+        outsider = User.objects.create_user(username='outsider', email='outsider@example.com', password='password')
+        self.client.force_login(outsider)
+        self.assertEqual(len(self.client.get(reverse('project-list')).context['projects']), 0)
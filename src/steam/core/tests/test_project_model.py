@@ -1,3 +1,4 @@
+from unittest import mock
 from django.test import TestCase
 from core.models import Project
 from django.core.exceptions import ValidationError
@@ -144,3 +145,35 @@ class TestProjectModel(TestCase):
         # Try to save the second project and expect a Validation error
         with self.assertRaises(ValidationError):
             second_project.save()
+
+    def new_project(self, name='Project'):
+        return Project(name=name, start_date=self.today, end_date=self.today + timezone.timedelta(days=14),
+                       owner=self.users[0])
+
+    def test_generated_key_is_not_looked_up(self):
+        """Test that generating a key does not query the database."""
+        with self.assertNumQueries(0):
+            key = Project.generate_key()
+        self.assertEqual(len(key), 5)
+
+    def test_taken_generated_key_is_drawn_again(self):
+        """Test that a project whose generated key is already taken gets another one when saved."""
+        first_project = self.new_project()
+        first_project.save()
+        keys = iter([first_project.key, 'OTHER'])
+        with mock.patch.object(Project, 'generate_key', side_effect=lambda: next(keys)):
+            second_project = self.new_project()
+            second_project.save()
+        self.assertEqual(second_project.key, 'OTHER')
+        self.assertEqual(Project.objects.count(), 2)
+
+    def test_bulk_create_with_keys(self):
+        """Test that projects created in bulk get distinct keys, drawn again if one is taken."""
+        first_project = self.new_project()
+        first_project.save()
+        draws = iter([[first_project.key, 'AAAAA'], ['BBBBB', 'CCCCC']])
+        with mock.patch.object(Project, 'generate_keys', side_effect=lambda count: next(draws)):
+            projects = Project.bulk_create_with_keys([self.new_project('A'), self.new_project('B')])
+        self.assertEqual([project.key for project in projects], ['BBBBB', 'CCCCC'])
+        self.assertEqual(Project.objects.count(), 3)
+        self.assertEqual(len(set(Project.generate_keys(1000))), 1000)
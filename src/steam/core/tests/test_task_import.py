@@ -0,0 +1,113 @@
+import io
+import os
+import tempfile
+from importlib.util import find_spec
+from unittest import mock, skipUnless
+from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task
+from core.task_import import import_tasks
+
+User = get_user_model()
+
+class TestTaskImport(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.member = User.objects.create_user(username='member', email='member@example.com', password='password')
+        self.outsider = User.objects.create_user(username='outsider', email='outsider@example.com',
+                                                 password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.day(0), end_date=self.day(30),
+                                              owner=self.owner)
+        self.project.members.add(self.member)
+
+    def day(self, n):
+        return (self.today + timezone.timedelta(days=n)).isoformat()
+
+    def csv(self, *rows, header='name;start_date;end_date;status;assignees'):
+        return io.BytesIO('\n'.join((header,) + rows).encode())
+
+    def test_rows_imported_in_chunks(self):
+        """Test that the rows are inserted chunk by chunk with their assignees."""
+        rows = ['Task {};{};{};2;owner member'.format(i, self.day(1), self.day(2)) for i in range(5)]
+        rows.append('Last;{};{};Terminé;'.format(self.day(3), self.day(4)))
+        with mock.patch('core.task_import.CHUNK_SIZE', 4):
+            result = import_tasks(self.project, self.csv(*rows), 'tasks.csv')
+        self.assertEqual((result.rows, result.created, result.errors), (6, 6, []))
+        tasks = Task.objects.filter(project=self.project).order_by('pk')
+        self.assertEqual([task.name for task in tasks], ['Task {}'.format(i) for i in range(5)] + ['Last'])
+        self.assertEqual(tasks[4].status, '2')
+        self.assertEqual(set(tasks[4].assignees.values_list('username', flat=True)), {'owner', 'member'})
+        self.assertEqual(tasks[5].status, '3')
+        self.assertFalse(tasks[5].assignees.exists())
+
+    def test_every_invalid_row_is_reported(self):
+        """Test that each invalid row is reported with its line and that nothing is imported."""
+        rows = [
+            'Valid;{};{};1;member'.format(self.day(1), self.day(2)),
+            'Late;{};{};1;'.format(self.day(1), self.day(40)),
+            'Reversed;{};{};1;'.format(self.day(5), self.day(2)),
+            'Bad date;tomorrow;{};1;'.format(self.day(2)),
+            'Status;{};{};9;'.format(self.day(1), self.day(2)),
+            'Outsider;{};{};1;outsider'.format(self.day(1), self.day(2)),
+        ]
+        result = import_tasks(self.project, self.csv(*rows), 'tasks.csv')
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5, 6, 7])
+        self.assertIn('outsider', result.errors[-1][1])
+        self.assertEqual(result.created, 0)
+        self.assertFalse(Task.objects.exists())
+
+    def test_view_reports_errors_and_imports(self):
+        """Test that a member can upload a file and gets the errors of the invalid rows."""
+        url = reverse('task-import', kwargs={'pk': self.project.pk})
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.member)
+        upload = SimpleUploadedFile('tasks.csv', self.csv('x;{};{};1;'.format(self.day(1), self.day(2))).read())
+        response = self.client.post(url, {'file': upload})
+        self.assertContains(response, 'Le nom doit compter au moins deux caractères.')
+        upload = SimpleUploadedFile('tasks.csv', self.csv('Task,{},{}'.format(self.day(1), self.day(2)),
+                                                          header='name,start_date,end_date').read())
+        response = self.client.post(url, {'file': upload})
+        self.assertRedirects(response, reverse('project-task-list', kwargs={'pk': self.project.pk}),
+                             fetch_redirect_response=False)
+        self.assertEqual(Task.objects.get().name, 'Task')
+        upload = SimpleUploadedFile('tasks.txt', b'name')
+        self.assertContains(self.client.post(url, {'file': upload}), 'Seuls les fichiers .csv et .xlsx')
+
+    def test_command(self):
+        """Test that the command checks the file with --dry-run and fails on invalid rows."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.csv')
+            with open(path, 'wb') as f:
+                f.write(self.csv('Task;{};{};1;'.format(self.day(1), self.day(2))).read())
+            out = io.StringIO()
+            call_command('import_tasks', self.project.pk, path, dry_run=True, stdout=out)
+            self.assertIn('1 rows checked', out.getvalue())
+            self.assertFalse(Task.objects.exists())
+            call_command('import_tasks', self.project.pk, path, stdout=out)
+            self.assertEqual(Task.objects.count(), 1)
+            with self.assertRaises(CommandError):
+                call_command('import_tasks', self.project.pk + 1, path)
+
+    @skipUnless(find_spec('openpyxl'), 'openpyxl is not installed')
+    def test_xlsx_rows_imported(self):
+        """Test that the first sheet of an XLSX file is imported, with dates given as dates."""
+        from openpyxl import Workbook
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['name', 'start_date', 'end_date', 'assignees'])
+        start = self.project.start_date
+        sheet.append(['Task', start, start + timezone.timedelta(days=3), 'member'])
+        sheet.append(['Text dates', self.day(1), self.day(2), None])
+        file = io.BytesIO()
+        workbook.save(file)
+        file.seek(0)
+        result = import_tasks(self.project, file, 'tasks.xlsx')
+        self.assertEqual((result.created, result.errors), (2, []))
+        self.assertEqual(Task.objects.get(name='Task').assignees.get(), self.member)
@@ -0,0 +1,121 @@
+from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from core.models import Project, Task
+from core.bulk import shift_items, delete_items
+from core.workload import get_loads, workload_matrix
+
+User = get_user_model()
+
+class TestWorkload(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='owner', email='owner@example.com', password='password')
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='password')
+        self.project = Project.objects.create(name='Project', start_date=self.today,
+                                              end_date=self.today + timezone.timedelta(days=60), owner=self.user)
+        self.first = self.task('First', 0, 4, self.user)
+        self.second = self.task('Second', 2, 6, self.user, self.other)
+
+    def day(self, n):
+        return self.today + timezone.timedelta(days=n)
+
+    def task(self, name, start, end, *assignees):
+        task = Task.objects.create(name=name, start_date=self.day(start), end_date=self.day(end),
+                                   status='1', project=self.project)
+        task.assignees.add(*assignees)
+        return task
+
+    def loads(self, user, days=8):
+        return workload_matrix([user.pk], self.day(0), self.day(days - 1))[1][0].tolist()
+
+    def test_concurrent_tasks_per_day(self):
+        """Test that the load of a day is the number of tasks assigned that day, end date included."""
+        self.assertEqual(self.loads(self.user), [1, 1, 2, 2, 2, 1, 1, 0])
+        self.assertEqual(self.loads(self.other), [0, 0, 1, 1, 1, 1, 1, 0])
+
+    def test_weekly_load_is_the_peak_of_the_week(self):
+        """Test that the weekly load is the highest daily load of the week, weeks starting on Monday."""
+        monday = self.today - timezone.timedelta(days=self.today.weekday())
+        days, matrix = workload_matrix([self.user.pk], monday, monday + timezone.timedelta(days=20), 'week')
+        self.assertEqual(days, [monday + timezone.timedelta(days=7 * n) for n in range(3)])
+        self.assertEqual(max(matrix[0].tolist()), 2)
+
+    def test_second_read_is_cached(self):
+        """Test that the loads are read from the cache while no task changes."""
+        get_loads([self.user.pk, self.other.pk])
+        with self.assertNumQueries(1):
+            get_loads([self.user.pk, self.other.pk])
+
+    def test_date_change_refreshes_assignees_only(self):
+        """Test that moving a task refreshes the workload of its assignees and not of the others."""
+        third = self.task('Third', 10, 12, self.other)
+        get_loads([self.user.pk, self.other.pk])
+        self.first.end_date = self.day(8)
+        self.first.save()
+        # one query for the versions and one for the user whose task moved
+        with self.assertNumQueries(2):
+            loads = get_loads([self.user.pk, self.other.pk])
+        self.assertEqual(len(loads[self.user.pk][1]), 9)
+        third.delete()
+        self.assertEqual(self.loads(self.other, 14)[10:], [0, 0, 0, 0])
+
+    def test_assignee_change_refreshes_workload(self):
+        """Test that adding and removing an assignee changes their workload."""
+        self.loads(self.other)
+        self.first.assignees.add(self.other)
+        self.assertEqual(self.loads(self.other), [1, 1, 2, 2, 2, 1, 1, 0])
+        self.first.assignees.remove(self.other)
+        self.assertEqual(self.loads(self.other), [0, 0, 1, 1, 1, 1, 1, 0])
+        self.other.tasks.clear()
+        self.assertEqual(self.loads(self.other), [0] * 8)
+
+    def test_bulk_shift_refreshes_workload(self):
+        """Test that shifting tasks in bulk refreshes the workload of their assignees."""
+        self.loads(self.other)
+        shift_items(self.project, [self.second.pk], [], 1)
+        self.assertEqual(self.loads(self.other), [0, 0, 0, 1, 1, 1, 1, 1])
+
+    def test_stale_user_save_keeps_workload_version(self):
+        """Test that saving a user loaded before a task change does not write their old workload version back."""
+        other = User.objects.get(pk=self.other.pk)
+        self.loads(self.other)
+        self.second.assignees.remove(self.other)
+        other.first_name = 'Renamed'
+        other.save()
+        self.assertEqual(self.loads(self.other), [0] * 8)
+
+    def test_deletions_refresh_workload_once(self):
+        """Test that deleting tasks in bulk or with their project invalidates the workload with constant queries."""
+        tasks = [self.task('Task {}'.format(i), 0, 1, self.other) for i in range(20)]
+        self.loads(self.other)
+        with self.assertNumQueries(8):
+            delete_items(self.project, [task.pk for task in tasks], [])
+        self.assertEqual(self.loads(self.other), [0, 0, 1, 1, 1, 1, 1, 0])
+        for i in range(20):
+            self.task('Task {}'.format(i), 0, 1, self.other)
+        project = Project.objects.get(pk=self.project.pk)
+        with self.assertNumQueries(14):
+            project.delete()
+        self.assertEqual(self.loads(self.other), [0] * 8)
+
+    def test_view_shows_shared_project_users(self):
+        """Test that a user sees their workload and the one of the people sharing a project with them."""
+        outsider = User.objects.create_user(username='outsider', email='outsider@example.com', password='password')
+        self.project.members.add(self.other)
+        self.client.force_login(self.other)
+        response = self.client.get(reverse('workload'))
+        self.assertEqual(response.status_code, 200)
+        usernames = [username for username, _ in response.context['rows']]
+        self.assertEqual(usernames, ['other', 'owner'])
+        self.assertNotIn(outsider.username, usernames)
+
+    def test_view_per_week_for_long_ranges(self):
+        """Test that a long range is shown per week."""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('workload'), {'start': self.today.isoformat(), 'days': 365})
+        self.assertEqual(response.context['step'], 'week')
+        self.assertEqual(len(response.context['columns']), 53)
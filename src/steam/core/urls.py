@@ -1,6 +1,5 @@
 from django.urls import path
-from . import viewGantt
-from .views import MeetingCreate, MeetingUpdate, MeetingDeleteView, ProjectListView, ProjectDetailView, ProjectCreateView, ProjectRegisterView, ProjectUpdateView, ProjectDeleteView, TaskDetail, TaskCreate, TaskUpdate, TaskDeleteView, ResourceDetailView, ResourceCreateView, ResourceUpdateView, ResourceDeleteView, ResourceListView, loginPage, logoutUser, registerPage
+from .views import gantt, gantt_svg, gantt_json, project_export, export_all, workload, GanttCacheStatsView, PortfolioView, MeetingCreate, MeetingUpdate, MeetingDeleteView, ProjectListView, ProjectListDataView, ProjectDetailView, ProjectCreateView, ProjectRegisterView, ProjectUpdateView, ProjectDeleteView, TaskDetail, TaskCreate, TaskImportView, TaskUpdate, TaskDeleteView, ResourceDetailView, ResourceCreateView, ResourceUpdateView, ResourceDeleteView, ResourceListView, ResourceListDataView, loginPage, logoutUser, registerPage
 
 
 urlpatterns = [
@@ -8,6 +7,7 @@ urlpatterns = [
     path('logout/', logoutUser, name="logout"),
     path('register/', registerPage, name="register"),
     path('projects/', ProjectListView.as_view(), name='project-list'),
+    path('projects/data/', ProjectListDataView.as_view(), name='project-list-data'),
     path('project/<int:pk>/', ProjectDetailView.as_view(), name='project-detail'),
     path('project/create/', ProjectCreateView.as_view(), name='project-create'),
     path('project/<int:pk>/update/',
@@ -17,6 +17,8 @@ urlpatterns = [
     path('project/register/', ProjectRegisterView.as_view(), name='project-register'),
     path('project/<int:pk>/resources/',
          ResourceListView.as_view(), name='project-resource-list'),
+    path('project/<int:pk>/resources/data/',
+         ResourceListDataView.as_view(), name='project-resource-list-data'),
     path('project/<int:pk>/resource/create/',
          ResourceCreateView.as_view(), name='resource-create'),
     path('resource/<int:pk>/', ResourceDetailView.as_view(), name='resource-detail'),
@@ -26,10 +28,18 @@ urlpatterns = [
          ResourceDeleteView.as_view(), name='resource-delete'),
     path('project/register/', ProjectRegisterView.as_view(),
          name='project-register'),
-    path('project/<int:pk>/tasks/', viewGantt.gantt, name='project-task-list'),
+    path('project/<int:pk>/tasks/', gantt, name='project-task-list'),
+    path('project/<int:pk>/tasks/gantt.svg', gantt_svg, name='project-task-svg'),
+    path('project/<int:pk>/gantt.json', gantt_json, name='project-gantt-json'),
+    path('project/<int:pk>/export.<str:format>', project_export, name='project-export'),
+    path('projects/export.<str:format>', export_all, name='export-all'),
+    path('portfolio/', PortfolioView.as_view(), name='portfolio'),
+    path('workload/', workload, name='workload'),
+    path('gantt/cache-stats/', GanttCacheStatsView.as_view(), name='gantt-cache-stats'),
     path('task/<int:pk>/', TaskDetail.as_view(), name='task'),
     path('task/createM/<int:pk>', MeetingCreate.as_view(), name='meeting-create'),
     path('task/create/<int:pk>', TaskCreate.as_view(), name='task-create'),
+    path('project/<int:pk>/tasks/import/', TaskImportView.as_view(), name='task-import'),
     path('task/<int:pk>/update/', TaskUpdate.as_view(), name='task-update'),
     path('task/<int:pk>/updateM/', MeetingUpdate.as_view(), name='meeting-update'),
     path('task/<int:pk>/delete/', TaskDeleteView.as_view(), name='task-delete'),
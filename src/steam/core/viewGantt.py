@@ -1,15 +1,26 @@
-from django.shortcuts import render, get_object_or_404, redirect
 from dash import dcc, html
 import plotly.express as px
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
+from dash import Patch, no_update
+from dash.exceptions import PreventUpdate
 import pandas as pd
 from textwrap import wrap
-from .models import Task, Meeting, Project
+import json
+from .models import Project, Task, Meeting
+from .bulk import shift_items, set_tasks_status, delete_items
+from .critical_path import critical_tasks
+from .access import project_role
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.core.cache import cache
+from .schedule import get_cached_figure, get_schedule_version, figure_cache_key
+from .gantt_data import load_schedule, load_rollup, get_item, is_windowed, initial_range, window_for, visible_range, \
+    rollup_level, has_rollup, project_range, STATUS_COLORS, STATUS_LABELS
 from django.utils import timezone
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from django_plotly_dash import DjangoDash
-import numpy as np
+import threading
 
 app = DjangoDash('SteamGantt',external_stylesheets=[dbc.themes.BOOTSTRAP])   # replaces dash.Dash
 
@@ -21,46 +32,33 @@ styles = {
 }
 
 config = {'displaylogo': False,
-          'modeBarButtonsToRemove': ['lasso2d','select2d','autoScale']
+          'modeBarButtonsToRemove': ['lasso2d','autoScale']
           }
 
-# Generate data and return the Gantt chart
-def generate_data(id):
-    #data gathering
+# legend label of each status, also the name of the corresponding trace
+newnames = STATUS_LABELS
 
-    #df = pd.DataFrame()
-    df = pd.DataFrame(list(Task.objects.filter(project_id=id).values()))
+# plotly.express reads the shared default template, whose children are created lazily
+# and are not thread-safe, so figures are built one at a time (builds are cached anyway)
+figure_lock = threading.Lock()
 
-    #df2 = pd.DataFrame()
-    df2 = pd.DataFrame(list(Meeting.objects.filter(project_id=id).values()))
-
-    df2 = df2.reset_index()
-    for i, row in df2.iterrows():
-        df2.at[i,'end_date'] = row.start_date + pd.Timedelta(days=1)
-
-    df = pd.concat([df,df2])
-
-    if not (df.empty):
-        df.sort_values(by='end_date', inplace = True)
-        df.sort_values(by='start_date', inplace = True)
-        df.sort_values(by='status', inplace = True)
-        df['id'] = df['id'].astype(str)
-    else:
-        df['name'] = ''
-        df['start_date'] = ''
-        df['end_date'] = ''
-        df['status'] = ''
-        df['id'] = ''
-    df['index'] = np.arange(len(df))
+# Generate data and return the Gantt chart, with a bar per item or per group of items (level)
+# The figure is built for each call and never kept at module level: callbacks of
+# different projects run concurrently in threaded or multi-process servers
+def generate_data(id, window=None, level=None, critical=()):
+    df = load_rollup(id, level) if level else load_schedule(id, window)
+    with figure_lock:
+        return build_figure(df, window, critical)
 
+# critical: ids of the critical tasks, outlined in red
+def build_figure(df, window=None, critical=()):
     #create gantt figure
-    global fig
     fig = px.timeline(df,
                         x_start="start_date",
                         x_end="end_date",
                         color="status",
                         y="index",
-                        color_discrete_map={'1': '#3CDBEA','2': '#FD8A17', '3': '#63D233'},
+                        color_discrete_map=STATUS_COLORS,
                         hover_name="name",
                         hover_data={'name':False,'status':False,'id':False,'index':False},
                         text='name',
@@ -78,7 +76,6 @@ def generate_data(id):
         )
     )
 
-    newnames = {'1':'À commencer', '2': 'En cours', '3': 'Terminé', 'Réunion': 'Réunion'}
     fig.for_each_trace(lambda t: t.update(name = newnames[t.name],
                                       legendgroup = newnames[t.name],
                                       hovertemplate = t.hovertemplate.replace(t.name, newnames[t.name])
@@ -86,6 +83,13 @@ def generate_data(id):
                   )
 
     fig.update_traces(marker_line_color='rgb(0,48,107)', marker_line_width=1, opacity=1)
+    if critical:
+        critical = {str(task_id) for task_id in critical}
+        for trace in fig.data:
+            if trace.name != newnames['Réunion']:
+                is_critical = [row[2] in critical for row in trace.customdata]
+                trace.marker.line.color = ['#DC3545' if c else 'rgb(0,48,107)' for c in is_critical]
+                trace.marker.line.width = [3 if c else 1 for c in is_critical]
 
     #Draw line for the current day
     fig.update_layout(shapes=[
@@ -96,36 +100,245 @@ def generate_data(id):
         )
     ])
 
+    # keep the user's pan and zoom when the figure is replaced
+    fig.update_layout(uirevision='gantt')
+    if window is not None:
+        # show the middle of the loaded window
+        third = (window[1] - window[0]) / 3
+        fig.update_layout(xaxis_range=[window[0] + third, window[1] - third])
+
     return fig
 
-# Update Gantt chart according to some event
+# buttons acting on the selected item
+ITEM_ACTIONS = ('update-item-button.n_clicks', 'delete-item-button.n_clicks',
+                'validate1-update-button.n_clicks', 'validate2-update-button.n_clicks')
+# buttons acting on the items selected with the box select tool
+BULK_ACTIONS = ('bulk-apply-button.n_clicks', 'bulk-delete-button.n_clicks')
+
+# Single server callback of the chart: every interaction (click, pan or zoom, update,
+# delete, bulk edit) costs one request, which updates the figure, the card of the
+# selected item and the forms at once. Showing and hiding the buttons and the forms
+# is done in the browser by the clientside callbacks below, pan and zoom only reach
+# it through the relayout store when they can change the figure.
 @app.callback(
     Output('graph', 'figure'),
-    Input('item-output', 'children'),
-    Input('task-form-output', 'children'),
-    Input('meeting-form-output', 'children'),
-    State('click-data', 'children'),
-    State('graph', 'clickData'),
-    State('id','value'))
+    Output('figure-version', 'data'),
+    Output('graph', 'clickData'),
+    Output('click-data', 'children'),
+    Output('input1', 'value'),
+    Output('textarea1', 'value'),
+    Output('startdate', 'value'),
+    Output('enddate', 'value'),
+    Output('statut-field1', 'value'),
+    Output('input2', 'value'),
+    Output('textarea2', 'value'),
+    Output('date', 'value'),
+    Output('bulk-message', 'children'),
+    Output('graph', 'selectedData'),
+    Input('graph', 'clickData'),
+    Input('relayout', 'data'),
+    Input('update-item-button', 'n_clicks'),
+    Input('delete-item-button', 'n_clicks'),
+    Input('validate1-update-button', 'n_clicks'),
+    Input('validate2-update-button', 'n_clicks'),
+    Input('bulk-apply-button', 'n_clicks'),
+    Input('bulk-delete-button', 'n_clicks'),
+    State('input1', 'value'),
+    State('textarea1', 'value'),
+    State('startdate', 'value'),
+    State('enddate', 'value'),
+    State('statut-field1', 'value'),
+    State('input2', 'value'),
+    State('textarea2', 'value'),
+    State('date', 'value'),
+    State('id','value'),
+    State('figure-version', 'data'),
+    State('graph', 'selectedData'),
+    State('bulk-shift', 'value'),
+    State('bulk-status', 'value'))
 def update_gantt(*args,**kwargs):
-    return generate_data(args[5])
+    clickData, relayout = args[0], args[1]
+    task_form, meeting_form = args[8:13], args[13:16]
+    project_id, shown = args[16], args[17]
+    # the project id comes from the page, check it again for every request
+    if project_role(kwargs['request'], project_id) is None:
+        raise PreventUpdate
+    da = kwargs['callback_context']
+    triggered = da.triggered[0]['prop_id'] if da.triggered != [] else None
+    form = [no_update] * 8
+    if triggered in ITEM_ACTIONS and (clickData is None or get_clicked_item(clickData)[1] is None):
+        return [no_update] * 14
+    if triggered == 'graph.clickData':
+        return [no_update, no_update, no_update, display_click_data(clickData, project_id)] + form + [no_update] * 2
+    if triggered == 'update-item-button.n_clicks':
+        return [no_update] * 4 + modify_placeholder(clickData, project_id) + [no_update] * 2
+
+    change = None
+    message = no_update
+    if triggered == 'delete-item-button.n_clicks':
+        change = delete_task_meeting(clickData, project_id)
+    elif triggered == 'validate1-update-button.n_clicks':
+        change = validate_update_task(clickData, project_id, *task_form)
+    elif triggered == 'validate2-update-button.n_clicks':
+        change = validate_update_meeting(clickData, project_id, *meeting_form)
+    elif triggered in BULK_ACTIONS:
+        message = bulk_edit(project_id, args[18], triggered == 'bulk-delete-button.n_clicks', args[19], args[20])
+        if message is None:
+            return [no_update] * 14
+    relayout = (relayout or {}) if triggered == 'relayout.data' else None
+    figure, shown = update_figure(project_id, shown, relayout, change)
+    if change is None and triggered not in BULK_ACTIONS:
+        return [figure, shown, no_update, no_update] + form + [no_update] * 2
+    # the edited items are not selected anymore
+    return [figure, shown, None, ''] + form + [message, None]
+
+# Apply a bulk edit to the items selected on the chart: move them by a number of days,
+# change the status of the tasks or delete them. Return the message to display, None if
+# no item is selected.
+def bulk_edit(project_id, selectedData, delete, days, status):
+    task_ids, meeting_ids = get_selected_items(selectedData)
+    if not task_ids and not meeting_ids:
+        return None
+    project = Project.objects.get(pk=project_id)
+    try:
+        if delete:
+            count = delete_items(project, task_ids, meeting_ids)
+            return '{} élément(s) supprimé(s).'.format(count)
+        with transaction.atomic():
+            if days:
+                shift_items(project, task_ids, meeting_ids, int(days))
+            if status:
+                set_tasks_status(project, task_ids, get_string_statut_id(status))
+        return '{} élément(s) modifié(s).'.format(len(task_ids) + len(meeting_ids))
+    except ValidationError as e:
+        return e.messages[0]
+
+# ids of the tasks and of the meetings selected with the box select tool, bars of a rollup are skipped
+def get_selected_items(selectedData):
+    task_ids, meeting_ids = [], []
+    for point in (selectedData or {}).get('points', []):
+        status, item_id = get_clicked_item(point)
+        if item_id is not None:
+            (meeting_ids if status == 'Réunion' else task_ids).append(item_id)
+    return task_ids, meeting_ids
+
+# Update Gantt chart after a pan or zoom (relayout) or an edit (change)
+# After an edit only the changed bar is sent when the chart shown is the one that was
+# edited and nothing else changed meanwhile, otherwise the whole figure is sent.
+# Large projects are loaded one date window at a time, panning or zooming out of the
+# loaded window fetches the next one. Zoomed out, large projects are drawn as one bar
+# per day, week or month and status instead of one bar per item.
+def update_figure(project_id, shown, relayout=None, change=None):
+    shown = shown or {}
+    version = get_schedule_version(project_id)
+    window, level = shown_window(shown), shown.get('level')
+    if relayout is not None:
+        if relayout.get('xaxis.autorange'):
+            visible = project_range(project_id)
+        else:
+            visible = visible_range(relayout)
+        if visible is None:
+            return no_update, no_update
+        new_level = rollup_level(project_id, version, visible)
+        if new_level == level and (level is not None or window is None or
+                                   (window[0] <= visible[0] and visible[1] <= window[1])):
+            return no_update, no_update
+        level, window = new_level, window_for(*visible)
+    elif change is not None:
+        if level is None and change['version'] == shown.get('version') and change['version'] + 1 == version:
+            patch = figure_patch(project_id, change, window)
+            if patch is not None:
+                return patch, dict(shown, version=version)
+    elif not shown:
+        windowed = is_windowed(project_id, version)
+        level = rollup_level(project_id, version, initial_range(project_id) if windowed else project_range(project_id))
+
+    if level is not None or not is_windowed(project_id, version):
+        window = None
+    elif window is None:
+        window = window_for(*initial_range(project_id))
+    figure = get_cached_figure(project_id, lambda id: generate_data(id, window, level, critical_tasks(id, version)),
+                               version, window, level)
+    # relayout: a pan or zoom can load another window or level, the others stay in the browser
+    return figure, {'version': version, 'window': [day.isoformat() for day in window] if window else None,
+                    'level': level, 'relayout': is_windowed(project_id, version) or has_rollup(project_id, version)}
+
+# date window of the figure shown, None if the whole project is shown
+def shown_window(shown):
+    if not shown.get('window'):
+        return None
+    return tuple(date.fromisoformat(day) for day in shown['window'])
+
+# Describe an edited (or deleted) item for update_gantt
+def item_change(version, old_status, item, deleted=False):
+    start_date = date.fromisoformat(str(item.start_date))
+    if old_status == 'Réunion':
+        end_date = start_date + timedelta(days=1)
+    else:
+        end_date = date.fromisoformat(str(item.end_date))
+    return {
+        'version': version,
+        'id': item.id,
+        'status': old_status,
+        'new_status': item.status,
+        'name': item.name,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'deleted': deleted,
+    }
+
+# sort key of a bar, bars of a trace are ordered by start date, end date and id
+def bar_key(trace, i):
+    start = pd.Timestamp(trace.base[i])
+    return (start, start + pd.Timedelta(milliseconds=trace.x[i]), int(trace.customdata[i][2]))
+
+# Return a Patch of the figure built for change['version'] that only touches the changed
+# bar, or None when the structure of the chart changes (new status, new position)
+def figure_patch(project_id, change, window=None):
+    figure = cache.get(figure_cache_key(project_id, change['version'], window))
+    if figure is None or change['status'] != change['new_status']:
+        return None
+    # any change of dates may move the critical path
+    if any(isinstance(trace.marker.line.width, tuple) for trace in figure.data):
+        return None
+    for k, trace in enumerate(figure.data):
+        if trace.name == newnames[change['status']]:
+            break
+    else:
+        return None
+    ids = [row[2] for row in trace.customdata]
+    if str(change['id']) not in ids:
+        return None
+    i = ids.index(str(change['id']))
+
+    patch = Patch()
+    bar = patch['data'][k]
+    if change['deleted']:
+        for prop in ('x', 'base', 'y', 'text', 'hovertext', 'customdata'):
+            del bar[prop][i]
+        return patch
+
+    start = pd.Timestamp(change['start_date'])
+    end = pd.Timestamp(change['end_date'])
+    key = (start, end, change['id'])
+    if (i > 0 and bar_key(trace, i - 1) > key) or (i + 1 < len(ids) and bar_key(trace, i + 1) < key):
+        return None
+    bar['base'][i] = start.isoformat()
+    bar['x'][i] = (end - start).total_seconds() * 1000
+    bar['text'][i] = change['name']
+    bar['hovertext'][i] = change['name']
+    bar['customdata'][i][0] = change['name']
+    return patch
 
 # Display the information of the selected item
-@app.callback(
-    Output('click-data', 'children'),
-    Input('graph', 'clickData'),
-    Input('item-output', 'children'),
-    Input('task-form-output', 'children'),
-    Input('meeting-form-output', 'children'),
-    State('graph', 'clickData'))
-def display_click_data(clickData,a,b,c,stateData):
+def display_click_data(clickData, project_id):
     if clickData is None:
         return ''
-    df = pd.DataFrame(list(Task.objects.all().values()))
-    x = df.loc[df['id'] == int(float(clickData['points'][0]['customdata'][2]))]
-    if clickData['points'][0]['customdata'][1] == 'Réunion': # Meeting
-        df = pd.DataFrame(list(Meeting.objects.all().values()))
-        x = df.loc[df['id'] == int(clickData['points'][0]['customdata'][2])]
+    status, item_id = get_clicked_item(clickData)
+    x = get_item(project_id, status, item_id)
+    if x is None: # deleted in the meantime
+        return ''
+    if status == 'Réunion': # Meeting
         text = html.Div([
             dbc.Card([
                 dbc.CardBody([
@@ -134,7 +347,7 @@ def display_click_data(clickData,a,b,c,stateData):
                     html.Div([
                         html.Div([
                             html.Label('Nom', className='form-label', htmlFor='name'),
-                            dbc.Input(id='name', className='form-control', type='text', value=x.name.iloc[0], disabled=True),
+                            dbc.Input(id='name', className='form-control', type='text', value=x['name'], disabled=True),
                         ], className='mb-3'),
                     ], className='form-group'),
 
@@ -142,7 +355,7 @@ def display_click_data(clickData,a,b,c,stateData):
                     html.Div([
                         html.Div([
                             html.Label('Description', className='form-label', htmlFor='description'),
-                            dbc.Textarea(id='description', className='form-control', value=x.description.iloc[0], disabled=True),
+                            dbc.Textarea(id='description', className='form-control', value=x['description'], disabled=True),
                         ], className='mb-3'),
                     ], className='form-group'),
 
@@ -150,7 +363,7 @@ def display_click_data(clickData,a,b,c,stateData):
                     html.Div([
                         html.Div([
                             html.Label('Date', className='form-label', htmlFor='date'),
-                            dbc.Input(id='date', className='form-control', type='text', value=x.start_date.iloc[0].strftime('%d/%m/%y'), disabled=True),
+                            dbc.Input(id='date', className='form-control', type='text', value=x['start_date'].strftime('%d/%m/%y'), disabled=True),
                         ], className='mb-3'),
                     ], className='form-group'),
 
@@ -165,7 +378,7 @@ def display_click_data(clickData,a,b,c,stateData):
                         html.Div([
                         html.Div([
                             html.Label('Nom', className='form-label requiredField', htmlFor='name', style={'font-size': ''}),
-                            dbc.Input(id='name', className='form-control', type='text', value=x.name.iloc[0], disabled=True),
+                            dbc.Input(id='name', className='form-control', type='text', value=x['name'], disabled=True),
                         ], className='mb-3'),
                     ], className='form-group'),
 
@@ -173,7 +386,7 @@ def display_click_data(clickData,a,b,c,stateData):
                     html.Div([
                         html.Div([
                             html.Label('Description', className='form-label', htmlFor='description'),
-                            dbc.Textarea(id='description', className='form-control', value=x.description.iloc[0], disabled=True),
+                            dbc.Textarea(id='description', className='form-control', value=x['description'], disabled=True),
                         ], className='mb-3'),
                     ], className='form-group'),
 
@@ -181,7 +394,7 @@ def display_click_data(clickData,a,b,c,stateData):
                     html.Div([
                         html.Div([
                             html.Label('Date de début', className='form-label', htmlFor='start_date'),
-                            dbc.Input(id='start_date', className='form-control', type='text', value=x.start_date.iloc[0].strftime('%d/%m/%y'), disabled=True),
+                            dbc.Input(id='start_date', className='form-control', type='text', value=x['start_date'].strftime('%d/%m/%y'), disabled=True),
                         ], className='mb-3'),
                     ], className='form-group'),
 
@@ -189,119 +402,121 @@ def display_click_data(clickData,a,b,c,stateData):
                     html.Div([
                         html.Div([
                             html.Label('Date de fin', className='form-label', htmlFor='end_date'),
-                            dbc.Input(id='end_date', className='form-control', type='text', value=x.end_date.iloc[0].strftime('%d/%m/%y'), disabled=True),
+                            dbc.Input(id='end_date', className='form-control', type='text', value=x['end_date'].strftime('%d/%m/%y'), disabled=True),
                         ], className='mb-3'),
                     ], className='form-group'),
                 ]),
             ]),
         ])
-    fig.for_each_trace(
-        lambda trace: trace.update(visible=False)
-    )
     return text
 
-@app.callback(
-    Output('graph', 'clickData'),
-    Input('validate2-update-button', 'n_clicks'),
-    Input('validate1-update-button', 'n_clicks'))
-def display_click_data(*args,**kwargs):
-    return None
-
-# Hide delete button before click
-@app.callback(
+# Show the buttons of the selected item, hide them when nothing (or a bar of a rollup) is selected
+app.clientside_callback(
+    """
+    function(clickData, update, validate2, validate1) {
+        const triggered = dash_clientside.callback_context.triggered.map(t => t.prop_id);
+        const pre = %s;
+        if (triggered.includes('graph.clickData')) {
+            if (clickData == null || !clickData.points[0].customdata[2]) {
+                return [{'display': 'none'}, pre];
+            }
+            return [{'display': 'inline'}, pre];
+        }
+        if (triggered.includes('validate2-update-button.n_clicks') || triggered.includes('validate1-update-button.n_clicks')) {
+            return [{'display': 'none'}, pre];
+        }
+        return [{'display': 'none'}, {'display': 'none'}];
+    }
+    """ % json.dumps(styles['pre']),
     Output('item-button', component_property='style'),
     Output('click-data', component_property='style'),
     Input('graph', 'clickData'),
     Input('update-item-button', 'n_clicks'),
     Input('validate2-update-button', 'n_clicks'),
     Input('validate1-update-button', 'n_clicks'))
-def display_click_data(*args,**kwargs):
-    da = kwargs['callback_context']
-    if da.triggered != []:
-        triggered = da.triggered[0]['prop_id']
-        if triggered == 'graph.clickData':
-            if args[0] == None:
-                return [{'display':'none'},styles['pre']]
-            else:
-                return [{'display':'inline'},styles['pre']]
-        elif triggered == 'validate2-update-button.n_clicks' or triggered == 'validate1-update-button.n_clicks':
-            return [{'display':'none'},styles['pre']]
-    return [{'display':'none'},{'display':'none'}]
-
-#call back to delete a task or a meeting
-@app.callback(
-    Output('item-output', 'children'),
-    [Input('delete-item-button', 'n_clicks')],
-    [State('graph', 'clickData')])
-def select_event_button(*args,**kwargs):
-    da = kwargs['callback_context']
-    if da.triggered != []:
-        triggered = da.triggered[0]['prop_id']
-        if triggered == 'delete-item-button.n_clicks':
-            return delete_task_meeting(args[1])
-
-# delete a task or a meeting
-def delete_task_meeting(clickData):
-    id_clicked = int(clickData['points'][0]['customdata'][2])
-    if clickData['points'][0]['customdata'][1] != 'Réunion':
-        task = Task.objects.get(id=id_clicked)
-        task.delete()
-    else:
-        meeting = Meeting.objects.get(id=id_clicked)
-        meeting.delete()
 
 # display or hide forms based on the state
-@app.callback(
+app.clientside_callback(
+    """
+    function(update, clickData, validate2, validate1) {
+        const triggered = dash_clientside.callback_context.triggered.map(t => t.prop_id);
+        if (triggered.includes('update-item-button.n_clicks') && clickData != null) {
+            if (clickData.points[0].customdata[1] != 'Réunion') {
+                return [{'display': 'inline'}, {'display': 'none'}];
+            }
+            return [{'display': 'none'}, {'display': 'inline'}];
+        }
+        return [{'display': 'none'}, {'display': 'none'}];
+    }
+    """,
     Output('task-form', component_property='style'),
     Output('meeting-form', component_property='style'),
     Input('update-item-button', 'n_clicks'),
     Input('graph', 'clickData'),
     Input('validate2-update-button', 'n_clicks'),
     Input('validate1-update-button', 'n_clicks'))
-def hide_show_form_title(*args,**kwargs):
-    da = kwargs['callback_context']
-    if da.triggered != []:
-        triggered = da.triggered[0]['prop_id']
-        if triggered == 'update-item-button.n_clicks':
-            if args[1]['points'][0]['customdata'][1] != 'Réunion':
-                return [{'display':'inline'},{'display':'none'}]
-            else:
-                return [{'display':'none'},{'display':'inline'}]
-    return [{'display':'none'},{'display':'none'}]
+
+# Pass pan and zoom on to update_gantt only when the figure shown is windowed or can be
+# rolled up, the figures of small projects are complete at every range
+app.clientside_callback(
+    """
+    function(relayoutData, shown) {
+        if (shown == null || !shown.relayout) {
+            return dash_clientside.no_update;
+        }
+        return relayoutData;
+    }
+    """,
+    Output('relayout', 'data'),
+    Input('graph', 'relayoutData'),
+    State('figure-version', 'data'),
+    prevent_initial_call=True)
+
+# Show the bulk edit form while items are selected with the box select tool
+# (a click also selects its bar, only a box selection has a range)
+app.clientside_callback(
+    """
+    function(selectedData) {
+        if (selectedData == null || !selectedData.range || selectedData.points.length == 0) {
+            return [{'display': 'none'}, ''];
+        }
+        return [{'display': 'inline'}, selectedData.points.length + ' élément(s) sélectionné(s)'];
+    }
+    """,
+    Output('bulk-form', component_property='style'),
+    Output('bulk-title', 'children'),
+    Input('graph', 'selectedData'))
+
+# delete a task or a meeting
+def delete_task_meeting(clickData, project_id):
+    status, id_clicked = get_clicked_item(clickData)
+    version = get_schedule_version(project_id)
+    if status != 'Réunion':
+        item = Task.objects.get(id=id_clicked, project_id=project_id)
+    else:
+        item = Meeting.objects.get(id=id_clicked, project_id=project_id)
+    change = item_change(version, status, item, deleted=True)
+    item.delete()
+    return change
 
 # fill form with current values of a task/meeting
-@app.callback(
-    Output('input1', component_property='value'),
-    Output('textarea1', component_property='value'),
-    Output('startdate', component_property='value'),
-    Output('enddate', component_property='value'),
-    Output('statut-field1', component_property='value'),
-    Output('input2', component_property='value'),
-    Output('textarea2', component_property='value'),
-    Output('date', component_property='date'),
-    Input('update-item-button', 'n_clicks'),
-    [State('graph', 'clickData')])
-def modify_placeholder(*args,**kwargs):
-    da = kwargs['callback_context']
-    if da.triggered != []:
-        triggered = da.triggered[0]['prop_id']
-        if triggered == 'update-item-button.n_clicks':
-            if args[1]['points'][0]['customdata'][1] != 'Réunion':
-                df = pd.DataFrame(list(Task.objects.all().values()))
-                x = df.loc[df['id'] == int(float(args[1]['points'][0]['customdata'][2]))]
-                str_start_date = x.astype(str).tail(1).reset_index().loc[0, 'start_date']
-                start_date = datetime.strptime(str_start_date, '%Y-%m-%d')
-                str_end_date = x.astype(str).tail(1).reset_index().loc[0, 'end_date']
-                end_date = datetime.strptime(str_end_date, '%Y-%m-%d')
-                return [x.name,x.description,start_date.date(),end_date.date(),get_string_statut_name(x.status.iloc[0]),"","",None]
-            else:
-                df = pd.DataFrame(list(Meeting.objects.all().values()))
-                x = df.loc[df['id'] == int(float(args[1]['points'][0]['customdata'][2]))]
-                str_date = x.astype(str).tail(1).reset_index().loc[0, 'start_date']
-                date = datetime.strptime(str_date, '%Y-%m-%d')
-                return ["","",None,None,None,x.name,x.description,date.date()]
+def modify_placeholder(clickData, project_id):
+    status, item_id = get_clicked_item(clickData)
+    x = get_item(project_id, status, item_id)
+    if x is None:
+        pass
+    elif status != 'Réunion':
+        return [x['name'],x['description'],x['start_date'],x['end_date'],get_string_statut_name(x['status']),"","",None]
+    else:
+        return ["","",None,None,None,x['name'],x['description'],x['start_date']]
     return [None,None,None,None,None,None,None,None]
 
+# get the status and the id of the clicked item (or of a point), the id is None for a bar of a rollup
+def get_clicked_item(clickData):
+    point = clickData['points'][0] if 'points' in clickData else clickData
+    customdata = point['customdata']
+    return customdata[1], int(float(customdata[2])) if customdata[2] else None
+
 # get the correponding label status based on the id of the status
 def get_string_statut_name(x):
     match x:
@@ -322,194 +537,194 @@ def get_string_statut_id(x):
         case 'Terminé':
             return '3'
 
-# callback for the validation of a task form update
-@app.callback(
-    Output('task-form-output', 'children'),
-    Input('validate1-update-button', 'n_clicks'),
-    State('input1', 'value'),
-    State('textarea1', 'value'),
-    State('startdate', 'value'),
-    State('enddate', 'value'),
-    State('statut-field1', 'value'),
-    State('graph', 'clickData'))
-def validate_update_task(*args,**kwargs):
-    da = kwargs['callback_context']
-    if da.triggered != []:
-        triggered = da.triggered[0]['prop_id']
-        if triggered == 'validate1-update-button.n_clicks':
-            id_clicked = int(float(args[6]['points'][0]['customdata'][2]))
-            task = Task.objects.get(id=id_clicked)
-            if type(args[1]) is not list and args[1] != '':
-                task.name = args[1]
-            if type(args[2]) is not list:
-                task.description = args[2]
-            if datetime.strptime(args[3], '%Y-%m-%d') <= datetime.strptime(args[4], '%Y-%m-%d'):
-                task.start_date = args[3]
-                task.end_date = args[4]
-            task.status = get_string_statut_id(args[5])
-            task.save()
-
-# callback for the validation of a meeting form update
-@app.callback(
-    Output('meeting-form-output', 'children'),
-    Input('validate2-update-button', 'n_clicks'),
-    State('input2', 'value'),
-    State('textarea2', 'value'),
-    State('date', 'date'),
-    State('graph', 'clickData'))
-def validate_update_meeting(*args,**kwargs):
-    da = kwargs['callback_context']
-    if da.triggered != []:
-        triggered = da.triggered[0]['prop_id']
-        if triggered == 'validate2-update-button.n_clicks':
-            id_clicked = int(args[4]['points'][0]['customdata'][2])
-            meeting = Meeting.objects.get(id=id_clicked)
-            if type(args[1]) is not list and args[1] != '':
-                meeting.name = args[1]
-            if type(args[2]) is not list:
-                meeting.description = args[2]
-            meeting.start_date = args[3]
-            meeting.save()
+# validation of a task form update
+def validate_update_task(clickData, project_id, name, description, start_date, end_date, status):
+    _, id_clicked = get_clicked_item(clickData)
+    version = get_schedule_version(project_id)
+    task = Task.objects.get(id=id_clicked, project_id=project_id)
+    old_status = task.status
+    if type(name) is not list and name != '':
+        task.name = name
+    if type(description) is not list:
+        task.description = description
+    if datetime.strptime(start_date, '%Y-%m-%d') <= datetime.strptime(end_date, '%Y-%m-%d'):
+        task.start_date = start_date
+        task.end_date = end_date
+    task.status = get_string_statut_id(status)
+    task.save()
+    return item_change(version, old_status, task)
+
+# validation of a meeting form update
+def validate_update_meeting(clickData, project_id, name, description, start_date):
+    _, id_clicked = get_clicked_item(clickData)
+    version = get_schedule_version(project_id)
+    meeting = Meeting.objects.get(id=id_clicked, project_id=project_id)
+    if type(name) is not list and name != '':
+        meeting.name = name
+    if type(description) is not list:
+        meeting.description = description
+    meeting.start_date = start_date
+    meeting.save()
+    return item_change(version, 'Réunion', meeting)
 
 # Create the layout of the page
-app.layout = dbc.Container([
-    dbc.Card([
-        dbc.CardBody([
-            dcc.Graph(
-                id='graph',
-                figure=generate_data(-1),
-                config=config
-            ),
-        ])]
-    ),
-    dcc.Input(id = 'id', value = None, persistence=False, style = {'display':'none'}),
-    html.Div([
-        html.Div(id='click-data', style=styles['pre']),
-    ], className='three columns'),
-
-    # delete button and update button
-    html.Div([
-        dbc.Button("Modifier", className="btn btn-primary mt-3", id='update-item-button', style={"width": "100%"}),
-        dbc.Button("Supprimer", className="btn btn-danger mt-3 btn-sm", id='delete-item-button', style={"width": "100%"}),
-    ], id='item-button', className='d-grip gap-2', style= {'display':'none'}),
-    html.Div(id='item-output'),
-    # the form for the tasks updates
-    html.Div(
+# The layout is a function so that nothing is built when the module is imported,
+# the figure itself is filled by update_gantt on the initial callback
+def serve_layout():
+    return dbc.Container([
         dbc.Card([
             dbc.CardBody([
+                dcc.Graph(
+                    id='graph',
+                    config=config
+                ),
+            ])]
+        ),
+        dcc.Input(id = 'id', value = None, persistence=False, style = {'display':'none'}),
+        # schedule version of the figure shown
+        dcc.Store(id='figure-version'),
+        # pan and zoom that can change the figure
+        dcc.Store(id='relayout'),
+        html.Div([
+            html.Div(id='click-data', style=styles['pre']),
+        ], className='three columns'),
+
+        # delete button and update button
+        html.Div([
+            dbc.Button("Modifier", className="btn btn-primary mt-3", id='update-item-button', style={"width": "100%"}),
+            dbc.Button("Supprimer", className="btn btn-danger mt-3 btn-sm", id='delete-item-button', style={"width": "100%"}),
+        ], id='item-button', className='d-grip gap-2', style= {'display':'none'}),
+
+        # bulk edit of the items selected with the box select tool
+        html.Div(
+            dbc.Card([
+                dbc.CardHeader(
+                    html.H5(id='bulk-title'),
+                ),
+                dbc.CardBody([
 
-                # Name
-                html.Div([
+                    # Shift
                     html.Div([
-                        html.Label('Nom*', className='form-label', htmlFor='input1'),
-                        dbc.Input(id='input1', className='form-control', type='text'),
-                    ], className='mb-3'),
-                ], className='form-group'),
+                        html.Div([
+                            html.Label('Décaler de (jours)', className='form-label', htmlFor='bulk-shift'),
+                            dbc.Input(id='bulk-shift', className='form-control', type='number', step=1, value=0),
+                        ], className='mb-3'),
+                    ], className='form-group'),
 
-                # Description
-                html.Div([
+                    # Status
                     html.Div([
-                        html.Label('Description', className='form-label', htmlFor='textarea1'),
-                        dbc.Textarea(id='textarea1', className='form-control'),
-                    ], className='mb-3'),
-                ], className='form-group'),
+                        html.Div([
+                            html.Label('Status des tâches', className='form-label', htmlFor='bulk-status'),
+                            dbc.Select(options=[{'label': 'Inchangé', 'value': ''}] +
+                                       [{'label': choice[1], 'value': choice[1]} for choice in Task.CHOICES],
+                                       id='bulk-status', value=''),
+                        ], className='mb-3'),
+                    ], className='form-group'),
 
-                # Start date
-                html.Div([
                     html.Div([
-                        html.Label('Date de début*', className='form-label', htmlFor='startdate'),
-                        dbc.Input(id='startdate', className='form-control date-input', type='date'),
-                    ], className='mb-3'),
-                ], className='form-group'),
+                        dbc.Button("Appliquer", id='bulk-apply-button', className="btn btn-primary mt-3", style={"width": "100%"}),
+                        dbc.Button("Supprimer la sélection", id='bulk-delete-button', className="btn btn-danger mt-3 btn-sm", style={"width": "100%"}),
+                    ], className='d-grip gap-2'),
+                ])], className='mt-3 mb-3'
+            ), id='bulk-form', style={'display': 'none'}
+        ),
+        html.Div(id='bulk-message', className='mt-3'),
+        # the form for the tasks updates
+        html.Div(
+            dbc.Card([
+                dbc.CardBody([
 
-                # End date
-                html.Div([
+                    # Name
                     html.Div([
-                        html.Label('Date de fin*', className='form-label', htmlFor='enddate'),
-                        dbc.Input(id='enddate', className='form-control date-input', type='date'),
-                    ], className='mb-3'),
-                ], className='form-group'),
+                        html.Div([
+                            html.Label('Nom*', className='form-label', htmlFor='input1'),
+                            dbc.Input(id='input1', className='form-control', type='text'),
+                        ], className='mb-3'),
+                    ], className='form-group'),
 
-                # Status
-                html.Div([
+                    # Description
                     html.Div([
-                        html.Label('Status*', className='form-label', htmlFor='statut-field1'),
-                        dbc.Select(options=[choice[1] for choice in Task.CHOICES],id='statut-field1'),
-                    ], className='mb-3'),
-                ], className='form-group'),
-
-                # Validate button
-                html.Div(
-                    dbc.Button("Valider", id="validate1-update-button", className="btn btn-primary mt-3", style={"width": "100%"}),
-                    className='d-grip gap-2'
-                )
-
-            ])], className='mt-3 mb-3'
-        ),id='task-form', style= {'display':'none'}
-    ),
-    html.Div(id='task-form-output'),
-
-    # the form for the meetings updates
-    html.Div(
-        dbc.Card([
-            dbc.CardHeader(
-                html.H4("Modifier la réunion sélectionnée"),
-            ),
-            dbc.CardBody([
+                        html.Div([
+                            html.Label('Description', className='form-label', htmlFor='textarea1'),
+                            dbc.Textarea(id='textarea1', className='form-control'),
+                        ], className='mb-3'),
+                    ], className='form-group'),
 
-                # Name
-                html.Div([
+                    # Start date
                     html.Div([
-                        html.Label('Nom*', className='form-label', htmlFor='input2'),
-                        dbc.Input(id='input2', className='form-control', type='text'),
-                    ], className='mb-3'),
-                ], className='form-group'),
+                        html.Div([
+                            html.Label('Date de début*', className='form-label', htmlFor='startdate'),
+                            dbc.Input(id='startdate', className='form-control date-input', type='date'),
+                        ], className='mb-3'),
+                    ], className='form-group'),
 
-                # Description
-                html.Div([
+                    # End date
                     html.Div([
-                        html.Label('Description', className='form-label', htmlFor='textarea2'),
-                        dbc.Textarea(id='textarea2', className='form-control'),
-                    ], className='mb-3'),
-                ], className='form-group'),
+                        html.Div([
+                            html.Label('Date de fin*', className='form-label', htmlFor='enddate'),
+                            dbc.Input(id='enddate', className='form-control date-input', type='date'),
+                        ], className='mb-3'),
+                    ], className='form-group'),
+
+                    # Status
+                    html.Div([
+                        html.Div([
+                            html.Label('Status*', className='form-label', htmlFor='statut-field1'),
+                            dbc.Select(options=[choice[1] for choice in Task.CHOICES],id='statut-field1'),
+                        ], className='mb-3'),
+                    ], className='form-group'),
+
+                    # Validate button
+                    html.Div(
+                        dbc.Button("Valider", id="validate1-update-button", className="btn btn-primary mt-3", style={"width": "100%"}),
+                        className='d-grip gap-2'
+                    )
+
+                ])], className='mt-3 mb-3'
+            ),id='task-form', style= {'display':'none'}
+        ),
 
-                # Date
-                html.Div([
+        # the form for the meetings updates
+        html.Div(
+            dbc.Card([
+                dbc.CardHeader(
+                    html.H4("Modifier la réunion sélectionnée"),
+                ),
+                dbc.CardBody([
+
+                    # Name
                     html.Div([
-                        html.Label('Date*', className='form-label', htmlFor='date'),
-                        dbc.Input(id='date', className='form-control date-input', type='date'),
-                    ], className='mb-3'),
-                ], className='form-group'),
-
-                # Validate button
-                html.Div(
-                    dbc.Button("Valider", id="validate2-update-button", className="btn btn-primary mt-3", style={"width": "100%"}),
-                    className='d-grip gap-2'
-                )
-
-            ])], className='mt-3 mb-3'
-        ),id='meeting-form', style= {'display':'none'}
-    ),
-    html.Div(id='meeting-form-output'),
-])
-
-# View to display the gantt chart
-def gantt(request, **kwargs):
-    # Check that the user is logged in
-    if not request.user.is_authenticated:
-        return redirect('login')
-
-    # Check that the user is a member of the project or the owner
-    if not Project.objects.filter(id=kwargs['pk'], members=request.user).exists() \
-        and not Project.objects.filter(id=kwargs['pk'], owner=request.user).exists() \
-            and not request.user.is_staff:
-        return redirect('project-list')
-
-    # Filter the tasks and meetings based on the project id
-    tasks = Task.objects.filter(project_id=kwargs['pk'])
-    meetings = Meeting.objects.filter(project_id=kwargs['pk'])
-
-    # Get the project or 404
-    project = get_object_or_404(Project, pk=kwargs['pk'])
-
-    return render(request, 'tasks/tasks.html', {'my_app': app, 'tasks': tasks, 'meetings': meetings, 'project': project, 'context' : {'id': {'value': kwargs['pk']}}})
+                        html.Div([
+                            html.Label('Nom*', className='form-label', htmlFor='input2'),
+                            dbc.Input(id='input2', className='form-control', type='text'),
+                        ], className='mb-3'),
+                    ], className='form-group'),
+
+                    # Description
+                    html.Div([
+                        html.Div([
+                            html.Label('Description', className='form-label', htmlFor='textarea2'),
+                            dbc.Textarea(id='textarea2', className='form-control'),
+                        ], className='mb-3'),
+                    ], className='form-group'),
+
+                    # Date
+                    html.Div([
+                        html.Div([
+                            html.Label('Date*', className='form-label', htmlFor='date'),
+                            dbc.Input(id='date', className='form-control date-input', type='date'),
+                        ], className='mb-3'),
+                    ], className='form-group'),
+
+                    # Validate button
+                    html.Div(
+                        dbc.Button("Valider", id="validate2-update-button", className="btn btn-primary mt-3", style={"width": "100%"}),
+                        className='d-grip gap-2'
+                    )
+
+                ])], className='mt-3 mb-3'
+            ),id='meeting-form', style= {'display':'none'}
+        ),
+    ])
+
+app.layout = serve_layout
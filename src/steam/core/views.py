@@ -1,15 +1,28 @@
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, View, FormView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from .models import Project, Task, Meeting, Resource
-from .forms import ProjectForm, TaskForm, CustomUserCreationForm, MeetingForm, ResourceForm
-from django.http import JsonResponse
+from .forms import ProjectForm, TaskForm, CustomUserCreationForm, MeetingForm, ResourceForm, TaskImportForm
+from .schedule import cache_stats
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, quote_etag
+from django.db.models import Count, Min, Q
 from django.http import Http404
+from django.template.defaultfilters import date as date_filter
+from django.template.loader import render_to_string
+from django.utils.html import escape, format_html
+from .datatables import datatables_response, SERVER_SIDE_THRESHOLD
+from .export import export_lines, EXPORT_FORMATS
+from .access import ProjectAccessMixin, ProjectObjectAccessMixin, get_project_or_404, resolve_access, visible_projects, \
+    MANAGERS, MEMBER
+from django.utils import timezone
+from datetime import date, timedelta
 
 
 User = get_user_model()
@@ -21,26 +34,68 @@ class ProjectListView(LoginRequiredMixin, ListView):
     context_object_name = 'projects'
 
     def get_queryset(self):
+        # owner joined in and task progress annotated, the whole list is loaded in one query
+        return self.with_progress(self.visible_projects())
+
+    def visible_projects(self):
         user = self.request.user
         queryset = super().get_queryset()
 
         if user.is_staff:
             return queryset
 
-        return (queryset.filter(members=user) | queryset.filter(owner=user)).distinct()
+        # cached ids instead of a join on the members, which would need a DISTINCT
+        return queryset.filter(pk__in=list(visible_projects(user)))
+
+    @staticmethod
+    def with_progress(queryset):
+        return queryset.select_related('owner').annotate(
+            tasks_total=Count('tasks'),
+            tasks_todo=Count('tasks', filter=Q(tasks__status='1')),
+            tasks_doing=Count('tasks', filter=Q(tasks__status='2')),
+            tasks_done=Count('tasks', filter=Q(tasks__status='3')),
+            # nearest end date of an unfinished task
+            next_deadline=Min('tasks__end_date', filter=Q(tasks__end_date__gte=timezone.now().date()) &
+                              ~Q(tasks__status='3')),
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # counted without the task join
+        context['total'] = self.visible_projects().count()
+        # large lists are loaded page by page from ProjectListDataView
+        context['server_side'] = context['total'] > SERVER_SIDE_THRESHOLD
+        return context
+
 
+class ProjectListDataView(ProjectListView):
+    # Page of the project list for DataTables server-side processing, with the same visibility rules
+    columns = ['name', 'start_date', 'end_date', 'owner__username', None, 'next_deadline', 'is_archived', None]
 
-class ProjectDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+    def get(self, request, *args, **kwargs):
+        def render_row(project):
+            return [
+                escape(project.name),
+                date_filter(project.start_date, 'd/m/Y'),
+                date_filter(project.end_date, 'd/m/Y'),
+                escape(project.owner),
+                render_to_string('project/progress.html', {'project': project}),
+                date_filter(project.next_deadline, 'd/m/Y'),
+                format_html('<span class="badge bg-secondary">{}</span>', 'Oui' if project.is_archived else 'Non'),
+                render_to_string('project/list_actions.html', {'project': project}, request),
+            ]
+        return datatables_response(request, self.visible_projects(), self.columns,
+                                   ['name', 'owner__username'], render_row, prepare=self.with_progress)
+
+
+class ProjectDetailView(LoginRequiredMixin, ProjectAccessMixin, DetailView):
     model = Project
     template_name = 'project/detail.html'
     context_object_name = 'project'
 
-    def test_func(self):
-        project = self.get_object()
-        user = self.request.user
-        return user == project.owner or \
-               user in project.members.all() or \
-               user.is_staff
+    # the project was loaded by the access check
+    def get_object(self, queryset=None):
+        return self.get_project()
 
 class ProjectCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Project
@@ -61,33 +116,29 @@ class ProjectCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
         return context
 
 
-class ProjectUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class ProjectUpdateView(LoginRequiredMixin, ProjectAccessMixin, UpdateView):
     model = Project
     form_class = ProjectForm
     template_name = 'project/create_update.html'
     success_url = reverse_lazy('project-list')
+    allowed_roles = MANAGERS
+
+    def get_object(self, queryset=None):
+        return self.get_project()
 
     def get_context_data(self, **kwargs):
         context = super(ProjectUpdateView, self).get_context_data(**kwargs)
         context['users'] = User.objects.exclude(pk=self.request.user.pk)
         return context
 
-    def test_func(self):
-        project = self.get_object()
-        user = self.request.user
-        return user == project.owner or \
-               user.is_staff
 
-
-class ProjectDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class ProjectDeleteView(LoginRequiredMixin, ProjectAccessMixin, DeleteView):
     model = Project
     success_url = reverse_lazy('project-list')
+    allowed_roles = MANAGERS
 
-    def test_func(self):
-        project = self.get_object()
-        user = self.request.user
-        return user == project.owner or \
-               user.is_staff
+    def get_object(self, queryset=None):
+        return self.get_project()
 
 class ProjectRegisterView(LoginRequiredMixin, View):
     def post(self, request, *args, **kwargs):
@@ -101,7 +152,7 @@ class ProjectRegisterView(LoginRequiredMixin, View):
             messages.error(request, 'Le projet avec la clé fournie n\'existe pas.', extra_tags='danger')
             return redirect('project-list')
         else:
-            if request.user in project.members.all() or request.user == project.owner:
+            if project.pk in visible_projects(request.user):
                 messages.info(request, f'Vous êtes déjà inscrit au projet: {project.name}.')
             else:
                 # add the user to the project
@@ -114,113 +165,112 @@ class ProjectRegisterView(LoginRequiredMixin, View):
         return JsonResponse({'error': 'GET method not allowed'}, status=405)
 
 
-class ResourceListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class GanttCacheStatsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    # Hit/miss counters of the Gantt figure cache, per server process
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(cache_stats())
+
+
+class PortfolioView(LoginRequiredMixin, UserPassesTestMixin, View):
+    # Timeline of every project for staff, one bar per project expandable to its tasks and meetings
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        # imported here so that pandas and numpy are only loaded when a chart is drawn
+        from .portfolio import get_cached_portfolio, portfolio_rows
+        timeline, rows = portfolio_rows(get_cached_portfolio())
+        return render(request, 'portfolio/portfolio.html', {'timeline': timeline, 'rows': rows})
+
+
+class ResourceListView(LoginRequiredMixin, ProjectAccessMixin, ListView):
     model = Resource
     template_name = 'resource/resource_list.html'
     context_object_name = 'resources'
 
     def get_queryset(self):
-        user = self.request.user
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        queryset = super().get_queryset()
-
-        is_staff = user.is_staff
-        is_owner = user == project.owner
-        is_member = user in project.members.all()
+        queryset = super().get_queryset().filter(project_id=self.kwargs['pk'])
+        role = self.get_role()
 
-        if is_staff or is_owner:
-            queryset_filtered = queryset.filter(project=project)
-        elif is_member:
-            queryset_filtered = queryset.filter(
-                project=project, is_hidden=False)
-        else:
-            queryset_filtered = queryset.none()
-
-        return queryset_filtered
+        if role in MANAGERS:
+            return queryset
+        elif role == MEMBER:
+            return queryset.filter(is_hidden=False)
+        return queryset.none()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
         context['pk'] = self.kwargs['pk']
-        context['project'] = project
+        context['project'] = self.get_project()
+        context['total'] = self.object_list.count()
+        # large lists are loaded page by page from ResourceListDataView
+        context['server_side'] = context['total'] > SERVER_SIDE_THRESHOLD
         return context
 
-    def test_func(self):
-        user = self.request.user
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        is_staff = user.is_staff
-        is_owner = user == project.owner
-        is_member = user in project.members.all()
-        return is_staff or is_owner or is_member
 
+class ResourceListDataView(ResourceListView):
+    # Page of the resources of a project for DataTables server-side processing
+    columns = ['name', None, 'uploaded_at', None]
 
-class ResourceDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+    def get(self, request, *args, **kwargs):
+        project = self.get_project()
+
+        def render_row(resource):
+            return [
+                # restored archives without their files have resources without a file
+                format_html('<a href="{}">{}</a>', resource.file.url, resource.name) if resource.file
+                else escape(resource.name),
+                escape(resource.get_file_extension()),
+                date_filter(resource.uploaded_at, 'd/m/Y'),
+                render_to_string('resource/resource_actions.html', {'resource': resource, 'project': project},
+                                 request),
+            ]
+        return datatables_response(request, self.get_queryset(), self.columns, ['name'], render_row)
+
+
+class ResourceDetailView(LoginRequiredMixin, ProjectObjectAccessMixin, DetailView):
     model = Resource
     template_name = 'resource/resource_detail.html'
     context_object_name = 'resource'
 
     def test_func(self):
-        user = self.request.user
-        resource = self.get_object()
-        project = resource.project
-        is_staff = user.is_staff
-        is_owner = user == project.owner
-        is_member = user in project.members.all()
-
-        return (is_member and not resource.is_hidden) or is_staff or is_owner
+        role = self.get_role()
+        return role in MANAGERS or (role == MEMBER and not self.get_object().is_hidden)
 
 
-class ResourceCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
+class ResourceCreateView(LoginRequiredMixin, ProjectAccessMixin, CreateView):
     model = Resource
     form_class = ResourceForm
     template_name = "resource/resource_form.html"
+    allowed_roles = MANAGERS
 
     def form_valid(self, form):
         form.instance.project_id = self.kwargs['pk']
         return super().form_valid(form)
 
-    def test_func(self):
-        project = get_object_or_404(Project, pk=self.kwargs['pk'])
-        user = self.request.user
-        return user == project.owner or \
-            user.is_staff
-
     def get_success_url(self):
         return reverse_lazy('project-resource-list', kwargs={'pk': self.kwargs['pk']})
 
 
-class ResourceUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class ResourceUpdateView(LoginRequiredMixin, ProjectObjectAccessMixin, UpdateView):
     model = Resource
     form_class = ResourceForm
     template_name = 'resource/resource_form.html'
-
-    def test_func(self):
-        resource = self.get_object()
-        project = resource.project
-        user = self.request.user
-        return user == project.owner or \
-            user.is_staff
+    allowed_roles = MANAGERS
 
     def get_success_url(self):
-        resource = self.get_object()
-        project_id = resource.project.id
-        return reverse_lazy('project-resource-list', kwargs={'pk': project_id})
+        return reverse_lazy('project-resource-list', kwargs={'pk': self.object.project_id})
 
 
-class ResourceDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class ResourceDeleteView(LoginRequiredMixin, ProjectObjectAccessMixin, DeleteView):
     model = Resource
-
-    def test_func(self):
-        resource = self.get_object()
-        project = resource.project
-        user = self.request.user
-        return user == project.owner or \
-            user.is_staff
+    allowed_roles = MANAGERS
 
     def get_success_url(self):
-        resource = self.get_object()
-        project_id = resource.project.id
-        return reverse_lazy('project-resource-list', kwargs={'pk': project_id})
+        return reverse_lazy('project-resource-list', kwargs={'pk': self.object.project_id})
 
 
 class TaskDetail(DetailView):
@@ -250,6 +300,28 @@ class TaskCreate(CreateView):
             raise Http404('Project does not exist')
         return super(TaskCreate, self).dispatch(request, *args, **kwargs)
 
+class TaskImportView(LoginRequiredMixin, ProjectAccessMixin, FormView):
+    form_class = TaskImportForm
+    template_name = "tasks/task_import.html"
+
+    def get_context_data(self, **kwargs):
+        kwargs['project'] = self.get_project()
+        return super().get_context_data(**kwargs)
+
+    def form_valid(self, form):
+        # imported here so that the URLconf does not load pandas
+        from .task_import import import_tasks, TaskImportError
+        file = form.cleaned_data['file']
+        try:
+            result = import_tasks(self.get_project(), file, file.name)
+        except TaskImportError as error:
+            form.add_error('file', str(error))
+            return self.form_invalid(form)
+        if result.error_count:
+            return self.render_to_response(self.get_context_data(form=form, result=result))
+        messages.success(self.request, '{} tâche(s) importée(s).'.format(result.created))
+        return redirect('project-task-list', pk=self.kwargs['pk'])
+
 class TaskUpdate(UpdateView):
     model = Task
     form_class = TaskForm
@@ -296,6 +368,119 @@ class MeetingCreate(CreateView):
             raise Http404('Project does not exist')
         return super(MeetingCreate, self).dispatch(request, *args, **kwargs)
 
+# View to display the gantt chart
+# The SteamGantt Dash app itself is loaded on first use by core.dash_apps
+def gantt(request, **kwargs):
+    # Check that the user is logged in
+    if not request.user.is_authenticated:
+        return redirect('login')
+
+    # Check that the user is a member of the project, its owner or staff
+    project, role = resolve_access(request, kwargs['pk'])
+    if role is None:
+        return redirect('project-list')
+
+    # Filter the tasks and meetings based on the project id
+    tasks = Task.objects.filter(project_id=kwargs['pk'])
+    meetings = Meeting.objects.filter(project_id=kwargs['pk'])
+
+    return render(request, 'tasks/tasks.html', {'tasks': tasks, 'meetings': meetings, 'project': project, 'context' : {'id': {'value': kwargs['pk']}}})
+
+# Read-only Gantt chart rendered to SVG, for viewers and printing (no Dash involved)
+def gantt_svg(request, **kwargs):
+    if not request.user.is_authenticated:
+        return redirect('login')
+    project, role = resolve_access(request, kwargs['pk'])
+    if role is None:
+        return redirect('project-list')
+    # imported here so that pandas and numpy are only loaded when a chart is drawn
+    from .gantt_svg import get_cached_svg
+    return HttpResponse(get_cached_svg(project.pk, project.schedule_version), content_type='image/svg+xml')
+
+# Timeline of a project as JSON, for clients drawing the chart themselves
+# The ETag changes with the schedule version and the project itself, a client sending it
+# back in If-None-Match gets a 304 Not Modified as long as nothing changed
+# Only the portfolio timelines use it so far: the Gantt page (gantt above) is still drawn by
+# the SteamGantt Dash app and does not benefit from the ETag
+def gantt_json(request, **kwargs):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    project, role = resolve_access(request, kwargs['pk'])
+    if role is None:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    etag = quote_etag('{}-{}-{}'.format(project.pk, project.schedule_version, project.updated_at.timestamp()))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        key = 'gantt-json-' + etag.strip('"')
+        content = cache.get(key)
+        if content is None:
+            # imported here so that pandas and numpy are only loaded when a chart is drawn
+            from .gantt_data import schedule_payload
+            content = JsonResponse(schedule_payload(project.pk)).content
+            cache.set(key, content, 60 * 60 * 24)
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    # clients may keep the payload but must check it is still current
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def export_response(lines, format, filename):
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[format])
+    response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(filename, format)
+    return response
+
+# Tasks and meetings of a project, streamed as CSV or NDJSON
+def project_export(request, pk, format):
+    if not request.user.is_authenticated:
+        return redirect('login')
+    if format not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+    project, role = get_project_or_404(request, pk)
+    if role is None:
+        return HttpResponse(status=403)
+    return export_response(export_lines(format, [project.pk]), format, 'steam-{}'.format(project.key))
+
+# Tasks and meetings of every project, for staff
+def export_all(request, format):
+    if not request.user.is_authenticated:
+        return redirect('login')
+    if not request.user.is_staff:
+        return HttpResponse(status=403)
+    if format not in EXPORT_FORMATS:
+        raise Http404('Unknown export format')
+    return export_response(export_lines(format), format, 'steam-{}'.format(timezone.now().date().isoformat()))
+
+# Number of concurrent tasks of each user over time, across all projects
+# Staff see everyone, other users see themselves and the people they share a project with
+def workload(request):
+    if not request.user.is_authenticated:
+        return redirect('login')
+    # imported here so that numpy is only loaded when the workload is drawn
+    from .workload import WORKLOAD_DAYS, DAILY_MAX_DAYS, workload_matrix
+
+    users = User.objects.order_by('username')
+    if not request.user.is_staff:
+        projects = list(visible_projects(request.user))
+        users = users.filter(Q(pk=request.user.pk) | Q(projects__in=projects) | Q(owned_projects__in=projects))
+    users = list(users.distinct().values_list('pk', 'username'))
+
+    try:
+        first = date.fromisoformat(request.GET['start']) if request.GET.get('start') else \
+            timezone.now().date() - timedelta(days=7)
+        days = min(max(int(request.GET.get('days', WORKLOAD_DAYS)), 1), 3 * 365)
+    except ValueError:
+        return redirect('workload')
+    last = first + timedelta(days=days - 1)
+    step = 'week' if days > DAILY_MAX_DAYS else 'day'
+    columns, matrix = workload_matrix([pk for pk, _ in users], first, last, step)
+
+    peak = max(int(matrix.max()) if matrix.size else 0, 1)
+    rows = [(username, [(load, round(load / peak, 2)) for load in loads.tolist()])
+            for (_, username), loads in zip(users, matrix)]
+    return render(request, 'workload/workload.html', {
+        'columns': columns, 'rows': rows, 'step': step, 'first': first, 'days': days,
+        'previous': first - timedelta(days=days), 'next': first + timedelta(days=days)})
+
 def loginPage(request):
     if request.user.is_authenticated:
         return redirect('project-list')
@@ -0,0 +1,92 @@
+from datetime import timedelta
+import numpy as np
+from django.core.cache import cache
+from .models import Task, MyUser
+
+# Cached workloads are kept for a day at most
+WORKLOAD_TIMEOUT = 60 * 60 * 24
+# Days shown by default, and longer ranges are shown per week
+WORKLOAD_DAYS = 84
+DAILY_MAX_DAYS = 120
+
+
+def workload_cache_key(user_id, version):
+    return 'workload-{}-{}'.format(user_id, version)
+
+
+def compute_loads(user_ids):
+    """
+    Return {user id: (first day ordinal, loads)} where loads[i] is the number of tasks assigned
+    to the user on the i-th day after the first one, across all projects.
+
+    The assignments of every user are pulled in one query, then each user's load is an interval
+    sweep: +1 on the first day of each task, -1 the day after its last day, cumulative sum.
+    """
+    rows = list(Task.assignees.through.objects.filter(myuser_id__in=user_ids)
+                .values_list('myuser_id', 'task__start_date', 'task__end_date').order_by())
+    loads = {user_id: (0, np.zeros(0, dtype=np.int32)) for user_id in user_ids}
+    if not rows:
+        return loads
+    users, starts, ends = (np.array(column, dtype=np.int64) for column in zip(
+        *((user_id, start.toordinal(), end.toordinal()) for user_id, start, end in rows)))
+
+    order = np.argsort(users, kind='stable')
+    users, starts, ends = users[order], starts[order], ends[order]
+    bounds = np.flatnonzero(np.diff(users)) + 1
+    for user_id, user_starts, user_ends in zip(users[np.r_[0, bounds]], np.split(starts, bounds),
+                                               np.split(ends, bounds)):
+        first = user_starts.min()
+        diff = np.zeros(user_ends.max() - first + 2, dtype=np.int32)
+        np.add.at(diff, user_starts - first, 1)
+        np.add.at(diff, user_ends - first + 1, -1)
+        loads[int(user_id)] = (int(first), np.cumsum(diff[:-1], dtype=np.int32))
+    return loads
+
+
+def get_loads(user_ids):
+    """
+    Return the loads of the given users like compute_loads, from the cache when the user's
+    workload version did not change. Only the users whose tasks changed are computed again.
+    """
+    versions = dict(MyUser.objects.filter(pk__in=user_ids).values_list('pk', 'workload_version'))
+    keys = {user_id: workload_cache_key(user_id, version) for user_id, version in versions.items()}
+    cached = cache.get_many(keys.values())
+    loads = {user_id: cached[key] for user_id, key in keys.items() if key in cached}
+    missing = [user_id for user_id in keys if user_id not in loads]
+    if missing:
+        computed = compute_loads(missing)
+        cache.set_many({keys[user_id]: load for user_id, load in computed.items()}, WORKLOAD_TIMEOUT)
+        loads.update(computed)
+    return loads
+
+
+def load_between(load, first, last):
+    """Return the daily load of a user from the first to the last day (inclusive)."""
+    start, counts = load
+    days = np.zeros((last - first).days + 1, dtype=np.int32)
+    offset = start - first.toordinal()
+    # part of the user's load within the range
+    lo, hi = max(offset, 0), min(offset + len(counts), len(days))
+    if lo < hi:
+        days[lo:hi] = counts[lo - offset:hi - offset]
+    return days
+
+
+def workload_matrix(user_ids, first, last, step='day'):
+    """
+    Return (column first days, matrix) where matrix[i][j] is the number of concurrent tasks of
+    the i-th user on the j-th day, or the highest such number within the j-th week (starting on
+    Monday) when step is 'week'.
+    """
+    if step == 'week':
+        first -= timedelta(days=first.weekday())
+    loads = get_loads(user_ids)
+    days = [first + timedelta(days=n) for n in range((last - first).days + 1)]
+    matrix = np.zeros((len(user_ids), len(days)), dtype=np.int32)
+    for row, user_id in enumerate(user_ids):
+        if user_id in loads:
+            matrix[row] = load_between(loads[user_id], first, last)
+    if step == 'week':
+        matrix = np.maximum.reduceat(matrix, np.arange(0, len(days), 7), axis=1)
+        days = days[::7]
+    return days, matrix
@@ -98,6 +98,18 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Per-process memory cache, use a shared backend (memcached, redis) when running several workers
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'steam',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -162,6 +174,11 @@ STATICFILES_FINDERS = [
     'django_plotly_dash.finders.DashAppDirectoryFinder',
 ]
 
+# Dash apps are imported on first use instead of at URLconf loading
+PLOTLY_DASH = {
+    'stateless_loader': 'core.dash_apps.load_stateless_app',
+}
+
 # Plotly components containing static content that should
 # be handled by the Django staticfiles infrastructure
 PLOTLY_COMPONENTS = [